@@ -2,14 +2,26 @@ from maya import cmds, mel
 from PySide2 import QtWidgets, QtCore, QtGui
 from shiboken2 import wrapInstance
 import maya.OpenMayaUI as omui
-import os, shutil, sys, threading, time, webbrowser, re, json, ssl, urllib.request, urllib.error
-import importlib
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
+import maya.api.OpenMayaUI as omui2
+import maya.utils
+import os, shutil, sys, threading, time, webbrowser, re, json, ssl, struct, hashlib, urllib.parse, urllib.request, urllib.error, zlib
+import array, functools, heapq, importlib, inspect, math, random, types
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # ========================
 # 全局变量和配置
 # ========================
 modeling_tools_dialog = None
 CACHE_DIR = os.path.join(os.path.expanduser("~"), "Documents", "PolyHaven_HDRI")
+TOOL_DATA_DIR = os.path.join(os.path.expanduser("~"), "Documents", "3D_Assistant")
 SUPPORTED_RES = ["1k", "2k", "4k", "8k"] 
 SUPPORTED_FMT = ["hdr", "exr"]
 DL_HOST = "https://dl.polyhaven.org"
@@ -17,7 +29,8 @@ TIMEOUT = 60
 SSL_CTX = ssl.create_default_context()
 CURRENT_VERSION = "1.1"
 GITHUB_VERSION_URL = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/version.txt"
-GITHUB_SCRIPT_URL = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/Assistant_tool.py"
+GITHUB_RAW_URL = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/"
+INSTALL_MANIFEST = "manifest.json"
 GITHUB_BANNER_URL = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/3D_Modeling_Assistant.png"
 GITHUB_PAGE_URL = "https://help.autodesk.com/view/ARNOL/ENU/?guid=arnold_for_maya_am_Arnold_for_Maya_User_Guide_html"
 COLOR_PRESETS = [
@@ -32,8 +45,155 @@ COLOR_PRESETS = [
     {"name": "Dark Gray", "rgb": (0.3, 0.3, 0.3)},
     {"name": "Charcoal", "rgb": (0.1, 0.1, 0.1)}
 ]
+SKYDOME_HANDLE = {}
+LIGHT_PRESET_ATTR = "assistantLightingPreset"
+LIGHT_PRESET_FILE = "lighting_presets.json"
+SLIDER_UPDATE_INTERVAL_MS = 33
 COLOR_MAP_PATH = ""
 OPACITY_MAP_PATH = ""
+ACTION_HISTORY_SIZE = 50
+ACTION_HISTORY = {}
+API_UNDO_COMMAND = "assistantApiUndo"
+API_UNDO_MODULE = "_assistant_api_undo"
+API_UNDO_PLUGIN_PATH = os.path.join(TOOL_DATA_DIR, "assistant_api_undo.py")
+PROFILER = None
+PROFILER_MAX_EVENTS = 200000
+MATERIAL_TAG_ATTR = "assistantMaterialKey"
+TOOL_NODE_ATTR = "assistantToolNode"
+MATERIAL_COLOR_STEP = 0.02
+MATERIAL_CACHE = {}
+MATERIAL_CACHE_SCENE = None
+RULE_MATCH_TYPES = ["Name", "Path", "Set", "Layer"]
+TEXTURE_REGISTRY = {}
+TEXTURE_REGISTRY_SCENE = None
+IMAGE_PROBE_CACHE = {}
+IMAGE_PROBE_TTL = 30.0
+FILE_HASH_CACHE = {}
+OPACITY_ANALYSIS_CACHE = {}
+OPACITY_ANALYSIS_LOCK = threading.Lock()
+OPACITY_ANALYSIS_FILE = os.path.join(TOOL_DATA_DIR, "opacity_analysis.json")
+OPACITY_ANALYSIS_MAX_SIZE = 4096
+OPACITY_SOFT_TOLERANCE = 0.02
+TRANSPARENCY_MODE_ATTR = "assistantTransparency"
+VIEWPORT_TRANSPARENCY_ALGORITHMS = {"opaque": 1, "cutout": 6, "blend": 5}
+VIEWPORT_PERF_TARGET_FPS = 24
+VIEWPORT_PERF_INTERVAL_MS = 1000
+VIEWPORT_PERF_MIN_FRAMES = 3
+# 两帧之间空闲超过该时长时视口不是在连续绘制，这一帧只按绘制时间计
+VIEWPORT_PERF_IDLE_GAP_MS = 100
+VIEWPORT_PERF_SLOW_TICKS = 2
+VIEWPORT_PERF_FAST_TICKS = 5
+VIEWPORT_PERF_RECOVER_RATIO = 0.5
+VIEWPORT_PERF_LEVELS = [
+    {"name": "Effects Off",
+     "globals": {"ssaoEnable": 0, "motionBlurEnable": 0, "multiSampleEnable": 0, "transparencyAlgorithm": 1,
+                 "transparencyQuality": 0.33},
+     "editor": {"shadows": False}},
+    {"name": "Low Textures",
+     "globals": {"enableTextureMaxRes": 1, "textureMaxResolution": 512},
+     "editor": {}, "smooth_mesh_off": True},
+    {"name": "Minimal",
+     "globals": {"textureMaxResolution": 128},
+     "editor": {"displayLights": "default"}}
+]
+VIEWPORT_PERFORMANCE = None
+PURGE_NODE_TYPES = ["shadingEngine", "aiStandardSurface", "file", "aiUserDataColor", "place2dTexture"]
+PURGE_IGNORED_TYPES = {"defaultShaderList", "defaultTextureList", "defaultRenderUtilityList", "materialInfo",
+                       "lightLinker", "partition", "nodeGraphEditorInfo"}
+# 旧版工具不加标记，只能按名称识别它留下的网络，清理时还要检查结构并由用户确认
+PURGE_LEGACY_NAMES = "|".join([re.escape(c["name"].replace(" ", "_")) for c in COLOR_PRESETS] + ["Custom_[0-9_]+", "Transparency", "ID_Color"])
+PURGE_LEGACY_PATTERN = re.compile(rf"^(?P<base>{PURGE_LEGACY_NAMES})(_transparency)?_mat\d*(?P<sg>SG\d*)?$|^({PURGE_LEGACY_NAMES})_(color|opacity)_file\d*$|^ID_Color_userData\d*$")
+PURGE_NODE_BYTES = {"shadingEngine": 900, "aiStandardSurface": 700, "file": 1200, "aiUserDataColor": 300, "place2dTexture": 400}
+CAMERA_STORE_NODE = "assistantCameraSnapshots"
+CAMERA_STORE_ATTR = "snapshotData"
+CAMERA_PROJECT_FILE = "camera_snapshots.json"
+CAMERA_SNAPSHOTS = None
+CAMERA_TRANSFORM_ATTRS = ["translate", "rotate", "scale", "rotateOrder"]
+CAMERA_SHAPE_ATTRS = ["focalLength", "horizontalFilmAperture", "verticalFilmAperture", "horizontalFilmOffset",
+                      "verticalFilmOffset", "filmFit", "lensSqueezeRatio", "cameraScale", "nearClipPlane", "farClipPlane",
+                      "orthographic", "orthographicWidth", "depthOfField", "fStop", "focusDistance"]
+CAMERA_INT_ATTRS = {"rotateOrder", "filmFit", "orthographic", "depthOfField"}
+CAMERA_ROTATE_ORDERS = ["xyz", "yzx", "zxy", "xzy", "yxz", "zyx"]
+BAKE_EASINGS = {
+    "Ease In Out": lambda u: u * u * (3.0 - 2.0 * u),
+    "Linear": lambda u: u,
+    "Ease In": lambda u: u * u,
+    "Ease Out": lambda u: 1.0 - (1.0 - u) ** 2
+}
+PREVIEW_SIZE = (192, 108)
+PREVIEW_DIR = os.path.join(TOOL_DATA_DIR, "snapshot_previews")
+PREVIEW_WINDOW = "assistantPreviewWindow"
+PREVIEW_PANEL = "assistantPreviewPanel"
+THUMBNAIL_SIZE = 96
+THUMBNAIL_DIR = os.path.join(TOOL_DATA_DIR, "thumbnails")
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_EXECUTOR = None
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PREVIEW_CACHE_MAX_BYTES = 128 * 1024 * 1024
+RECENT_MAPS_FILE = os.path.join(TOOL_DATA_DIR, "recent_maps.json")
+RECENT_MAPS_SIZE = 10
+NETWORK_METRICS_FILE = os.path.join(TOOL_DATA_DIR, "network_metrics.jsonl")
+NETWORK_METRICS_MAX_BYTES = 1024 * 1024
+NETWORK_METRICS_BACKUPS = 3
+NETWORK_PROM_FILE = os.path.join(os.environ.get("ASSISTANT_PROM_TEXTFILE_DIR", TOOL_DATA_DIR), "assistant_network.prom")
+NETWORK_RECENT = deque(maxlen=50)
+NETWORK_TOTALS = {}
+NETWORK_LOCK = threading.Lock()
+LATENCY_SAMPLES = {}
+LATENCY_SAMPLE_SIZE = 200
+LATENCY_MIN_SAMPLES = 5
+LATENCY_LOADED = False
+HTTP_TIMEOUT_MIN = 5.0
+HTTP_TIMEOUT_FACTOR = 4.0
+HTTP_RETRIES = 2
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 8.0
+HTTP_HEDGE_PERCENTILE = 95
+HTTP_STALL_WINDOW = 10.0
+HTTP_STALL_MIN_BPS = 16 * 1024
+HTTP_EXECUTOR = None
+URL_CLASSES = [
+    ("api.polyhaven.com", "api"),
+    ("dl.polyhaven.org", "hdri"),
+    ("raw.githubusercontent.com", "update")
+]
+ID_COLOR_MODES = ["Random", "Name Hash", "Palette"]
+ID_COLOR_USER_DATA = "idColor"
+ID_COLOR_ATTR = "mtoa_constant_" + ID_COLOR_USER_DATA
+ID_COLOR_CACHE_KEY = "ID_Color|user_data"
+SCENE_STATS = {}
+SCENE_STATS_DIRTY = set()
+SCENE_STATS_ADDED = []
+SCENE_STATS_WATCHERS = {}
+SCENE_STATS_CALLBACK_IDS = []
+SCENE_STATS_TOP = 200
+SCENE_STATS_COLUMNS = [("faces", "Faces"), ("drawn_faces", "Drawn Faces"), ("vertices", "Vertices"), ("uvs", "UVs"),
+                       ("instances", "Instances"), ("materials", "Materials"), ("size", "Size")]
+SCATTER_SAMPLING_MODES = ["Random", "Poisson Disk"]
+SCATTER_TARGET_MODES = ["Surface", "Volume"]
+SCATTER_MAX_COUNT = 100000
+SCATTER_POISSON_OVERSAMPLE = 4
+LOD_CACHE_DIR = os.path.join(TOOL_DATA_DIR, "lod_cache")
+LOD_RATIOS = [0.5, 0.25, 0.1]
+LOD_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+LOD_TIMEOUT = 600
+LOD_MAYAPY = os.environ.get("MAYAPY")
+LOD_WORKER_COMMAND = None
+LOD_SHAPE_PATTERN = re.compile(r"_LOD(\d{3})$")
+MESH_FILE_MAGIC = b"AMS2"
+# 网格文件依次保存的数组和类型码，UV为默认UV集
+MESH_FILE_ARRAYS = [("points", "d"), ("counts", "i"), ("connects", "i"), ("u", "f"), ("v", "f"), ("uv_counts", "i"), ("uv_ids", "i")]
+BATCH_CHUNK_SIZE = 50
+BATCH_TARGET_MODES = ["Selection", "Set", "Name Pattern", "Scene"]
+HEALTH_TOLERANCE = 0.0001
+HEALTH_SET_PREFIX = "meshHealth_"
+HEALTH_CHECKS = [
+    ("coincident_vertices", "Coincident Vertices", "vtx"),
+    ("zero_area_faces", "Zero-Area Faces", "f"),
+    ("lamina_faces", "Lamina Faces", "f"),
+    ("nonmanifold_edges", "Non-Manifold Edges", "e"),
+    ("unmerged_seams", "Unmerged Seams", "vtx")
+]
 
 # ========================
 # 文件系统工具函数
@@ -78,12 +238,259 @@ def parse_input(text):
     m2 = re.search(r'/([a-zA-Z0-9_\-]+)(?:\.[a-zA-Z0-9]+)?$', text)
     return (strip_trailing_res(m2.group(1)), None, None) if m2 else (None, None, None)
 
+# ========================
+# 网络遥测
+# ========================
+def url_class(url):
+    """按主机名对URL分类"""
+    host = urllib.parse.urlsplit(url).hostname or ""
+    return next((cls for suffix, cls in URL_CLASSES if host.endswith(suffix)), "other")
+
+def start_transfer(url, method="GET", cache=None):
+    """开始记录一次传输"""
+    return {
+        "time": time.time(),
+        "host": urllib.parse.urlsplit(url).hostname or "",
+        "class": url_class(url),
+        "url": url,
+        "method": method,
+        "status": None,
+        "bytes": 0,
+        "ttfb_ms": None,
+        "total_ms": None,
+        "bytes_per_sec": None,
+        "retries": 0,
+        "hedged": False,
+        "timeout_s": None,
+        "cache": cache,
+        # urllib.request每个请求都新建连接并发送Connection: close
+        "reused": False,
+        "ok": False,
+        "error": None,
+        "_start": time.perf_counter()
+    }
+
+def finish_transfer(record, error=None):
+    """结束一次传输，写入指标文件并更新汇总"""
+    elapsed = time.perf_counter() - record.pop("_start")
+    record["total_ms"] = round(elapsed * 1000.0, 2)
+    if record["bytes"] and elapsed > 0:
+        record["bytes_per_sec"] = round(record["bytes"] / elapsed, 1)
+    record["ok"] = error is None
+    record["error"] = str(error) if error is not None else None
+    with NETWORK_LOCK:
+        NETWORK_RECENT.append(record)
+        key = (record["host"], record["class"])
+        totals = NETWORK_TOTALS.setdefault(key, {
+            "requests": 0, "errors": 0, "bytes": 0, "seconds": 0.0, "ttfb_seconds": 0.0, "ttfb_count": 0,
+            "retries": 0, "hedged": 0, "cache_hits": 0, "cache_misses": 0, "reused": 0, "last_bytes_per_sec": 0.0
+        })
+        totals["requests"] += 1
+        totals["errors"] += 0 if record["ok"] else 1
+        if record["cache"] != "hit":
+            totals["bytes"] += record["bytes"]
+            totals["seconds"] += elapsed
+        totals["retries"] += record["retries"]
+        totals["hedged"] += 1 if record["hedged"] else 0
+        totals["reused"] += 1 if record["reused"] else 0
+        if record["ttfb_ms"] is not None:
+            totals["ttfb_seconds"] += record["ttfb_ms"] / 1000.0
+            totals["ttfb_count"] += 1
+            if record["ok"]:
+                add_latency_sample(record["class"], record["ttfb_ms"])
+        if record["cache"] == "hit":
+            totals["cache_hits"] += 1
+        elif record["cache"] == "miss":
+            totals["cache_misses"] += 1
+        if record["bytes_per_sec"] and record["cache"] != "hit":
+            totals["last_bytes_per_sec"] = record["bytes_per_sec"]
+        try:
+            append_network_metrics(record)
+            write_prometheus_summary()
+        except OSError as e:
+            cmds.warning(f"Failed to write network metrics: {e}")
+    return record
+
+def append_network_metrics(record):
+    """追加一条JSON记录，超过大小上限时轮转文件"""
+    ensure_dir(os.path.dirname(NETWORK_METRICS_FILE))
+    if os.path.exists(NETWORK_METRICS_FILE) and os.path.getsize(NETWORK_METRICS_FILE) > NETWORK_METRICS_MAX_BYTES:
+        for i in range(NETWORK_METRICS_BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{NETWORK_METRICS_FILE}.{i}"):
+                os.replace(f"{NETWORK_METRICS_FILE}.{i}", f"{NETWORK_METRICS_FILE}.{i + 1}")
+        os.replace(NETWORK_METRICS_FILE, f"{NETWORK_METRICS_FILE}.1")
+    with open(NETWORK_METRICS_FILE, "a") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+def write_prometheus_summary():
+    """以node exporter textfile格式原子写入汇总指标"""
+    metrics = [
+        ("assistant_http_requests_total", "counter", "Transfers made by the tool", "requests"),
+        ("assistant_http_errors_total", "counter", "Transfers that failed", "errors"),
+        ("assistant_http_bytes_total", "counter", "Bytes received", "bytes"),
+        ("assistant_http_seconds_total", "counter", "Wall time spent in transfers", "seconds"),
+        ("assistant_http_ttfb_seconds_sum", "counter", "Sum of time to first byte", "ttfb_seconds"),
+        ("assistant_http_ttfb_seconds_count", "counter", "Transfers with a measured time to first byte", "ttfb_count"),
+        ("assistant_http_retries_total", "counter", "Retried attempts", "retries"),
+        ("assistant_http_hedged_total", "counter", "Transfers that sent a hedged second request", "hedged"),
+        ("assistant_http_cache_hits_total", "counter", "Downloads served from the local cache", "cache_hits"),
+        ("assistant_http_cache_misses_total", "counter", "Downloads that went to the network", "cache_misses"),
+        ("assistant_http_connection_reuse_total", "counter", "Transfers on a reused connection", "reused"),
+        ("assistant_http_last_throughput_bytes_per_second", "gauge", "Throughput of the last network transfer", "last_bytes_per_sec")
+    ]
+    lines = []
+    for name, kind, help_text, key in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (host, cls), totals in sorted(NETWORK_TOTALS.items()):
+            lines.append(f'{name}{{host="{host}",class="{cls}"}} {totals[key]}')
+    ensure_dir(os.path.dirname(NETWORK_PROM_FILE))
+    tmp_path = NETWORK_PROM_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, NETWORK_PROM_FILE)
+
+def record_cache_hit(url, path):
+    """记录一次由本地缓存满足的下载"""
+    record = start_transfer(url, cache="hit")
+    record["bytes"] = os.path.getsize(path)
+    return finish_transfer(record)
+
+def recent_throughput(count=10, url_classes=None):
+    """汇总最近几次网络传输的吞吐量"""
+    with NETWORK_LOCK:
+        records = [r for r in NETWORK_RECENT if r["cache"] != "hit" and (url_classes is None or r["class"] in url_classes)]
+    records = records[-count:]
+    if not records: return None
+    ok = [r for r in records if r["ok"] and r["bytes_per_sec"]]
+    ttfb = [r["ttfb_ms"] for r in records if r["ttfb_ms"] is not None]
+    return {
+        "count": len(records),
+        "errors": len(records) - sum(1 for r in records if r["ok"]),
+        "avg_bytes_per_sec": sum(r["bytes_per_sec"] for r in ok) / len(ok) if ok else 0.0,
+        "avg_ttfb_ms": sum(ttfb) / len(ttfb) if ttfb else None,
+        "last": records[-1]
+    }
+
+def format_throughput(bytes_per_sec):
+    """格式化吞吐量"""
+    if bytes_per_sec >= 1024 * 1024:
+        return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+    return f"{bytes_per_sec / 1024:.0f} KB/s"
+
+# ========================
+# 自适应超时与重试
+# ========================
+class StalledTransferError(TimeoutError):
+    """下载速度持续低于下限"""
+
+def add_latency_sample(cls, ttfb_ms):
+    """记录一次成功请求的首字节时间"""
+    LATENCY_SAMPLES.setdefault(cls, deque(maxlen=LATENCY_SAMPLE_SIZE)).append(ttfb_ms)
+
+def load_latency_samples():
+    """从指标文件末尾读取历史首字节时间，使新会话的第一次下载也有超时依据"""
+    global LATENCY_LOADED
+    if LATENCY_LOADED: return
+    LATENCY_LOADED = True
+    try:
+        with open(NETWORK_METRICS_FILE, "r") as f:
+            lines = deque(f, maxlen=LATENCY_SAMPLE_SIZE * 2)
+    except OSError:
+        return
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("ok") and record.get("ttfb_ms") is not None and record.get("cache") != "hit":
+            add_latency_sample(record.get("class", "other"), record["ttfb_ms"])
+
+def latency_percentile(cls, percentile):
+    """获取某类URL首字节时间的百分位数(秒)，样本不足时返回None"""
+    load_latency_samples()
+    with NETWORK_LOCK:
+        samples = sorted(LATENCY_SAMPLES.get(cls, ()))
+    if len(samples) < LATENCY_MIN_SAMPLES: return None
+    index = min(len(samples) - 1, max(0, int(round(percentile / 100.0 * len(samples))) - 1))
+    return samples[index] / 1000.0
+
+def adaptive_timeout(cls, ceiling):
+    """按p99首字节时间推算超时，不超过调用方给出的上限"""
+    p99 = latency_percentile(cls, 99)
+    if p99 is None: return ceiling
+    return min(ceiling, max(HTTP_TIMEOUT_MIN, p99 * HTTP_TIMEOUT_FACTOR))
+
+def hedge_delay(cls):
+    """超过p95首字节时间仍未响应时发出第二个请求"""
+    return latency_percentile(cls, HTTP_HEDGE_PERCENTILE)
+
+def backoff_delay(attempt):
+    """指数退避加全抖动"""
+    return random.uniform(0.0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+def is_retryable(error):
+    """判断失败是否值得重试：超时、连接错误、429和5xx"""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    if isinstance(getattr(error, "reason", error), ssl.SSLCertVerificationError):
+        return False
+    return isinstance(error, OSError)
+
+def http_executor():
+    """获取发送对冲请求的线程池"""
+    global HTTP_EXECUTOR
+    if HTTP_EXECUTOR is None:
+        HTTP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="http")
+    return HTTP_EXECUTOR
+
+def _close_unused_response(future):
+    """关闭对冲中落后的响应"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+class _MeteredResponse(object):
+    """统计读取字节数的响应包装，关闭时记录传输"""
+    def __init__(self, resp, record):
+        self._resp, self.record = resp, record
+
+    def __getattr__(self, name):
+        return getattr(self._resp, name)
+
+    def read(self, *args):
+        data = self._resp.read(*args)
+        if self.record is not None:
+            self.record["bytes"] += len(data)
+        return data
+
+    def read1(self, *args):
+        data = self._resp.read1(*args)
+        if self.record is not None:
+            self.record["bytes"] += len(data)
+        return data
+
+    def close(self, error=None):
+        if self.record is not None:
+            finish_transfer(self.record, error)
+            self.record = None
+        self._resp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(exc)
+        return False
+
 # ========================
 # HTTP客户端
 # ========================
 class HttpClient:
-    """处理HTTP请求的客户端"""
-    def __init__(self):
+    """处理HTTP请求的客户端，每次传输都记录网络遥测"""
+    def __init__(self, ssl_context=None):
+        if ssl_context is not None:
+            self.opener = urllib.request.build_opener(urllib.request.HTTPSHandler(context=ssl_context))
+            return
         try:
             self.opener = urllib.request.build_opener(urllib.request.HTTPSHandler(context=SSL_CTX))
         except ssl.SSLError:
@@ -93,44 +500,121 @@ class HttpClient:
             self.opener = urllib.request.build_opener(urllib.request.HTTPSHandler(context=ctx))
             cmds.warning("SSL certificate verification disabled (fallback mode)")
 
-    def open(self, url, method="GET", timeout=TIMEOUT, headers=None):
-        """打开URL连接"""
-        req = urllib.request.Request(url, method=method, headers={"User-Agent": "Maya-PolyHaven-Integration", **(headers or {})})
-        return self.opener.open(req, timeout=timeout)
+    def open(self, url, method="GET", timeout=TIMEOUT, headers=None, cache=None, retries=HTTP_RETRIES, retry=False):
+        """打开URL连接，返回的响应在关闭时记录传输
+
+        timeout是上限，实际超时由该类URL的首字节时间分布推算；慢于p95时发出对冲请求，
+        可重试的失败按指数退避加抖动重试retries次。retry表示这次请求本身是调用方的一次重试。
+        """
+        cls = url_class(url)
+        record = start_transfer(url, method, cache)
+        record["retries"] = int(retry)
+        record["timeout_s"] = timeout = adaptive_timeout(cls, timeout)
+        all_headers = {"User-Agent": "Maya-PolyHaven-Integration", **(headers or {})}
+        opener = lambda: self.opener.open(urllib.request.Request(url, method=method, headers=all_headers), timeout=timeout)
+        for attempt in range(retries + 1):
+            try:
+                resp, ttfb = self.open_hedged(opener, hedge_delay(cls), record)
+                break
+            except Exception as e:
+                if attempt < retries and is_retryable(e):
+                    record["retries"] += 1
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                record["status"] = getattr(e, "code", None)
+                finish_transfer(record, e)
+                raise
+        record["ttfb_ms"] = round(ttfb * 1000.0, 2)
+        record["status"] = getattr(resp, "status", None)
+        return _MeteredResponse(resp, record)
+
+    def open_hedged(self, opener, delay, record):
+        """发出请求，超过delay秒未响应时再发一个相同请求，返回先成功的响应和首字节时间"""
+        start = time.perf_counter()
+        if delay is None:
+            return opener(), time.perf_counter() - start
+        first = http_executor().submit(opener)
+        if wait_futures([first], timeout=delay).done:
+            return first.result(), time.perf_counter() - start
+        record["hedged"] = True
+        pending, error = {first, http_executor().submit(opener)}, None
+        while pending:
+            done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+            winners = [f for f in done if f.exception() is None]
+            if winners:
+                for f in list(pending) + winners[1:]:
+                    f.add_done_callback(_close_unused_response)
+                return winners[0].result(), time.perf_counter() - start
+            error = next(iter(done)).exception()
+        raise error
+
+    def read(self, url, timeout=TIMEOUT):
+        """读取URL的全部内容"""
+        with self.open(url, timeout=timeout) as resp:
+            return resp.read()
 
     def try_head_or_range(self, url, timeout=15):
-        """尝试HEAD请求或范围请求"""
+        """尝试HEAD请求或范围请求，探测不重试以便尽快换下一个候选"""
         try:
-            with self.open(url, method="HEAD", timeout=timeout) as resp:
+            with self.open(url, method="HEAD", timeout=timeout, retries=0) as resp:
                 return 200 <= getattr(resp, "status", 200) < 400
         except Exception:
             try:
-                with self.open(url, timeout=timeout, headers={"Range": "bytes=0-64"}) as resp:
+                with self.open(url, timeout=timeout, headers={"Range": "bytes=0-64"}, retries=0) as resp:
                     code = getattr(resp, "status", 200)
                     return (200 <= code < 400) or code == 206
             except Exception:
                 return False
 
     def download(self, url, save_path, progress_cb=None):
-        """下载文件并保存"""
+        """下载文件并保存，速度持续过低或连接中断时退避后从断点续传
+
+        重试只在这一层进行，单次下载内部打开连接时不再重试。
+        """
         tmp_path = save_path + ".part"
         try:
-            with self.open(url) as resp:
-                total = int(resp.headers.get("Content-Length", 0))
-                with open(tmp_path, "wb") as f:
-                    read = 0
-                    while True:
-                        data = resp.read(262144)
-                        if not data: break
-                        f.write(data)
-                        read += len(data)
-                        if progress_cb and total: progress_cb(read, total)
+            for attempt in range(HTTP_RETRIES + 1):
+                try:
+                    self.download_attempt(url, tmp_path, attempt, progress_cb)
+                    break
+                except Exception as e:
+                    if attempt == HTTP_RETRIES or not is_retryable(e): raise
+                    time.sleep(backoff_delay(attempt))
             shutil.move(tmp_path, save_path)
             return save_path
         finally:
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
 
+    def download_attempt(self, url, tmp_path, attempt, progress_cb=None):
+        """下载一次，已有部分文件时请求剩余字节"""
+        offset = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        with self.open(url, cache="miss", headers=headers, retries=0, retry=attempt > 0) as resp:
+            if offset and getattr(resp, "status", 200) != 206:
+                offset = 0
+            length = int(resp.headers.get("Content-Length", 0))
+            total = offset + length if length else 0
+            with open(tmp_path, "ab" if offset else "wb") as f:
+                read = offset
+                window_start, window_bytes = time.perf_counter(), 0
+                while True:
+                    # read1返回已到达的数据，不等凑满缓冲区，慢速连接也能及时检查速度
+                    data = resp.read1(262144)
+                    if not data: break
+                    f.write(data)
+                    read += len(data)
+                    window_bytes += len(data)
+                    now = time.perf_counter()
+                    if now - window_start >= HTTP_STALL_WINDOW:
+                        rate = window_bytes / (now - window_start)
+                        if rate < HTTP_STALL_MIN_BPS:
+                            raise StalledTransferError(f"Transfer stalled at {rate / 1024:.1f} KB/s: {url}")
+                        window_start, window_bytes = now, 0
+                    if progress_cb and total: progress_cb(read, total)
+            if total and read < total:
+                raise ConnectionError(f"Transfer ended early at {read} of {total} bytes: {url}")
+
 # ========================
 # HDRI相关功能
 # ========================
@@ -172,6 +656,7 @@ def try_download(client, asset, pref_res, pref_fmt, progress_cb=None):
             tried.append(url)
             save_path = build_cache_path(asset, res, fmt)
             if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
+                record_cache_hit(url, save_path)
                 return save_path, res, fmt, tried
             if not files and not client.try_head_or_range(url): continue
             try:
@@ -181,12 +666,34 @@ def try_download(client, asset, pref_res, pref_fmt, progress_cb=None):
                 continue
     return None, None, None, tried
 
-def get_existing_skydome():
-    """获取现有的天空球灯光"""
-    existing = next((s for s in cmds.ls(type="aiSkyDomeLight") or [] if cmds.listRelatives(s, parent=True)), None)
-    if existing:
-        return cmds.listRelatives(existing, parent=True)[0], existing
-    return None, None
+def get_existing_skydome(include_presets=True):
+    """获取现有的天空球灯光，优先返回可见的"""
+    domes = []
+    for shape in cmds.ls(type="aiSkyDomeLight") or []:
+        parent = cmds.listRelatives(shape, parent=True)
+        if not parent: continue
+        if not include_presets and cmds.attributeQuery(LIGHT_PRESET_ATTR, node=parent[0], exists=True): continue
+        domes.append((parent[0], shape))
+    visible = next((d for d in domes if cmds.getAttr(d[0] + ".visibility")), None)
+    return visible or (domes[0] if domes else (None, None))
+
+def get_skydome_handle():
+    """获取缓存的天空球节点，缓存由删除和重命名回调失效"""
+    if SKYDOME_HANDLE and SCENE_CALLBACK_IDS:
+        return SKYDOME_HANDLE["transform"], SKYDOME_HANDLE["shape"]
+    t, s = get_existing_skydome()
+    if s:
+        SKYDOME_HANDLE.update(transform=t, shape=s)
+    return t, s
+
+def invalidate_skydome_handle(*args):
+    """清除缓存的天空球节点"""
+    SKYDOME_HANDLE.clear()
+
+def on_node_renamed(node, previous_name, client_data=None):
+    """缓存的天空球被重命名时使缓存失效"""
+    if SKYDOME_HANDLE and previous_name in (SKYDOME_HANDLE["transform"], SKYDOME_HANDLE["shape"]):
+        SKYDOME_HANDLE.clear()
 
 def create_sky_dome_light():
     """创建新的天空球灯光"""
@@ -197,7 +704,7 @@ def create_sky_dome_light():
 
 def connect_file_to_skydome(image_path):
     """连接文件到天空球灯光"""
-    t, s = get_existing_skydome()
+    t, s = get_existing_skydome(include_presets=False)
     if not t or not s:
         t, s = create_sky_dome_light()
         cmds.warning("No existing skydome light found, created a new one.")
@@ -205,12 +712,13 @@ def connect_file_to_skydome(image_path):
     file_node = cmds.ls("HDRI_file", type="file")[0] if cmds.ls("HDRI_file", type="file") else cmds.shadingNode("file", asTexture=True, name="HDRI_file")
     cmds.setAttr(f"{file_node}.fileTextureName", image_path.replace("\\", "/"), type="string")
     cmds.connectAttr(f"{file_node}.outColor", f"{s}.color", force=True)
+    set_active_skydome(t, s)
     return t, s, file_node
 
 def set_skydome_attr(attr, value):
     """设置天空球属性"""
     try:
-        t, s = get_existing_skydome()
+        t, s = get_skydome_handle()
         if not s:
             cmds.warning("No skydome light found. Please create one first.")
             return
@@ -221,7 +729,7 @@ def set_skydome_attr(attr, value):
 def set_skydome_rotation(value):
     """设置天空球旋转"""
     try:
-        t, s = get_existing_skydome()
+        t, s = get_skydome_handle()
         if not t:
             cmds.warning("No skydome light found. Please create one first.")
             return
@@ -232,7 +740,7 @@ def set_skydome_rotation(value):
 def set_skydome_camera(enabled):
     """设置天空球对相机可见"""
     try:
-        t, s = get_existing_skydome()
+        t, s = get_skydome_handle()
         if not s:
             cmds.warning("No skydome light found. Please create one first.")
             return
@@ -240,31 +748,714 @@ def set_skydome_camera(enabled):
     except Exception as e:
         cmds.warning(f"Failed to set skydome visibility: {e}")
 
+# ========================
+# 灯光预设
+# ========================
+def project_data_path(filename):
+    """获取当前项目data目录下的文件路径"""
+    root = cmds.workspace(query=True, rootDirectory=True) or TOOL_DATA_DIR
+    return os.path.join(root, "data", filename)
+
+def load_lighting_presets():
+    """读取当前项目的灯光预设"""
+    path = project_data_path(LIGHT_PRESET_FILE)
+    if not os.path.exists(path): return {}
+    try:
+        with open(path, "r") as f:
+            return {p["name"]: p for p in json.load(f).get("presets", [])}
+    except (OSError, ValueError, KeyError) as e:
+        cmds.warning(f"Failed to read lighting presets: {str(e)}")
+        return {}
+
+def save_lighting_presets(presets):
+    """保存当前项目的灯光预设"""
+    path = project_data_path(LIGHT_PRESET_FILE)
+    ensure_dir(os.path.dirname(path))
+    with open(path, "w") as f:
+        json.dump({"version": 1, "presets": list(presets.values())}, f, indent=2)
+
+def capture_lighting_preset(name):
+    """从当前天空球读取HDRI路径、曝光、强度、旋转和相机可见性"""
+    t, s = get_skydome_handle()
+    if not s:
+        cmds.warning("No skydome light found. Please create one first.")
+        return None
+    files = cmds.listConnections(f"{s}.color", source=True, destination=False, type="file") or []
+    return {
+        "name": name,
+        "hdri": cmds.getAttr(files[0] + ".fileTextureName") if files else "",
+        "exposure": cmds.getAttr(f"{s}.aiExposure"),
+        "intensity": cmds.getAttr(f"{s}.intensity"),
+        "rotation": cmds.getAttr(f"{t}.rotateY"),
+        "camera": bool(cmds.getAttr(f"{s}.camera"))
+    }
+
+def resident_preset_domes():
+    """获取场景中常驻的预设天空球，返回{预设名: (变换节点, 形状节点)}"""
+    domes = {}
+    for transform in cmds.ls(f"*.{LIGHT_PRESET_ATTR}", objectsOnly=True) or []:
+        shapes = cmds.listRelatives(transform, shapes=True, type="aiSkyDomeLight")
+        if shapes:
+            domes[cmds.getAttr(f"{transform}.{LIGHT_PRESET_ATTR}")] = (transform, shapes[0])
+    return domes
+
+def build_preset_skydome(preset):
+    """为预设创建独立的天空球和贴图节点，之后切换时不再改动贴图路径"""
+    safe = re.sub(r"\W", "_", preset["name"])
+    shape = cmds.shadingNode("aiSkyDomeLight", asLight=True, name=f"Preset_{safe}_SkyDomeShape")
+    transform = cmds.rename(cmds.listRelatives(shape, parent=True)[0], f"Preset_{safe}_SkyDome")
+    cmds.addAttr(transform, longName=LIGHT_PRESET_ATTR, dataType="string")
+    cmds.setAttr(f"{transform}.{LIGHT_PRESET_ATTR}", preset["name"], type="string")
+    if preset.get("hdri"):
+        file_node = cmds.shadingNode("file", asTexture=True, name=f"Preset_{safe}_HDRI_file")
+        cmds.setAttr(f"{file_node}.fileTextureName", preset["hdri"].replace("\\", "/"), type="string")
+        cmds.connectAttr(f"{file_node}.outColor", f"{shape}.color", force=True)
+    cmds.setAttr(f"{shape}.aiExposure", float(preset["exposure"]))
+    cmds.setAttr(f"{shape}.intensity", float(preset["intensity"]))
+    cmds.setAttr(f"{transform}.rotateY", float(preset["rotation"]))
+    cmds.setAttr(f"{shape}.camera", 1 if preset["camera"] else 0)
+    return transform, shape
+
+def set_active_skydome(transform, shape):
+    """只显示指定的天空球，其余天空球隐藏，并更新缓存"""
+    for other in cmds.ls(type="aiSkyDomeLight") or []:
+        parent = (cmds.listRelatives(other, parent=True) or [None])[0]
+        if not parent: continue
+        visible = parent == transform
+        if bool(cmds.getAttr(parent + ".visibility")) != visible:
+            cmds.setAttr(parent + ".visibility", visible)
+    SKYDOME_HANDLE.clear()
+    SKYDOME_HANDLE.update(transform=transform, shape=shape)
+
+def activate_lighting_preset(preset):
+    """切换到预设；已常驻的预设只切换可见性，不会重新加载贴图"""
+    domes = resident_preset_domes()
+    transform, shape = domes.get(preset["name"]) or build_preset_skydome(preset)
+    set_active_skydome(transform, shape)
+    return transform, shape
+
+def unload_lighting_preset(name):
+    """删除常驻的预设天空球网络"""
+    dome = resident_preset_domes().get(name)
+    if not dome: return False
+    files = cmds.listConnections(f"{dome[1]}.color", source=True, destination=False, type="file") or []
+    cmds.delete([dome[0]] + files)
+    invalidate_skydome_handle()
+    return True
+
+def rebuild_preset_skydome(preset):
+    """预设被重新保存后重建其常驻天空球，保持原来的显示状态"""
+    dome = resident_preset_domes().get(preset["name"])
+    if not dome: return None
+    active = bool(cmds.getAttr(dome[0] + ".visibility"))
+    unload_lighting_preset(preset["name"])
+    transform, shape = build_preset_skydome(preset)
+    if active:
+        set_active_skydome(transform, shape)
+    else:
+        cmds.setAttr(transform + ".visibility", False)
+    return transform, shape
+
+# ========================
+# API撤销
+# ========================
+# 注册一个MPxCommand，调用时从共享模块取出最近一次API修改的撤销/重做函数，使其进入Maya撤销队列
+API_UNDO_PLUGIN_SOURCE = f'''"""3D Assistant Tools: 将API修改登记到Maya撤销队列"""
+import sys
+import maya.api.OpenMaya as om2
+
+maya_useNewAPI = True
+
+class AssistantApiUndo(om2.MPxCommand):
+    def doIt(self, args):
+        self.undo, self.redo = sys.modules["{API_UNDO_MODULE}"].pending.pop()
+
+    def undoIt(self):
+        self.undo()
+
+    def redoIt(self):
+        self.redo()
+
+    def isUndoable(self):
+        return True
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin).registerCommand("{API_UNDO_COMMAND}", AssistantApiUndo)
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand("{API_UNDO_COMMAND}")
+'''
+_api_undo_ready = None
+
+def ensure_api_undo():
+    """写入并加载撤销插件，每个会话只加载一次，返回是否可用"""
+    global _api_undo_ready
+    if _api_undo_ready is None:
+        if API_UNDO_MODULE not in sys.modules:
+            holder = types.ModuleType(API_UNDO_MODULE)
+            holder.pending = []
+            sys.modules[API_UNDO_MODULE] = holder
+        try:
+            existing = None
+            if os.path.exists(API_UNDO_PLUGIN_PATH):
+                with open(API_UNDO_PLUGIN_PATH, encoding="utf-8") as f:
+                    existing = f.read()
+            if existing != API_UNDO_PLUGIN_SOURCE:
+                os.makedirs(os.path.dirname(API_UNDO_PLUGIN_PATH), exist_ok=True)
+                with open(API_UNDO_PLUGIN_PATH, "w", encoding="utf-8") as f:
+                    f.write(API_UNDO_PLUGIN_SOURCE)
+            cmds.loadPlugin(API_UNDO_PLUGIN_PATH, quiet=True)
+            _api_undo_ready = True
+        except Exception as e:
+            cmds.warning(f"API edits will not be undoable: {e}")
+            _api_undo_ready = False
+    return _api_undo_ready
+
+def commit_undoable(redo, undo):
+    """执行一次API修改并登记到撤销队列，插件不可用时只执行修改"""
+    redo()
+    if not ensure_api_undo(): return False
+    sys.modules[API_UNDO_MODULE].pending.append((undo, redo))
+    getattr(cmds, API_UNDO_COMMAND)()
+    return True
+
+def commit_modifier(modifier):
+    """执行MDGModifier并使其可撤销"""
+    return commit_undoable(modifier.doIt, modifier.undoIt)
+
+# ========================
+# 操作执行器
+# ========================
+_action_depth = 0
+
+class _CountingProxy(object):
+    """统计模块函数调用次数的代理"""
+    def __init__(self, module, prefix, counts):
+        self._module, self._prefix, self._counts = module, prefix, counts
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr): return attr
+        key, counts = f"{self._prefix}.{name}", self._counts
+        def counted(*args, **kwargs):
+            counts[key] = counts.get(key, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
+
+def record_action(name, elapsed, counts, ok):
+    """记录一次操作的耗时和调用次数"""
+    history = ACTION_HISTORY.setdefault(name, deque(maxlen=ACTION_HISTORY_SIZE))
+    history.append({
+        "time": time.time(),
+        "ms": round(elapsed * 1000.0, 3),
+        "calls": sum(counts.values()),
+        "commands": dict(counts),
+        "ok": ok
+    })
+
+def run_action(name, func, *args, suspend_refresh=True, undo_chunk=True, **kwargs):
+    """在单个撤销块中执行操作，暂停视口刷新并统计耗时
+
+    undo_chunk=False时不打开撤销块，由func自己划分撤销步骤
+    """
+    global _action_depth, cmds, mel
+    if _action_depth:
+        return func(*args, **kwargs)
+
+    real_cmds, real_mel = cmds, mel
+    counts = {}
+    if undo_chunk:
+        real_cmds.undoInfo(openChunk=True, chunkName=name)
+    if suspend_refresh:
+        real_cmds.refresh(suspend=True)
+    cmds, mel = _CountingProxy(real_cmds, "cmds", counts), _CountingProxy(real_mel, "mel", counts)
+    _action_depth += 1
+    ok = False
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        ok = True
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        _action_depth -= 1
+        cmds, mel = real_cmds, real_mel
+        if suspend_refresh:
+            real_cmds.refresh(suspend=False)
+        if undo_chunk:
+            real_cmds.undoInfo(closeChunk=True)
+        record_action(name, elapsed, counts, ok)
+        if PROFILER is not None:
+            PROFILER.record_span(name, "action", start, start + elapsed)
+
+def summarize_action_history():
+    """汇总每个操作的耗时统计"""
+    rows = []
+    for name, history in ACTION_HISTORY.items():
+        if not history: continue
+        times = [r["ms"] for r in history]
+        rows.append({
+            "action": name,
+            "runs": len(times),
+            "last_ms": times[-1],
+            "avg_ms": sum(times) / len(times),
+            "max_ms": max(times),
+            "last_calls": history[-1]["calls"],
+            "errors": sum(1 for r in history if not r["ok"])
+        })
+    return rows
+
+def export_action_history(path):
+    """导出操作耗时历史为JSON"""
+    data = {
+        "tool_version": CURRENT_VERSION,
+        "exported": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "summary": summarize_action_history(),
+        "history": {name: list(history) for name, history in ACTION_HISTORY.items()}
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+# ========================
+# 性能分析器
+# ========================
+class Profiler(object):
+    """记录cmds/mel调用和UI处理函数耗时的分析会话"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """清空分析数据"""
+        self.origin = time.perf_counter()
+        self.started = time.time()
+        self.commands = {}
+        self.handlers = {}
+        self.events = deque(maxlen=PROFILER_MAX_EVENTS)
+
+    def record_call(self, key, start, end):
+        """记录一次命令调用"""
+        stats = self.commands.get(key)
+        if stats is None:
+            stats = self.commands[key] = [0, 0.0, 0.0]
+        elapsed = end - start
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]: stats[2] = elapsed
+        self.events.append((key, "command", start, elapsed))
+
+    def record_span(self, name, category, start, end):
+        """记录一次处理函数或操作的耗时"""
+        stats = self.handlers.setdefault((name, category), [0, 0.0, 0.0])
+        elapsed = end - start
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+        self.events.append((name, category, start, elapsed))
+
+    def command_rows(self):
+        """汇总每个命令的调用次数和耗时"""
+        return [{
+            "command": key,
+            "calls": count,
+            "total_ms": total * 1000.0,
+            "avg_ms": total * 1000.0 / count,
+            "max_ms": peak * 1000.0
+        } for key, (count, total, peak) in self.commands.items()]
+
+    def handler_rows(self):
+        """汇总每个处理函数和操作的耗时"""
+        return [{
+            "name": name,
+            "type": category,
+            "runs": count,
+            "total_ms": total * 1000.0,
+            "avg_ms": total * 1000.0 / count,
+            "max_ms": peak * 1000.0
+        } for (name, category), (count, total, peak) in self.handlers.items()]
+
+    def export_json(self, path):
+        """导出分析会话为JSON"""
+        data = {
+            "tool_version": CURRENT_VERSION,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "duration_ms": (time.perf_counter() - self.origin) * 1000.0,
+            "commands": sorted(self.command_rows(), key=lambda r: -r["total_ms"]),
+            "handlers": sorted(self.handler_rows(), key=lambda r: -r["total_ms"])
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def export_chrome_trace(self, path):
+        """导出为chrome://tracing和Perfetto可读取的跟踪文件"""
+        pid = os.getpid()
+        events = [{
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 3),
+            "dur": round(elapsed * 1e6, 3),
+            "pid": pid,
+            "tid": 0
+        } for name, category, start, elapsed in self.events]
+        data = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"tool_version": CURRENT_VERSION}
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+class _ProfilingProxy(object):
+    """记录模块函数调用耗时的代理"""
+    def __init__(self, module, prefix, profiler):
+        self._module, self._prefix, self._profiler = module, prefix, profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr): return attr
+        key, record, clock = f"{self._prefix}.{name}", self._profiler.record_call, time.perf_counter
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                record(key, start, clock())
+        setattr(self, name, timed)
+        return timed
+
+def enable_profiler():
+    """开启分析器，替换模块级的cmds和mel"""
+    global PROFILER, cmds, mel
+    if PROFILER is not None: return PROFILER
+    PROFILER = Profiler()
+    cmds, mel = _ProfilingProxy(cmds, "cmds", PROFILER), _ProfilingProxy(mel, "mel", PROFILER)
+    return PROFILER
+
+def disable_profiler():
+    """关闭分析器并恢复原始模块，保留最后一次会话的数据"""
+    global PROFILER, cmds, mel
+    profiler = PROFILER
+    if profiler is None: return None
+    if isinstance(cmds, _ProfilingProxy): cmds = cmds._module
+    if isinstance(mel, _ProfilingProxy): mel = mel._module
+    PROFILER = None
+    return profiler
+
+def profiled_handler(name, func):
+    """包装UI处理函数，分析器关闭时只多一次全局变量检查"""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        params = [inspect.Parameter("args", inspect.Parameter.VAR_POSITIONAL)]
+    limit = None if any(p.kind == p.VAR_POSITIONAL for p in params) else \
+        sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Qt会把信号参数传给包装函数，按原函数可接收的数量截断
+        if limit is not None: args = args[:limit]
+        if PROFILER is None: return func(*args, **kwargs)
+        profiler, start = PROFILER, time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.record_span(name, "handler", start, time.perf_counter())
+    return wrapper
+
+def create_primitive(cmd_name):
+    """创建基础几何体"""
+    return getattr(cmds, cmd_name)()
+
+# ========================
+# 实例散布
+# ========================
+def triangulate_faces(counts, verts):
+    """将多边形按扇形三角化，返回(m, 3)的顶点索引"""
+    counts, verts = np.asarray(counts, dtype=np.int64), np.asarray(verts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    tris = np.maximum(counts - 2, 0)
+    face = np.repeat(np.arange(len(counts)), tris)
+    local = np.arange(tris.sum()) - np.repeat(np.cumsum(tris) - tris, tris)
+    base = offsets[face]
+    return np.stack([verts[base], verts[base + local + 1], verts[base + local + 2]], axis=1)
+
+def sample_surface(points, triangles, count, rng):
+    """按面积在三角形上均匀采样，返回位置、法线和总面积"""
+    a, b, c = points[triangles[:, 0]], points[triangles[:, 1]], points[triangles[:, 2]]
+    cross = np.cross(b - a, c - a)
+    areas = np.linalg.norm(cross, axis=1)
+    total = areas.sum()
+    if total <= 0:
+        raise ValueError("Scatter target has no surface area")
+    picks = rng.choice(len(areas), size=count, p=areas / total)
+    u, v = rng.random(count), rng.random(count)
+    flip = u + v > 1.0
+    u[flip], v[flip] = 1.0 - u[flip], 1.0 - v[flip]
+    positions = a[picks] + u[:, None] * (b - a)[picks] + v[:, None] * (c - a)[picks]
+    return positions, cross[picks] / areas[picks][:, None], total * 0.5
+
+def sample_volume(lo, hi, count, rng):
+    """在包围盒内均匀采样，返回位置、朝上的法线和非退化维度上的体积与维数"""
+    extent = hi - lo
+    solid = extent > extent.max() * 1e-6
+    positions = lo + rng.random((count, 3)) * extent
+    return positions, np.tile([0.0, 1.0, 0.0], (count, 1)), float(np.prod(extent[solid])), int(solid.sum())
+
+def poisson_disk_filter(points, radius):
+    """剔除距离小于radius的点，冲突时保留编号较小的点，返回保留点的编号
+
+    格子边长为radius/sqrt(3)，每个格子最多保留一个点，冲突只可能出现在5x5x5的相邻格子内，
+    冲突是对称的，所以只查找一半的偏移。每轮同时接受所有没有更小编号的未定邻居的点，
+    并剔除与已接受点冲突的点。
+    """
+    cell = radius / math.sqrt(3.0)
+    coords = np.floor((points - points.min(axis=0)) / cell).astype(np.int64) + 2
+    dims = coords.max(axis=0) + 3
+    keys = (coords[:, 0] * dims[1] + coords[:, 1]) * dims[2] + coords[:, 2]
+    keys, index = np.unique(keys, return_index=True)
+    coords, pts = coords[index], points[index]
+    pairs_a, pairs_b = [], []
+    for dx in range(-2, 3):
+        for dy in range(-2, 3):
+            for dz in range(-2, 3):
+                # 只取字典序为正的一半偏移，三个方向都相隔两格的格子距离不小于radius
+                if (dx, dy, dz) <= (0, 0, 0) or abs(dx) == abs(dy) == abs(dz) == 2: continue
+                neighbor = ((coords[:, 0] + dx) * dims[1] + coords[:, 1] + dy) * dims[2] + coords[:, 2] + dz
+                pos = np.minimum(np.searchsorted(keys, neighbor), len(keys) - 1)
+                close = (keys[pos] == neighbor) & (((pts[pos] - pts) ** 2).sum(axis=1) < radius * radius)
+                pairs_a.append(np.nonzero(close)[0])
+                pairs_b.append(pos[close])
+    a, b = np.concatenate(pairs_a), np.concatenate(pairs_b)
+    a, b = np.concatenate([a, b]), np.concatenate([b, a])
+    state = np.ones(len(index), dtype=np.int8)  # 1未定 2接受 0剔除
+    while (state == 1).any():
+        blocked = a[(state[a] == 1) & (state[b] == 2)]
+        state[blocked] = 0
+        undecided = state == 1
+        loses = np.zeros(len(index), dtype=bool)
+        loses[a[undecided[a] & undecided[b] & (index[b] < index[a])]] = True
+        state[undecided & ~loses] = 2
+    return np.sort(index[state == 2])
+
+def scatter_rotations(normals, rng, random_rotation=True, align_to_normal=False):
+    """生成实例的XYZ欧拉角(度)，可绕上方向随机旋转并把Y轴对齐到表面法线"""
+    n = len(normals)
+    yaw = rng.random(n) * 2.0 * np.pi if random_rotation else np.zeros(n)
+    rot = np.zeros((n, 3, 3))
+    rot[:, 0, 0] = rot[:, 2, 2] = np.cos(yaw)
+    rot[:, 0, 2], rot[:, 2, 0] = np.sin(yaw), -np.sin(yaw)
+    rot[:, 1, 1] = 1.0
+    if align_to_normal:
+        normals = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+        axis = np.cross([0.0, 1.0, 0.0], normals)
+        sin, cos = np.linalg.norm(axis, axis=1), normals[:, 1]
+        # 法线朝下时绕X轴翻转
+        axis = np.where(sin[:, None] > 1e-9, axis / np.maximum(sin, 1e-12)[:, None], [1.0, 0.0, 0.0])
+        k = np.zeros((n, 3, 3))
+        k[:, 0, 1], k[:, 0, 2], k[:, 1, 2] = -axis[:, 2], axis[:, 1], -axis[:, 0]
+        k[:, 1, 0], k[:, 2, 0], k[:, 2, 1] = axis[:, 2], -axis[:, 1], axis[:, 0]
+        rot = (np.eye(3) + sin[:, None, None] * k + (1.0 - cos)[:, None, None] * (k @ k)) @ rot
+    # 列向量约定下R = Rz·Ry·Rx，对应Maya的xyz旋转顺序
+    x = np.arctan2(rot[:, 2, 1], rot[:, 2, 2])
+    y = np.arcsin(np.clip(-rot[:, 2, 0], -1.0, 1.0))
+    z = np.arctan2(rot[:, 1, 0], rot[:, 0, 0])
+    return np.degrees(np.stack([x, y, z], axis=1))
+
+def sample_scatter_points(targets, count, sampling="Random", rng=None, min_distance=0.0, volume=False):
+    """在目标网格表面或其包围盒内采样，泊松盘模式先过采样再剔除过近的点"""
+    rng = rng or np.random.default_rng()
+    poisson = sampling == "Poisson Disk"
+    candidates = count * SCATTER_POISSON_OVERSAMPLE if poisson else count
+    if volume:
+        bbox = cmds.exactWorldBoundingBox(targets)
+        positions, normals, measure, dims = sample_volume(np.array(bbox[:3]), np.array(bbox[3:]), candidates, rng)
+    else:
+        points, triangles, base = [], [], 0
+        for mesh in targets:
+            mesh_points, counts, verts = read_mesh_arrays(mesh)
+            points.append(mesh_points)
+            triangles.append(triangulate_faces(counts, verts) + base)
+            base += len(mesh_points)
+        positions, normals, measure = sample_surface(np.concatenate(points), np.concatenate(triangles), candidates, rng)
+        dims = 2
+    if poisson:
+        # 随机顺序投点的饱和密度下约能放下count个点的间距
+        radius = min_distance or 0.6 * (measure / count) ** (1.0 / max(dims, 1))
+        keep = poisson_disk_filter(positions, radius)[:count]
+        positions, normals = positions[keep], normals[keep]
+    return positions, normals
+
+def create_scatter_instancer(prototype, positions, rotations, scales, name="scatter"):
+    """用一个非动力学粒子对象和粒子实例化器一次性创建全部实例，调用次数与数量无关"""
+    particle, shape = cmds.particle(position=positions.tolist(), name=f"{name}Points")
+    cmds.setAttr(f"{shape}.isDynamic", False)
+    for attr, values in (("rotationPP", rotations), ("scalePP", scales)):
+        cmds.addAttr(shape, longName=attr, dataType="vectorArray")
+        cmds.addAttr(shape, longName=attr + "0", dataType="vectorArray")
+        cmds.setAttr(f"{shape}.{attr}0", values.tolist(), type="vectorArray")
+    instancer = cmds.particleInstancer(shape, addObject=True, object=prototype, cycle="None",
+                                       rotationUnits="Degrees", rotationOrder="XYZ",
+                                       rotation="rotationPP", scale="scalePP", name=f"{name}Instancer")
+    return particle, instancer
+
+def scatter_ready(targets):
+    """检查散布的前提条件"""
+    if np is None:
+        cmds.warning("NumPy is required for scatter")
+        return False
+    if not targets:
+        cmds.warning("Please select target meshes to scatter on")
+        return False
+    return True
+
+def scatter_instances(prototype, targets, count, sampling="Random", seed=0, min_distance=0.0, volume=False,
+                      scale_range=(1.0, 1.0), random_rotation=True, align_to_normal=False, members=()):
+    """在目标表面或包围盒内散布原型的实例，返回散布组和实际放置的数量"""
+    if not scatter_ready(targets): return None, 0
+    rng = np.random.default_rng(seed)
+    positions, normals = sample_scatter_points(targets, min(count, SCATTER_MAX_COUNT), sampling, rng,
+                                               min_distance, volume)
+    rotations = scatter_rotations(normals, rng, random_rotation, align_to_normal)
+    scales = np.repeat(rng.uniform(scale_range[0], scale_range[1], len(positions))[:, None], 3, axis=1)
+    nodes = list(members) + list(create_scatter_instancer(prototype, positions, rotations, scales))
+    return cmds.group(nodes, name="scatter1"), len(positions)
+
+def scatter_primitive(cmd_name, targets, count, **options):
+    """新建一个隐藏的基础几何体作为原型进行散布，原型放在散布组中"""
+    if not scatter_ready(targets): return None, 0
+    prototype = create_primitive(cmd_name)[0]
+    cmds.hide(prototype)
+    return scatter_instances(prototype, targets, count, members=[prototype], **options)
+
+# ========================
+# 场景回调
+# ========================
+SCENE_OPEN_HANDLERS = []
+SCENE_BEFORE_SAVE_HANDLERS = []
+SCENE_AFTER_SAVE_HANDLERS = []
+SCENE_CALLBACK_IDS = []
+# 场景修改计数只在节点增删和网格、相机及其变换节点的属性变化时递增，打开或保存后的值记为未修改基准
+SCENE_WATCHED_TYPES = {"mesh": om2.MFn.kMesh, "camera": om2.MFn.kCamera, "transform": om2.MFn.kTransform}
+SCENE_ATTR_CALLBACK_IDS = {}
+SCENE_MOD_COUNTER = 0
+SCENE_MOD_BASELINE = 0
+SCENE_SESSION_TOKEN = f"{os.getpid()}:{time.time():.6f}"
+
+def run_scene_handlers(handlers, *args):
+    """依次执行已注册的场景处理函数，单个失败只发出警告"""
+    for handler in handlers:
+        try:
+            handler()
+        except Exception as e:
+            cmds.warning(f"Scene handler {handler.__name__} failed: {e}")
+
+def on_scene_opened(*args):
+    """场景打开或新建后执行已注册的处理函数"""
+    run_scene_handlers(SCENE_OPEN_HANDLERS)
+
+def bump_scene_counter(*args):
+    """场景发生真实修改时递增修改计数"""
+    global SCENE_MOD_COUNTER
+    SCENE_MOD_COUNTER += 1
+
+def watch_node_attributes(node, *args):
+    """为网格、相机或变换节点注册属性变化回调，同一节点只注册一次"""
+    key = om2.MObjectHandle(node).hashCode()
+    if key not in SCENE_ATTR_CALLBACK_IDS:
+        SCENE_ATTR_CALLBACK_IDS[key] = om2.MNodeMessage.addAttributeChangedCallback(node, bump_scene_counter)
+
+def unwatch_scene_nodes():
+    """移除全部属性变化回调"""
+    for callback_id in SCENE_ATTR_CALLBACK_IDS.values():
+        try:
+            om2.MMessage.removeCallback(callback_id)
+        except RuntimeError:
+            pass
+    SCENE_ATTR_CALLBACK_IDS.clear()
+
+def watch_scene_nodes():
+    """为场景中已有的网格、相机和变换节点重新注册属性变化回调，并把当前状态记为未修改"""
+    unwatch_scene_nodes()
+    for fn_type in SCENE_WATCHED_TYPES.values():
+        it = om2.MItDag(om2.MItDag.kDepthFirst, fn_type)
+        while not it.isDone():
+            watch_node_attributes(it.getPath().node())
+            it.next()
+    mark_scene_unmodified()
+
+def mark_scene_unmodified():
+    """把当前修改计数记为与场景文件一致的基准"""
+    global SCENE_MOD_BASELINE
+    SCENE_MOD_BASELINE = SCENE_MOD_COUNTER
+
+def scene_change_token():
+    """场景自打开或保存后未修改时返回None，否则返回本次会话内唯一的修改标记"""
+    if SCENE_MOD_COUNTER == SCENE_MOD_BASELINE: return None
+    return [SCENE_SESSION_TOKEN, SCENE_MOD_COUNTER]
+
+SCENE_OPEN_HANDLERS.append(watch_scene_nodes)
+SCENE_AFTER_SAVE_HANDLERS.append(mark_scene_unmodified)
+
+def add_scene_callbacks():
+    """注册场景打开、新建、保存和节点变化回调"""
+    remove_scene_callbacks()
+    for message in (om2.MSceneMessage.kAfterOpen, om2.MSceneMessage.kAfterNew):
+        SCENE_CALLBACK_IDS.append(om2.MSceneMessage.addCallback(message, on_scene_opened))
+    for message, handlers in ((om2.MSceneMessage.kBeforeSave, SCENE_BEFORE_SAVE_HANDLERS),
+                              (om2.MSceneMessage.kAfterSave, SCENE_AFTER_SAVE_HANDLERS)):
+        SCENE_CALLBACK_IDS.append(om2.MSceneMessage.addCallback(message, functools.partial(run_scene_handlers, handlers)))
+    SCENE_CALLBACK_IDS.append(om2.MDGMessage.addNodeRemovedCallback(invalidate_skydome_handle, "aiSkyDomeLight"))
+    SCENE_CALLBACK_IDS.append(om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj, on_node_renamed))
+    SCENE_CALLBACK_IDS.append(om2.MDGMessage.addNodeAddedCallback(bump_scene_counter))
+    SCENE_CALLBACK_IDS.append(om2.MDGMessage.addNodeRemovedCallback(bump_scene_counter))
+    for node_type in SCENE_WATCHED_TYPES:
+        SCENE_CALLBACK_IDS.append(om2.MDGMessage.addNodeAddedCallback(watch_node_attributes, node_type))
+    watch_scene_nodes()
+
+def remove_scene_callbacks():
+    """移除场景回调"""
+    for callback_id in SCENE_CALLBACK_IDS:
+        try:
+            om2.MMessage.removeCallback(callback_id)
+        except RuntimeError:
+            pass
+    del SCENE_CALLBACK_IDS[:]
+    unwatch_scene_nodes()
+    invalidate_skydome_handle()
+
+SCENE_OPEN_HANDLERS.append(invalidate_skydome_handle)
+
 # ========================
 # 建模工具函数
 # ========================
 def universal_merge_to_center():
     """合并到中心点"""
     sel = cmds.ls(selection=True, flatten=True)
-    vtx_list = []
-    for comp in sel:
-        if ".vtx[" in comp:
-            vtx_list.append(comp)
-        elif ".e[" in comp:
-            vtx_list.extend(cmds.polyListComponentConversion(comp, fromEdge=True, toVertex=True))
-        elif ".f[" in comp:
-            vtx_list.extend(cmds.polyListComponentConversion(comp, fromFace=True, toVertex=True))
-        elif "." not in comp:
-            vtx_list.extend(cmds.ls(comp + ".vtx[*]", flatten=True))
+    vtx_list = [comp for comp in sel if ".vtx[" in comp]
+    edges = [comp for comp in sel if ".e[" in comp]
+    faces = [comp for comp in sel if ".f[" in comp]
+    if edges:
+        vtx_list.extend(cmds.polyListComponentConversion(edges, fromEdge=True, toVertex=True) or [])
+    if faces:
+        vtx_list.extend(cmds.polyListComponentConversion(faces, fromFace=True, toVertex=True) or [])
+    vtx_list.extend(comp + ".vtx[*]" for comp in sel if "." not in comp)
+    if not vtx_list: return
+    # 顶点数量不影响命令次数：一次读取全部坐标，一次移动全部顶点
     vtx_list = list(set(cmds.ls(vtx_list, flatten=True)))
-    positions = [cmds.pointPosition(v, world=True) for v in vtx_list]
-    if not positions: return
-    center = [sum(p[i] for p in positions) / len(positions) for i in range(3)]
-    for vtx in vtx_list:
-        cmds.move(center[0], center[1], center[2], vtx, worldSpace=True, absolute=True)
-    mel.eval('polyMergeVertex -d 0.000001 -ch 1;')
+    flat = cmds.xform(vtx_list, query=True, worldSpace=True, translation=True) or []
+    if not flat: return
+    count = len(flat) // 3
+    center = [sum(flat[i::3]) / count for i in range(3)]
+    cmds.move(center[0], center[1], center[2], vtx_list, worldSpace=True, absolute=True)
+    merge_selected_vertices()
     cmds.select(clear=True)
 
+def merge_selected_vertices(distance=0.000001):
+    """合并选中的顶点"""
+    mel.eval(f'polyMergeVertex -d {distance} -ch 1;')
+
 def target_weld():
     """目标焊接"""
     sel = cmds.ls(orderedSelection=True, flatten=True)
@@ -274,7 +1465,7 @@ def target_weld():
     src, tgt = sel[0], sel[1]
     pos = cmds.pointPosition(tgt, world=True)
     cmds.move(pos[0], pos[1], pos[2], src, worldSpace=True, absolute=True)
-    mel.eval('polyMergeVertex -d 0.000001 -ch 1;')
+    merge_selected_vertices()
     cmds.select(clear=True)
 
 def connect_vertices(): 
@@ -313,10 +1504,10 @@ def separate_objects():
     """分离对象"""
     sel = cmds.ls(selection=True)
     if not sel: return
-    new_objs = mel.eval('polySeparate;')
-    for obj in new_objs:
-        cmds.delete(obj, ch=True)
-        cmds.centerPivot(obj)
+    new_objs = cmds.ls(mel.eval('polySeparate;'), type="transform")
+    if new_objs:
+        cmds.delete(new_objs, ch=True)
+        cmds.xform(new_objs, centerPivots=True)
     cmds.select(clear=True)
 
 def combine_objects():
@@ -345,9 +1536,1138 @@ def detach_selected_faces():
     cmds.delete(list(set(all_faces) - set(new_face_sel)))
     cmds.select(new_obj)
 
+# ========================
+# 批处理
+# ========================
+BATCH_OPS = {}
+
+def register_batch_op(name, func, components=None, groupable=False):
+    """注册可批量执行的建模操作
+
+    components: None表示选择网格本身，"vtx"/"e"/"f"表示全部组件，"border"表示边界边
+    groupable: 单条命令即可同时处理多个网格的操作，失败时会逐个网格重试
+    """
+    BATCH_OPS[name] = {"func": func, "components": components, "groupable": groupable}
+
+def batch_selection(meshes, components):
+    """构建批处理操作的选择列表"""
+    if components is None:
+        return list(meshes)
+    if components == "border":
+        return cmds.polyListComponentConversion(meshes, toEdge=True, border=True) or []
+    return [f"{mesh}.{components}[*]" for mesh in meshes]
+
+def resolve_batch_targets(mode, value=""):
+    """解析批处理目标网格"""
+    if mode == "Scene":
+        return list_target_meshes("scene")
+    if mode == "Set":
+        if not value or not cmds.objExists(value): return []
+        return meshes_from_objects(cmds.sets(value, query=True))
+    if mode == "Name Pattern":
+        return meshes_from_objects(cmds.ls(value, long=True)) if value else []
+    return list_target_meshes("selection")
+
+def begin_progress(status, total):
+    """开始Maya主进度条"""
+    if cmds.about(batch=True): return None
+    bar = mel.eval("$tmp = $gMainProgressBar")
+    cmds.progressBar(bar, edit=True, beginProgress=True, isInterruptable=True, status=status, maxValue=max(total, 1))
+    return bar
+
+def step_progress(bar, amount=1):
+    """推进进度条并返回是否已取消"""
+    if not bar: return False
+    cmds.progressBar(bar, edit=True, step=amount)
+    return cmds.progressBar(bar, query=True, isCancelled=True)
+
+def end_progress(bar):
+    """结束进度条"""
+    if bar:
+        cmds.progressBar(bar, edit=True, endProgress=True)
+
+def run_batch_op(op_name, meshes):
+    """对多个网格执行已注册的操作，收集错误但不中断
+
+    每组网格是一个独立的撤销块，调用方不能再套撤销块。失败的组先撤销，可合并的操作再逐个网格重试，
+    已被处理的网格不会执行两次；撤销关闭或外面已有打开的撤销块时无法回滚，整组记为失败。
+    """
+    op = BATCH_OPS[op_name]
+    chunk_size = BATCH_CHUNK_SIZE if op["groupable"] else 1
+    result = {"op": op_name, "total": len(meshes), "processed": 0, "errors": [], "cancelled": False}
+    previous = cmds.ls(selection=True, long=True) or []
+    # 外层撤销块打开时cmds.undo()会失败，不能依赖它回滚
+    can_rollback = bool(cmds.undoInfo(query=True, state=True)) and not cmds.undoInfo(query=True, chunkName=True)
+
+    def apply(chunk):
+        targets = batch_selection(chunk, op["components"])
+        if not targets: return
+        cmds.undoInfo(openChunk=True, chunkName=f"Batch {op_name}")
+        try:
+            cmds.select(targets, replace=True)
+            op["func"]()
+        except Exception:
+            cmds.undoInfo(closeChunk=True)
+            if can_rollback:
+                cmds.undo()
+            raise
+        cmds.undoInfo(closeChunk=True)
+
+    start = time.perf_counter()
+    bar = begin_progress(f"{op_name} ({len(meshes)} meshes)", len(meshes))
+    try:
+        for i in range(0, len(meshes), chunk_size):
+            chunk = meshes[i:i + chunk_size]
+            try:
+                apply(chunk)
+            except Exception as e:
+                if len(chunk) == 1 or not can_rollback:
+                    result["errors"].extend((mesh, str(e)) for mesh in chunk)
+                else:
+                    for mesh in chunk:
+                        try:
+                            apply([mesh])
+                        except Exception as e:
+                            result["errors"].append((mesh, str(e)))
+            result["processed"] += len(chunk)
+            if step_progress(bar, len(chunk)):
+                result["cancelled"] = True
+                break
+    finally:
+        end_progress(bar)
+        existing = cmds.ls(previous, long=True) if previous else []
+        if existing:
+            cmds.select(existing, replace=True)
+        else:
+            cmds.select(clear=True)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+# ========================
+# 网格健康检查
+# ========================
+def meshes_from_objects(objects):
+    """获取对象及其子层级中的网格变换节点"""
+    if not objects: return []
+    objects = cmds.ls(objects, objectsOnly=True, long=True) or []
+    if not objects: return []
+    # LOD代理是派生数据，不作为操作对象
+    shapes = [s for s in cmds.ls(objects, dag=True, type="mesh", noIntermediate=True, long=True) or []
+              if not LOD_SHAPE_PATTERN.search(s)]
+    if not shapes: return []
+    return sorted(set(cmds.listRelatives(shapes, parent=True, fullPath=True) or []))
+
+def list_target_meshes(scope="selection"):
+    """获取选中或场景中的网格变换节点"""
+    if scope == "scene":
+        return meshes_from_objects(cmds.ls(type="mesh", noIntermediate=True, long=True))
+    return meshes_from_objects(cmds.ls(selection=True, long=True))
+
+def read_mesh_arrays(mesh):
+    """通过API批量读取网格的世界坐标和面拓扑"""
+    sel = om2.MSelectionList()
+    sel.add(mesh)
+    fn = om2.MFnMesh(sel.getDagPath(0))
+    counts, verts = fn.getVertices()
+    points = np.array([(p.x, p.y, p.z) for p in fn.getPoints(om2.MSpace.kWorld)], dtype=np.float64).reshape(-1, 3)
+    return points, np.array(counts, dtype=np.int64), np.array(verts, dtype=np.int64)
+
+def _group_pairs(start_a, size_a, start_b, size_b):
+    """枚举两组排序后连续索引区间的笛卡尔积"""
+    n = size_a * size_b
+    group = np.repeat(np.arange(n.size), n)
+    local = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    return start_a[group] + local // size_b[group], start_b[group] + local % size_b[group]
+
+def _coincident_clusters(points, tol):
+    """将距离不超过容差的顶点聚成簇，返回每个顶点的簇编号
+
+    顶点按边长为容差的空间网格分桶，同一格和13个半邻域格(另一半由对称覆盖)中的顶点对
+    再按实际距离过滤，跨格边界的重合顶点也能找到。
+    """
+    cells = np.floor(points / tol).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    if float(dims[0]) * float(dims[1]) * float(dims[2]) < 2.0 ** 62:
+        stride = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+    else:
+        # 线性哈希在溢出时回绕，相邻格的键仍满足key(c+o) == key(c)+key(o)，碰撞只会多出被距离过滤的候选
+        stride = np.array([73856093, 19349663, 1], dtype=np.int64)
+    with np.errstate(over="ignore"):
+        keys = cells @ stride
+    order = np.argsort(keys, kind="stable")
+    unique_keys, starts, sizes = np.unique(keys[order], return_index=True, return_counts=True)
+    pair_a, pair_b = [], []
+    offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    for offset in offsets[len(offsets) // 2:]:
+        with np.errstate(over="ignore"):
+            target = unique_keys + np.array(offset, dtype=np.int64) @ stride
+        idx = np.minimum(np.searchsorted(unique_keys, target), unique_keys.size - 1)
+        hit = np.nonzero(unique_keys[idx] == target)[0]
+        if offset == (0, 0, 0):
+            hit = hit[sizes[hit] > 1]
+        if not hit.size: continue
+        a, b = _group_pairs(starts[hit], sizes[hit], starts[idx[hit]], sizes[idx[hit]])
+        a, b = order[a], order[b]
+        keep = (a < b) if offset == (0, 0, 0) else (a != b)
+        keep &= np.einsum("ij,ij->i", points[a] - points[b], points[a] - points[b]) <= tol * tol
+        pair_a.append(a[keep])
+        pair_b.append(b[keep])
+    labels = np.arange(len(points))
+    if pair_a:
+        a, b = np.concatenate(pair_a), np.concatenate(pair_b)
+        # 标签传播加指针跳跃求连通分量
+        while a.size:
+            low = np.minimum(labels[a], labels[b])
+            changed = labels.copy()
+            np.minimum.at(changed, a, low)
+            np.minimum.at(changed, b, low)
+            changed = changed[changed]
+            if np.array_equal(changed, labels): break
+            labels = changed
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+def analyze_mesh_arrays(points, counts, verts, tol=HEALTH_TOLERANCE):
+    """向量化检测重合顶点、零面积面、层叠面、非流形边和未合并接缝"""
+    result = {key: np.empty(0, dtype=np.int64) for key, _, _ in HEALTH_CHECKS}
+    result["nonmanifold_edges"] = np.empty((0, 2), dtype=np.int64)
+    if not len(points) or not len(counts): return result
+    num_faces = len(counts)
+
+    # 重合顶点：距离不超过容差的多个顶点
+    cluster = _coincident_clusters(points, tol)
+    cluster_size = np.bincount(cluster)
+    result["coincident_vertices"] = np.nonzero(cluster_size[cluster] > 1)[0]
+
+    # 零面积面：扇形三角化后累加面积向量
+    offsets = np.zeros(num_faces, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)[:-1]
+    tri_counts = np.maximum(counts - 2, 0)
+    tri_face = np.repeat(np.arange(num_faces), tri_counts)
+    tri_base = offsets[tri_face]
+    tri_local = np.arange(tri_face.size) - np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts)
+    p0 = points[verts[tri_base]]
+    cross = np.cross(points[verts[tri_base + tri_local + 1]] - p0, points[verts[tri_base + tri_local + 2]] - p0)
+    area_vec = np.stack([np.bincount(tri_face, weights=cross[:, i], minlength=num_faces) for i in range(3)], axis=1)
+    result["zero_area_faces"] = np.nonzero(0.5 * np.linalg.norm(area_vec, axis=1) <= tol * tol)[0]
+
+    # 层叠面：顶点集合完全相同的面，保留第一个
+    lamina = []
+    for n in np.unique(counts):
+        faces_n = np.nonzero(counts == n)[0]
+        if faces_n.size < 2: continue
+        rows = np.sort(verts[offsets[faces_n][:, None] + np.arange(n)], axis=1)
+        _, first, inverse, size = np.unique(rows, axis=0, return_index=True, return_inverse=True, return_counts=True)
+        duplicate = size[inverse.ravel()] > 1
+        duplicate[first] = False
+        lamina.append(faces_n[duplicate])
+    if lamina:
+        result["lamina_faces"] = np.sort(np.concatenate(lamina))
+
+    # 边使用次数：>2为非流形边，==1为边界边
+    nxt = np.arange(1, verts.size + 1)
+    nxt[offsets + counts - 1] = offsets
+    lo, hi = np.minimum(verts, verts[nxt]), np.maximum(verts, verts[nxt])
+    _, first_edge, edge_use = np.unique(lo * len(points) + hi, return_index=True, return_counts=True)
+    nonmanifold = first_edge[edge_use > 2]
+    result["nonmanifold_edges"] = np.stack([lo[nonmanifold], hi[nonmanifold]], axis=1)
+
+    # 未合并接缝：位置重合的边界边
+    border = first_edge[edge_use == 1]
+    ba, bb = lo[border], hi[border]
+    ca, cb = cluster[ba], cluster[bb]
+    _, seam_inverse, seam_size = np.unique(np.minimum(ca, cb) * len(cluster_size) + np.maximum(ca, cb),
+                                           return_inverse=True, return_counts=True)
+    seam = (seam_size[seam_inverse.ravel()] > 1) & (ca != cb)
+    result["unmerged_seams"] = np.unique(np.concatenate([ba[seam], bb[seam]]))
+    return result
+
+def format_components(mesh, kind, ids):
+    """将索引数组压缩为Maya组件范围字符串"""
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    if not ids.size: return []
+    breaks = np.nonzero(np.diff(ids) > 1)[0]
+    starts = np.concatenate([ids[:1], ids[breaks + 1]])
+    ends = np.concatenate([ids[breaks], ids[-1:]])
+    return [f"{mesh}.{kind}[{s}]" if s == e else f"{mesh}.{kind}[{s}:{e}]" for s, e in zip(starts, ends)]
+
+def edge_pairs_to_components(mesh, pairs):
+    """将顶点对转换为Maya边组件：一次命令取出候选边，再用API按端点匹配边索引"""
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if not len(pairs): return []
+    candidates = cmds.polyListComponentConversion(format_components(mesh, "vtx", pairs.ravel()),
+                                                  fromVertex=True, toEdge=True, internal=True) or []
+    wanted = {(int(a), int(b)) for a, b in np.sort(pairs, axis=1)}
+    sel = om2.MSelectionList()
+    sel.add(mesh)
+    it = om2.MItMeshEdge(sel.getDagPath(0))
+    ids = []
+    for comp in cmds.ls(candidates, flatten=True) or []:
+        it.setIndex(int(comp[comp.rindex("[") + 1:-1]))
+        a, b = it.vertexId(0), it.vertexId(1)
+        if (min(a, b), max(a, b)) in wanted:
+            ids.append(it.index())
+    return format_components(mesh, "e", ids)
+
+def health_components(report, key):
+    """获取某类问题的全部组件"""
+    kind = next(k for name, _, k in HEALTH_CHECKS if name == key)
+    comps = []
+    for mesh, issues in report.items():
+        ids = issues.get(key)
+        if ids is None or not len(ids): continue
+        comps.extend(edge_pairs_to_components(mesh, ids) if kind == "e" else format_components(mesh, kind, ids))
+    return comps
+
+def scan_mesh_health(scope="selection", tol=HEALTH_TOLERANCE):
+    """扫描网格健康问题"""
+    if np is None:
+        cmds.warning("NumPy is required for the mesh health scan")
+        return {}
+    meshes = list(scope) if isinstance(scope, (list, tuple)) else list_target_meshes(scope)
+    if not meshes:
+        cmds.warning("No meshes found to scan")
+        return {}
+    report = {}
+    for mesh in meshes:
+        issues = analyze_mesh_arrays(*read_mesh_arrays(mesh), tol=tol)
+        if any(len(ids) for ids in issues.values()):
+            report[mesh] = issues
+    return report
+
+def create_health_sets(report):
+    """为每类问题创建可选择的组件集合"""
+    created = []
+    for key, _, _ in HEALTH_CHECKS:
+        set_name = HEALTH_SET_PREFIX + key
+        if cmds.objExists(set_name):
+            cmds.delete(set_name)
+        comps = health_components(report, key)
+        if comps:
+            created.append(cmds.sets(comps, name=set_name))
+    return created
+
+def fix_mesh_health(report, key, tol=HEALTH_TOLERANCE):
+    """使用现有合并工具一键修复问题"""
+    comps = health_components(report, key)
+    if not comps: return False
+    if key in ("coincident_vertices", "unmerged_seams"):
+        cmds.select(comps)
+        merge_selected_vertices(tol)
+    elif key == "zero_area_faces":
+        cmds.polyCollapseFacet(comps, constructionHistory=True)
+    elif key == "lamina_faces":
+        cmds.delete(comps)
+    else:
+        cmds.warning("Non-manifold edges must be fixed manually")
+        cmds.select(comps)
+        return False
+    cmds.select(clear=True)
+    return True
+
+register_batch_op("Fill Hole", fill_hole, groupable=True)
+register_batch_op("Bevel Edges", bevel_edges, components="e", groupable=True)
+register_batch_op("Bridge Edges", bridge_edges, components="border")
+register_batch_op("Extrude Faces", extrude_faces, components="f")
+register_batch_op("Merge Coincident Vertices", lambda: merge_selected_vertices(HEALTH_TOLERANCE), components="vtx", groupable=True)
+register_batch_op("Delete History", lambda: cmds.delete(cmds.ls(selection=True), constructionHistory=True), groupable=True)
+register_batch_op("Center Pivot", lambda: cmds.xform(cmds.ls(selection=True), centerPivots=True), groupable=True)
+
+# ========================
+# 场景统计
+# ========================
+def read_mesh_stats(path, fn=None):
+    """通过API读取一个网格形状的面数、顶点数、UV数、材质数和世界空间包围盒"""
+    fn = fn or om2.MFnMesh(path)
+    bbox = fn.boundingBox
+    bbox.transformUsing(path.inclusiveMatrix())
+    size = (bbox.width, bbox.height, bbox.depth)
+    instances = len(om2.MDagPath.getAllPathsTo(path.node())) if path.isInstanced() else 1
+    faces = fn.numPolygons
+    return {
+        "path": path.fullPathName(),
+        "faces": faces,
+        "drawn_faces": faces * instances,
+        "vertices": fn.numVertices,
+        "uvs": fn.numUVs(),
+        "instances": instances,
+        "materials": len(fn.getConnectedShaders(path.instanceNumber() if path.isInstanced() else 0)[0]),
+        "bbox": size,
+        "size": math.sqrt(sum(v * v for v in size))
+    }
+
+def on_mesh_dirty(node, plug, key):
+    """网格或其变换变化时只记录脏标记，统计留到下次刷新"""
+    SCENE_STATS_DIRTY.add(key)
+
+def on_mesh_added(node, client_data=None):
+    """记录新建的网格，节点此时可能尚未完成连接"""
+    SCENE_STATS_ADDED.append(om2.MObjectHandle(node))
+
+def on_mesh_removed(node, client_data=None):
+    """删除网格时移除其统计和脏回调"""
+    key = om2.MObjectHandle(node).hashCode()
+    SCENE_STATS.pop(key, None)
+    SCENE_STATS_DIRTY.discard(key)
+    callback_id = SCENE_STATS_WATCHERS.pop(key, None)
+    if callback_id is not None:
+        om2.MMessage.removeCallback(callback_id)
+
+def watch_mesh(obj, key):
+    """为网格注册脏回调"""
+    if key not in SCENE_STATS_WATCHERS:
+        SCENE_STATS_WATCHERS[key] = om2.MNodeMessage.addNodeDirtyPlugCallback(obj, on_mesh_dirty, key)
+
+def clear_scene_stats():
+    """清空统计索引并移除全部回调"""
+    for callback_id in list(SCENE_STATS_WATCHERS.values()) + SCENE_STATS_CALLBACK_IDS:
+        try:
+            om2.MMessage.removeCallback(callback_id)
+        except RuntimeError:
+            pass
+    SCENE_STATS_WATCHERS.clear()
+    del SCENE_STATS_CALLBACK_IDS[:]
+    SCENE_STATS.clear()
+    SCENE_STATS_DIRTY.clear()
+    del SCENE_STATS_ADDED[:]
+
+def add_mesh_stats(path, key, handle):
+    """读取并登记一个非中间对象的网格，LOD代理不计入统计"""
+    fn = om2.MFnMesh(path)
+    if fn.isIntermediateObject or LOD_SHAPE_PATTERN.search(path.fullPathName()): return None
+    entry = read_mesh_stats(path, fn)
+    entry["handle"] = handle
+    SCENE_STATS[key] = entry
+    watch_mesh(path.node(), key)
+    return entry
+
+def build_scene_stats():
+    """一次API遍历为全部网格建立统计索引，并注册增量更新回调"""
+    clear_scene_stats()
+    it = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kMesh)
+    while not it.isDone():
+        path = it.getPath()
+        handle = om2.MObjectHandle(path.node())
+        key = handle.hashCode()
+        # 实例化的形状会以多条路径出现，只读取一次
+        if key not in SCENE_STATS:
+            add_mesh_stats(path, key, handle)
+        it.next()
+    SCENE_STATS_CALLBACK_IDS.extend([
+        om2.MDGMessage.addNodeAddedCallback(on_mesh_added, "mesh"),
+        om2.MDGMessage.addNodeRemovedCallback(on_mesh_removed, "mesh")
+    ])
+    return len(SCENE_STATS)
+
+def update_scene_stats():
+    """只重新读取变脏和新建的网格，返回更新的数量"""
+    if not SCENE_STATS_CALLBACK_IDS:
+        return build_scene_stats()
+    updated = 0
+    added = list(SCENE_STATS_ADDED)
+    del SCENE_STATS_ADDED[:]
+    for handle in added:
+        if not handle.isValid(): continue
+        key = handle.hashCode()
+        SCENE_STATS_DIRTY.discard(key)
+        if key not in SCENE_STATS and add_mesh_stats(om2.MDagPath.getAPathTo(handle.object()), key, handle):
+            updated += 1
+    dirty = list(SCENE_STATS_DIRTY)
+    SCENE_STATS_DIRTY.clear()
+    for key in dirty:
+        entry = SCENE_STATS.get(key)
+        if entry is None: continue
+        if not entry["handle"].isValid():
+            on_mesh_removed(entry["handle"].object())
+            continue
+        entry.update(read_mesh_stats(om2.MDagPath.getAPathTo(entry["handle"].object())))
+        updated += 1
+    return updated
+
+def mesh_stats_path(entry):
+    """获取统计条目当前的完整路径，重命名后也正确"""
+    if not entry["handle"].isValid(): return entry["path"]
+    entry["path"] = om2.MDagPath.getAPathTo(entry["handle"].object()).fullPathName()
+    return entry["path"]
+
+def scene_stats_pending():
+    """是否有等待刷新的网格"""
+    return bool(SCENE_STATS_DIRTY or SCENE_STATS_ADDED)
+
+def heaviest_meshes(key="drawn_faces", count=SCENE_STATS_TOP):
+    """按某项统计取最重的网格"""
+    return heapq.nlargest(count, SCENE_STATS.values(), key=lambda entry: entry[key])
+
+def summarize_scene_stats():
+    """汇总全部网格的统计"""
+    entries = SCENE_STATS.values()
+    return {
+        "meshes": len(SCENE_STATS),
+        "faces": sum(e["drawn_faces"] for e in entries),
+        "vertices": sum(e["vertices"] * e["instances"] for e in entries),
+        "uvs": sum(e["uvs"] for e in entries),
+        "instanced": sum(1 for e in entries if e["instances"] > 1)
+    }
+
+SCENE_OPEN_HANDLERS.append(clear_scene_stats)
+
+# ========================
+# LOD代理
+# ========================
+def export_mesh_data(path):
+    """通过API导出网格对象空间的顶点、拓扑和默认UV集"""
+    fn = om2.MFnMesh(path)
+    points = array.array("d")
+    for p in fn.getPoints(om2.MSpace.kObject):
+        points.extend((p.x, p.y, p.z))
+    counts, connects = fn.getVertices()
+    u, v = fn.getUVs()
+    uv_counts, uv_ids = fn.getAssignedUVs()
+    return {"points": points, "counts": array.array("i", counts), "connects": array.array("i", connects),
+            "u": array.array("f", u), "v": array.array("f", v),
+            "uv_counts": array.array("i", uv_counts), "uv_ids": array.array("i", uv_ids)}
+
+def create_mesh_from_data(data, parent=om2.MObject.kNullObj):
+    """通过API创建网格并写入默认UV集，指定parent时在该变换节点下创建形状"""
+    points = data["points"]
+    vertices = [om2.MPoint(points[i], points[i + 1], points[i + 2]) for i in range(0, len(points), 3)]
+    fn = om2.MFnMesh()
+    obj = fn.create(vertices, data["counts"], data["connects"], data["u"], data["v"], parent=parent)
+    if len(data["uv_ids"]):
+        fn.assignUVs(data["uv_counts"], data["uv_ids"])
+    return obj
+
+def mesh_data_hash(data):
+    """按文件格式版本、拓扑、顶点位置和UV计算网格内容哈希"""
+    digest = hashlib.sha1(MESH_FILE_MAGIC)
+    for key, _ in MESH_FILE_ARRAYS:
+        digest.update(data[key].tobytes())
+    return digest.hexdigest()
+
+def write_mesh_file(path, data):
+    """写入网格文件: 头部记录各数组的长度，之后按MESH_FILE_ARRAYS的顺序写入数组"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MESH_FILE_MAGIC + struct.pack(f"<{len(MESH_FILE_ARRAYS)}I", *(len(data[key]) for key, _ in MESH_FILE_ARRAYS)))
+        for key, _ in MESH_FILE_ARRAYS:
+            data[key].tofile(f)
+    os.replace(tmp_path, path)
+
+def read_mesh_file(path):
+    """读取write_mesh_file写入的网格文件"""
+    with open(path, "rb") as f:
+        head = f.read(4 + 4 * len(MESH_FILE_ARRAYS))
+        if head[:4] != MESH_FILE_MAGIC:
+            raise ValueError(f"Not a mesh file: {path}")
+        data = {}
+        for (key, code), size in zip(MESH_FILE_ARRAYS, struct.unpack(f"<{len(MESH_FILE_ARRAYS)}I", head[4:])):
+            data[key] = array.array(code)
+            data[key].fromfile(f, size)
+    return data
+
+def reduce_mesh_data(data, ratio):
+    """在当前Maya进程中重建网格并减面到约ratio倍，供无界面工作进程调用"""
+    transform = create_mesh_from_data(data)
+    name = om2.MDagPath.getAPathTo(transform).fullPathName()
+    try:
+        cmds.polyReduce(name, version=1, termination=0, percentage=(1.0 - ratio) * 100.0, keepQuadsWeight=1.0,
+                        keepBorder=True, replaceOriginal=True, constructionHistory=False)
+        return export_mesh_data(om2.MDagPath.getAPathTo(transform).extendToShape())
+    finally:
+        cmds.delete(name)
+
+def lod_percent(ratio):
+    """比例转换为代理名称中的百分比"""
+    return int(round(ratio * 100))
+
+def lod_cache_path(digest, ratio=None):
+    """获取导出的原网格或某比例减面结果的缓存路径"""
+    name = digest if ratio is None else f"{digest}_{lod_percent(ratio):03d}"
+    return os.path.join(LOD_CACHE_DIR, name + ".mesh")
+
+def lod_source_shape(transform):
+    """获取变换节点下的原网格形状，跳过中间对象和已生成的代理"""
+    shapes = cmds.listRelatives(transform, shapes=True, type="mesh", noIntermediate=True, fullPath=True) or []
+    return next((s for s in shapes if not LOD_SHAPE_PATTERN.search(s)), None)
+
+def prepare_lod_jobs(transforms, ratios):
+    """导出网格并按内容哈希查找缓存，返回代理计划和需要减面的工作进程任务"""
+    ensure_dir(LOD_CACHE_DIR)
+    plan, jobs, cached = [], [], {}
+    for transform in transforms:
+        shape = lod_source_shape(transform)
+        if shape is None: continue
+        data = export_mesh_data(om2.MSelectionList().add(shape).getDagPath(0))
+        digest = mesh_data_hash(data)
+        # 内容相同的网格只减面一次
+        if digest in cached:
+            plan.append({"transform": transform, "shape": shape, "digest": digest, "cached": cached[digest]})
+            continue
+        missing = [(ratio, lod_cache_path(digest, ratio)) for ratio in ratios
+                   if not os.path.exists(lod_cache_path(digest, ratio))]
+        cached[digest] = not missing
+        plan.append({"transform": transform, "shape": shape, "digest": digest, "cached": cached[digest]})
+        if not missing: continue
+        source = lod_cache_path(digest)
+        if not os.path.exists(source):
+            write_mesh_file(source, data)
+        jobs.append({"id": len(jobs), "kind": "lod", "file": source, "outputs": missing,
+                     "log": os.path.join(LOD_CACHE_DIR, "logs", f"{digest}.log")})
+    return plan, jobs
+
+def build_lod_proxies(plan, ratios):
+    """在原网格的变换节点下为每个比例创建子变换节点和隐藏的代理形状，并沿用原网格的材质
+
+    代理有自己的变换节点，原变换节点下仍只有一个网格形状；同比例的旧代理会被替换。
+    删除旧代理和创建新代理通过API完成，并作为一步可撤销操作提交。
+    """
+    stale, specs = om2.MDagModifier(), []
+    for item in plan:
+        transform, shape = item["transform"], item["shape"]
+        if not cmds.objExists(shape): continue
+        existing = cmds.listRelatives(transform, children=True, fullPath=True) or []
+        engines = cmds.listConnections(shape, type="shadingEngine") or []
+        parent = om2.MSelectionList().add(transform).getDependNode(0)
+        engine = om2.MSelectionList().add(engines[0]).getDependNode(0) if engines else None
+        short_transform, short_shape = transform.split("|")[-1], shape.split("|")[-1]
+        for ratio in ratios:
+            path = lod_cache_path(item["digest"], ratio)
+            if not os.path.exists(path): continue
+            suffix = f"_LOD{lod_percent(ratio):03d}"
+            names = (short_transform + suffix, short_shape + suffix)
+            # 旧版本直接放在原变换节点下的代理形状也一并替换
+            for old in existing:
+                if old.split("|")[-1] in names:
+                    stale.deleteNode(om2.MSelectionList().add(old).getDependNode(0))
+            specs.append((parent, read_mesh_file(path), names, engine))
+    created = []
+
+    def redo():
+        stale.doIt()
+        del created[:]
+        for parent, data, (transform_name, shape_name), engine in specs:
+            proxy_transform = om2.MFnDagNode().create("transform", transform_name, parent)
+            proxy = create_mesh_from_data(data, proxy_transform)
+            fn = om2.MFnDagNode(proxy)
+            fn.setName(shape_name)
+            fn.findPlug("visibility", False).setBool(False)
+            if engine is not None:
+                om2.MFnSet(engine).addMember(om2.MDagPath.getAPathTo(proxy))
+            created.append((proxy_transform, proxy))
+
+    def undo():
+        remove = om2.MDagModifier()
+        for proxy_transform, _ in created:
+            remove.deleteNode(proxy_transform)
+        remove.doIt()
+        stale.undoIt()
+
+    if specs:
+        commit_undoable(redo, undo)
+    # 显示选项在生成后重置为Full，替换掉正在显示的旧代理时要让原网格重新显示
+    set_lod_level([item["transform"] for item in plan])
+    return [om2.MDagPath.getAPathTo(proxy).fullPathName() for _, proxy in created]
+
+def import_batch_runner():
+    """导入与工具脚本同目录的batch_runner"""
+    script_dir = os.path.dirname(LOCAL_SCRIPT_PATH)
+    if script_dir not in sys.path:
+        sys.path.append(script_dir)
+    try:
+        return importlib.import_module("batch_runner")
+    except ImportError:
+        raise RuntimeError(f"batch_runner.py not found in {script_dir}")
+
+def lod_worker_command(runner):
+    """构建减面工作进程命令行，默认使用当前Maya安装中的mayapy"""
+    if LOD_WORKER_COMMAND:
+        return list(LOD_WORKER_COMMAND)
+    mayapy = LOD_MAYAPY or os.path.join(os.path.dirname(sys.executable), "mayapy.exe" if os.name == "nt" else "mayapy")
+    return runner.worker_command(mayapy)
+
+def generate_lods_async(transforms, ratios, callback=None):
+    """导出网格后在后台mayapy进程池中减面，完成后在主线程创建代理并回调
+
+    已缓存的比例不会再减面，全部命中缓存时直接创建代理。
+    """
+    plan, jobs = prepare_lod_jobs(transforms, ratios)
+    summary = {"meshes": len(plan), "reduced": sum(1 for item in plan if not item["cached"]), "errors": [], "proxies": []}
+
+    def finish(results):
+        summary["errors"] = [f"{os.path.basename(r['file'])}: {r.get('error', '')}" for r in results if not r["ok"]]
+        summary["proxies"] = run_action("Generate LODs", build_lod_proxies, plan, ratios)
+        if callback:
+            callback(summary)
+
+    if not jobs:
+        finish([])
+        return None
+    runner = import_batch_runner()
+    command = lod_worker_command(runner)
+
+    def worker():
+        try:
+            results = runner.run_jobs(jobs, command, LOD_WORKERS, retries=1, timeout=LOD_TIMEOUT, report=None)
+        except Exception as e:
+            results = [{"file": job["file"], "ok": False, "error": str(e)} for job in jobs]
+        maya.utils.executeDeferred(finish, results)
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+def lod_owner(shape):
+    """获取形状所属的原网格变换节点，代理形状跳过其自身的代理变换节点"""
+    parent = shape.rsplit("|", 1)[0]
+    return parent.rsplit("|", 1)[0] if LOD_SHAPE_PATTERN.search(parent) else parent
+
+def lod_shapes(transforms):
+    """按原网格变换节点分组原网格形状和各比例的代理形状"""
+    shapes = cmds.listRelatives(transforms, shapes=True, type="mesh", noIntermediate=True, fullPath=True) or []
+    children = cmds.listRelatives(transforms, children=True, type="transform", fullPath=True) or []
+    proxies = [c for c in children if LOD_SHAPE_PATTERN.search(c)]
+    if proxies:
+        shapes += cmds.listRelatives(proxies, shapes=True, type="mesh", noIntermediate=True, fullPath=True) or []
+    groups = {}
+    for shape in shapes:
+        match = LOD_SHAPE_PATTERN.search(shape)
+        groups.setdefault(lod_owner(shape), {})[int(match.group(1)) if match else None] = shape
+    return groups
+
+def lod_transforms():
+    """获取场景中带代理的变换节点"""
+    proxies = cmds.ls("*_LOD???", type="mesh", long=True) or []
+    return sorted({lod_owner(p) for p in proxies if LOD_SHAPE_PATTERN.search(p)})
+
+def set_lod_level(transforms, percent=None):
+    """切换显示的代理，percent为None或对象没有该比例的代理时显示原网格"""
+    show, hide = [], []
+    for levels in lod_shapes(transforms).values():
+        if len(levels) < 2: continue
+        visible = levels.get(percent, levels.get(None))
+        for shape in levels.values():
+            (show if shape == visible else hide).append(shape)
+    if hide: cmds.hide(hide)
+    if show: cmds.showHidden(show)
+    return len(show)
+
+# ========================
+# 贴图注册表
+# ========================
+def normalize_texture_path(path):
+    """规范化贴图路径，用于比较和缓存"""
+    return os.path.normcase(os.path.abspath(os.path.expandvars(path))).replace("\\", "/")
+
+def _read_png_header(f, head):
+    width, height, depth, color_type = struct.unpack(">IIBB", head[16:26])
+    return width, height, {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type), depth
+
+def _read_jpeg_header(f, head):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF: return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7: continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            depth, height, width, channels = struct.unpack(">BHHB", f.read(6))
+            return width, height, channels, depth
+        f.seek(length - 2, os.SEEK_CUR)
+
+def _read_tga_header(f, head):
+    width, height, pixel_depth = struct.unpack("<HHB", head[12:17])
+    return width, height, max(pixel_depth // 8, 1), 8
+
+def _read_tiff_header(f, head):
+    endian = "<" if head[:2] == b"II" else ">"
+    f.seek(struct.unpack(endian + "I", head[4:8])[0])
+    tags = {}
+    for _ in range(struct.unpack(endian + "H", f.read(2))[0]):
+        tag, typ, count, value = struct.unpack(endian + "HHI4s", f.read(12))
+        fmt = "H" if typ == 3 else "I"
+        tags[tag] = struct.unpack(endian + fmt, value[:struct.calcsize(fmt)])[0]
+    return tags.get(256), tags.get(257), tags.get(277, 1), tags.get(258, 8) if tags.get(277, 1) == 1 else None
+
+def _read_exr_header(f, head):
+    f.seek(8)
+    data = f.read(65536)
+    pos, width = 0, None
+    height = channels = depth = None
+    while pos < len(data) and data[pos] != 0:
+        name_end = data.index(b"\0", pos)
+        type_end = data.index(b"\0", name_end + 1)
+        name, typ = data[pos:name_end], data[name_end + 1:type_end]
+        size = struct.unpack("<i", data[type_end + 1:type_end + 5])[0]
+        value = data[type_end + 5:type_end + 5 + size]
+        if name == b"dataWindow":
+            xmin, ymin, xmax, ymax = struct.unpack("<iiii", value)
+            width, height = xmax - xmin + 1, ymax - ymin + 1
+        elif typ == b"chlist":
+            channels, i = 0, 0
+            while i < len(value) and value[i] != 0:
+                i = value.index(b"\0", i) + 1
+                depth = {0: 32, 1: 16, 2: 32}.get(struct.unpack("<i", value[i:i + 4])[0])
+                channels += 1
+                i += 16
+        pos = type_end + 5 + size
+    return width, height, channels, depth
+
+def _read_hdr_header(f, head):
+    f.seek(0)
+    for line in f.read(4096).split(b"\n"):
+        m = re.match(rb"^[-+]Y (\d+) [-+]X (\d+)", line)
+        if m:
+            return int(m.group(2)), int(m.group(1)), 3, 32
+    return None
+
+IMAGE_HEADER_READERS = [
+    (b"\x89PNG", "png", _read_png_header),
+    (b"\xff\xd8", "jpeg", _read_jpeg_header),
+    (b"II*\x00", "tiff", _read_tiff_header),
+    (b"MM\x00*", "tiff", _read_tiff_header),
+    (b"\x76\x2f\x31\x01", "exr", _read_exr_header),
+    (b"#?", "hdr", _read_hdr_header)
+]
+
+def read_image_header(path):
+    """只读取文件头获取尺寸、通道数和位深"""
+    with open(path, "rb") as f:
+        head = f.read(64)
+        fmt, reader = next(((fmt, reader) for magic, fmt, reader in IMAGE_HEADER_READERS if head.startswith(magic)), (None, None))
+        if reader is None and path.lower().endswith(".tga"):
+            fmt, reader = "tga", _read_tga_header
+        info = None
+        if reader:
+            try:
+                info = reader(f, head)
+            except (struct.error, ValueError, IndexError):
+                info = None
+    width, height, channels, depth = info or (None, None, None, None)
+    return {"format": fmt, "width": width, "height": height, "channels": channels, "bit_depth": depth}
+
+def probe_image(path):
+    """获取图像头信息，带缓存；TTL内不访问磁盘，过期后只在文件变化时重新读取"""
+    if not path: return None
+    key = normalize_texture_path(path)
+    now = time.time()
+    cached = IMAGE_PROBE_CACHE.get(key)
+    if cached and now - cached["checked"] < IMAGE_PROBE_TTL:
+        return cached["info"]
+    try:
+        st = os.stat(key)
+    except OSError:
+        IMAGE_PROBE_CACHE[key] = {"checked": now, "info": None}
+        return None
+    if cached and cached["info"] and cached["info"]["mtime"] == st.st_mtime and cached["info"]["size"] == st.st_size:
+        cached["checked"] = now
+        return cached["info"]
+    info = read_image_header(key)
+    info.update({"path": key, "mtime": st.st_mtime, "size": st.st_size})
+    IMAGE_PROBE_CACHE[key] = {"checked": now, "info": info}
+    return info
+
+def scan_scene_textures():
+    """读取场景中全部file节点的路径和色彩空间"""
+    entries = []
+    for node in cmds.ls(type="file") or []:
+        path = cmds.getAttr(node + ".fileTextureName") or ""
+        if path:
+            entries.append((node, normalize_texture_path(path), cmds.getAttr(node + ".colorSpace") or ""))
+    return entries
+
+def rebuild_texture_registry():
+    """从场景中的file节点重建贴图注册表"""
+    global TEXTURE_REGISTRY_SCENE
+    TEXTURE_REGISTRY.clear()
+    for node, path, colorspace in scan_scene_textures():
+        TEXTURE_REGISTRY.setdefault((path, colorspace), node)
+    TEXTURE_REGISTRY_SCENE = cmds.file(query=True, sceneName=True)
+
+def file_node_key(node):
+    """读取file节点当前的规范化路径和色彩空间，节点不存在时返回None"""
+    if not cmds.objExists(node): return None
+    return (normalize_texture_path(cmds.getAttr(node + ".fileTextureName") or ""), cmds.getAttr(node + ".colorSpace") or "")
+
+def get_or_create_file_node(path, colorspace, name):
+    """按规范化路径和色彩空间复用已有file节点
+
+    注册表命中时重新读取节点的路径和色彩空间，节点被删除或改了贴图时重建注册表后再查找。
+    """
+    key = (normalize_texture_path(path), colorspace)
+    if TEXTURE_REGISTRY_SCENE != cmds.file(query=True, sceneName=True):
+        rebuild_texture_registry()
+    node = TEXTURE_REGISTRY.get(key)
+    if node and file_node_key(node) != key:
+        rebuild_texture_registry()
+        node = TEXTURE_REGISTRY.get(key)
+    if node:
+        return node
+    node = cmds.shadingNode('file', asTexture=True, name=name)
+    cmds.setAttr(node + '.fileTextureName', path.replace("\\", "/"), type='string')
+    cmds.setAttr(node + '.colorSpace', colorspace, type='string')
+    tag_tool_nodes(node)
+    TEXTURE_REGISTRY[key] = node
+    return node
+
+def find_duplicate_textures():
+    """查找加载同一贴图的多个file节点"""
+    groups = {}
+    for node, path, colorspace in scan_scene_textures():
+        groups.setdefault((path, colorspace), []).append(node)
+    return {key: nodes for key, nodes in groups.items() if len(nodes) > 1}
+
+def format_duplicate_report(duplicates):
+    """生成重复贴图报告"""
+    if not duplicates:
+        return "No duplicate texture loads found."
+    extra = sum(len(nodes) - 1 for nodes in duplicates.values())
+    lines = [f"{len(duplicates)} textures loaded more than once ({extra} redundant file nodes):"]
+    for (path, colorspace), nodes in sorted(duplicates.items(), key=lambda item: -len(item[1])):
+        info = probe_image(path)
+        size = f" {info['width']}x{info['height']}" if info and info["width"] else ""
+        lines.append(f"  {os.path.basename(path)} [{colorspace}]{size}: {', '.join(nodes)}")
+    return "\n".join(lines)
+
+SCENE_OPEN_HANDLERS.append(rebuild_texture_registry)
+
+# ========================
+# 不透明度分析
+# ========================
+def file_content_hash(path):
+    """计算文件内容哈希，文件未变化时复用结果"""
+    st = os.stat(path)
+    key = (normalize_texture_path(path), st.st_mtime, st.st_size)
+    if key not in FILE_HASH_CACHE:
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        FILE_HASH_CACHE[key] = digest.hexdigest()
+    return FILE_HASH_CACHE[key]
+
+def load_image_pixels(path, max_size=None):
+    """用Qt解码图像为RGBA数组，可按最大边长缩小解码"""
+    if np is None: return None
+    reader = QtGui.QImageReader(path)
+    size = reader.size()
+    if max_size and size.isValid() and max(size.width(), size.height()) > max_size:
+        reader.setScaledSize(size.scaled(max_size, max_size, QtCore.Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull(): return None
+    image = image.convertToFormat(QtGui.QImage.Format_RGBA8888)
+    width, height = image.width(), image.height()
+    data = np.frombuffer(image.constBits(), np.uint8, count=image.bytesPerLine() * height)
+    return data.reshape(height, image.bytesPerLine())[:, :width * 4].reshape(height, width, 4).copy()
+
+def analyze_opacity_pixels(values, tiles=8):
+    """统计不透明度直方图并判断完全不透明、镂空或半透明"""
+    eps = 1.0 / 255.0
+    opaque = values >= 1.0 - eps
+    clear = values <= eps
+    total = float(values.size)
+    opaque_ratio, clear_ratio = opaque.sum() / total, clear.sum() / total
+    soft_ratio = max(0.0, 1.0 - opaque_ratio - clear_ratio)
+    height, width = values.shape
+    th, tw = max(height // tiles, 1), max(width // tiles, 1)
+    grid = opaque[:th * (height // th), :tw * (width // tw)].reshape(height // th, th, width // tw, tw)
+    if clear_ratio == 0.0 and soft_ratio == 0.0:
+        mode = "opaque"
+    elif soft_ratio <= OPACITY_SOFT_TOLERANCE:
+        mode = "cutout"
+    else:
+        mode = "blend"
+    return {
+        "mode": mode,
+        "histogram": np.histogram(values, bins=16, range=(0.0, 1.0))[0].tolist(),
+        "opaque": round(float(opaque_ratio), 4),
+        "clear": round(float(clear_ratio), 4),
+        "soft": round(float(soft_ratio), 4),
+        "opaque_tiles": round(float(grid.all(axis=(1, 3)).mean()), 4)
+    }
+
+def load_opacity_analysis_cache():
+    """读取磁盘上的不透明度分析缓存"""
+    if OPACITY_ANALYSIS_CACHE or not os.path.exists(OPACITY_ANALYSIS_FILE): return
+    try:
+        with open(OPACITY_ANALYSIS_FILE, "r") as f:
+            OPACITY_ANALYSIS_CACHE.update(json.load(f))
+    except (OSError, ValueError) as e:
+        # 可能在分析线程中调用，警告交给主线程输出
+        maya.utils.executeDeferred(cmds.warning, f"Failed to read opacity analysis cache: {str(e)}")
+
+def analyze_opacity_map(path):
+    """分析不透明度贴图，结果按文件哈希缓存"""
+    if not probe_image(path):
+        return {"mode": "opaque"}
+    if np is None:
+        return {"mode": "blend", "reason": "NumPy is not available"}
+    digest = file_content_hash(path)
+    with OPACITY_ANALYSIS_LOCK:
+        load_opacity_analysis_cache()
+        if digest in OPACITY_ANALYSIS_CACHE:
+            return OPACITY_ANALYSIS_CACHE[digest]
+    pixels = load_image_pixels(path, OPACITY_ANALYSIS_MAX_SIZE)
+    if pixels is None:
+        return {"mode": "blend", "reason": "Image format could not be decoded"}
+    result = analyze_opacity_pixels(pixels[..., :3].mean(axis=-1) / 255.0)
+    with OPACITY_ANALYSIS_LOCK:
+        OPACITY_ANALYSIS_CACHE[digest] = result
+        ensure_dir(TOOL_DATA_DIR)
+        with open(OPACITY_ANALYSIS_FILE, "w") as f:
+            json.dump(OPACITY_ANALYSIS_CACHE, f)
+    return result
+
+def cached_opacity_analysis(path):
+    """不读取文件内容，只返回本会话中已经分析过的结果，没有时返回None"""
+    if not probe_image(path):
+        return {"mode": "opaque"}
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    digest = FILE_HASH_CACHE.get((normalize_texture_path(path), st.st_mtime, st.st_size))
+    with OPACITY_ANALYSIS_LOCK:
+        return OPACITY_ANALYSIS_CACHE.get(digest) if digest else None
+
+def analyze_opacity_map_async(path, callback=None):
+    """在后台线程分析不透明度贴图，完成后在主线程回调"""
+    def worker():
+        try:
+            result = analyze_opacity_map(path)
+        except Exception as e:
+            result = {"mode": "blend", "reason": str(e)}
+        if callback:
+            maya.utils.executeDeferred(callback, path, result)
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+def format_opacity_analysis(result):
+    """生成不透明度分析摘要"""
+    if "opaque" not in result:
+        return f"{result['mode'].capitalize()}" + (f" ({result['reason']})" if result.get("reason") else "")
+    return (f"{result['mode'].capitalize()}: {result['opaque']:.1%} opaque, {result['clear']:.1%} clear, "
+            f"{result['soft']:.1%} soft, {result['opaque_tiles']:.0%} fully opaque tiles")
+
+def update_viewport_transparency():
+    """根据场景中透明材质的实际组合选择视口透明算法"""
+    if not cmds.objExists('hardwareRenderingGlobals'): return None
+    modes = {cmds.getAttr(node + "." + TRANSPARENCY_MODE_ATTR)
+             for node in cmds.ls("*." + TRANSPARENCY_MODE_ATTR, objectsOnly=True) or []}
+    mode = "blend" if "blend" in modes else "cutout" if "cutout" in modes else "opaque"
+    algorithm = VIEWPORT_TRANSPARENCY_ALGORITHMS[mode]
+    # 性能模式降低了透明算法时只更新退出时要恢复的值
+    if VIEWPORT_PERFORMANCE is not None and VIEWPORT_PERFORMANCE.defer_global("transparencyAlgorithm", algorithm):
+        return mode
+    if cmds.getAttr('hardwareRenderingGlobals.transparencyAlgorithm') != algorithm:
+        cmds.setAttr('hardwareRenderingGlobals.transparencyAlgorithm', algorithm)
+    return mode
+
+# ========================
+# 贴图缩略图
+# ========================
+def thumbnail_cache_path(path):
+    """按路径和修改时间生成缩略图缓存文件名"""
+    st = os.stat(path)
+    key = f"{normalize_texture_path(path)}|{st.st_mtime}|{st.st_size}|{THUMBNAIL_SIZE}"
+    return os.path.join(THUMBNAIL_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+def prune_cache_dir(directory, max_bytes):
+    """缓存目录超过上限时按最近使用时间(修改时间)删除最旧的文件"""
+    try:
+        entries = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(directory) if e.is_file()]
+    except OSError:
+        return 0
+    total, removed = sum(size for _, size, _ in entries), 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes: break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+def touch_cache_file(path):
+    """命中缓存时更新修改时间，淘汰时按最近使用排序"""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+def load_thumbnail(path):
+    """读取缓存的缩略图，没有时按缩小尺寸解码并写入缓存"""
+    cache_path = thumbnail_cache_path(path)
+    if os.path.exists(cache_path):
+        image = QtGui.QImage(cache_path)
+        if not image.isNull():
+            touch_cache_file(cache_path)
+            return image
+    reader = QtGui.QImageReader(path)
+    size = reader.size()
+    if size.isValid() and max(size.width(), size.height()) > THUMBNAIL_SIZE:
+        reader.setScaledSize(size.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, QtCore.Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull(): return None
+    if max(image.width(), image.height()) > THUMBNAIL_SIZE:
+        image = image.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+    ensure_dir(THUMBNAIL_DIR)
+    image.save(cache_path, "PNG")
+    prune_cache_dir(THUMBNAIL_DIR, THUMBNAIL_CACHE_MAX_BYTES)
+    return image
+
+def request_thumbnail(path, callback):
+    """在线程池中生成缩略图，完成后在主线程回调"""
+    global THUMBNAIL_EXECUTOR
+    if THUMBNAIL_EXECUTOR is None:
+        THUMBNAIL_EXECUTOR = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+    def worker():
+        try:
+            image = load_thumbnail(path)
+        except Exception as e:
+            image = None
+            maya.utils.executeDeferred(cmds.warning, f"Failed to load thumbnail for {path}: {str(e)}")
+        maya.utils.executeDeferred(callback, path, image)
+    return THUMBNAIL_EXECUTOR.submit(worker)
+
+def load_recent_maps():
+    """读取最近使用的贴图列表"""
+    try:
+        with open(RECENT_MAPS_FILE, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    return {kind: [p for p in data.get(kind, []) if os.path.exists(p)] for kind in ("color", "opacity")}
+
+def remember_recent_map(kind, path):
+    """将贴图加入最近使用列表"""
+    recent = load_recent_maps()
+    recent[kind] = ([path] + [p for p in recent[kind] if p != path])[:RECENT_MAPS_SIZE]
+    ensure_dir(TOOL_DATA_DIR)
+    with open(RECENT_MAPS_FILE, "w") as f:
+        json.dump(recent, f, indent=2)
+    return recent
+
+def set_map_path(kind, path):
+    """设置当前颜色或不透明度贴图"""
+    global COLOR_MAP_PATH, OPACITY_MAP_PATH
+    if kind == "color":
+        COLOR_MAP_PATH = path
+    else:
+        OPACITY_MAP_PATH = path
+    remember_recent_map(kind, path)
+
+def get_map_path(kind):
+    """获取当前颜色或不透明度贴图"""
+    return COLOR_MAP_PATH if kind == "color" else OPACITY_MAP_PATH
+
 # ========================
 # 材质工具函数
 # ========================
+def material_specular(name):
+    """获取材质的高光强度和粗糙度"""
+    return (0.2, 0.5) if "Gray" in name else (0.5, 0.3)
+
 def create_arnold_material(color_info):
     """创建Arnold材质"""
     name, rgb = color_info["name"], color_info["rgb"]
@@ -355,24 +2675,74 @@ def create_arnold_material(color_info):
     cmds.setAttr(material + '.base', 1.0)
     cmds.setAttr(material + '.baseColor', *rgb, type='double3')
     
-    if "Gray" in name:
-        cmds.setAttr(material + '.specular', 0.2)
-        cmds.setAttr(material + '.specularRoughness', 0.5)
-    else:
-        cmds.setAttr(material + '.specular', 0.5)
-        cmds.setAttr(material + '.specularRoughness', 0.3)
+    specular, roughness = material_specular(name)
+    cmds.setAttr(material + '.specular', specular)
+    cmds.setAttr(material + '.specularRoughness', roughness)
     
     shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=material+'SG')
     cmds.connectAttr(material + '.outColor', shading_group + '.surfaceShader', force=True)
     return shading_group
 
+def quantize_color(rgb, step=MATERIAL_COLOR_STEP):
+    """量化颜色，使相近的颜色共用一个材质"""
+    return tuple(round(round(float(c) / step) * step, 4) for c in rgb)
+
+def material_cache_key(color_info):
+    """根据名称、颜色和高光设置生成材质缓存键"""
+    name, rgb = color_info["name"], quantize_color(color_info["rgb"])
+    specular, roughness = material_specular(name)
+    return f"{name}|{rgb[0]:.4f},{rgb[1]:.4f},{rgb[2]:.4f}|{specular:.2f},{roughness:.2f}"
+
+def rebuild_material_cache():
+    """从带标记的材质节点重建缓存"""
+    global MATERIAL_CACHE_SCENE
+    MATERIAL_CACHE.clear()
+    for material in cmds.ls(f"*.{MATERIAL_TAG_ATTR}", recursive=True, objectsOnly=True) or []:
+        key = cmds.getAttr(f"{material}.{MATERIAL_TAG_ATTR}")
+        shading_groups = cmds.listConnections(f"{material}.outColor", source=False, destination=True, type="shadingEngine") or []
+        if key and shading_groups:
+            MATERIAL_CACHE.setdefault(key, shading_groups[0])
+    MATERIAL_CACHE_SCENE = cmds.file(query=True, sceneName=True)
+
+def tag_tool_nodes(nodes):
+    """标记工具创建的着色节点，材质清理只处理带标记的网络"""
+    cmds.addAttr(nodes, longName=TOOL_NODE_ATTR, attributeType="bool", defaultValue=True)
+
+def get_or_create_arnold_material(color_info):
+    """复用已有的相同材质，没有时才创建"""
+    return get_or_create_material(material_cache_key(color_info), lambda: create_arnold_material(color_info))
+
+def get_or_create_material(key, create_func):
+    """按缓存键查找带标记的材质，没有时调用create_func创建并标记"""
+    if MATERIAL_CACHE_SCENE != cmds.file(query=True, sceneName=True):
+        rebuild_material_cache()
+    shading_group = MATERIAL_CACHE.get(key)
+    if shading_group and not cmds.objExists(shading_group):
+        rebuild_material_cache()
+        shading_group = MATERIAL_CACHE.get(key)
+    if shading_group:
+        return shading_group
+
+    shading_group = create_func()
+    material = cmds.listConnections(shading_group + '.surfaceShader', source=True, destination=False)[0]
+    cmds.addAttr(material, longName=MATERIAL_TAG_ATTR, dataType="string")
+    cmds.setAttr(f"{material}.{MATERIAL_TAG_ATTR}", key, type="string")
+    tag_tool_nodes(shading_group)
+    MATERIAL_CACHE[key] = shading_group
+    return shading_group
+
 def assign_material_to_selection(color_info):
     """将材质分配给选中的对象"""
     selected = cmds.ls(selection=True)
     if not selected: return
-    shading_group = create_arnold_material(color_info)
+    shading_group = get_or_create_arnold_material(color_info)
     cmds.sets(selected, forceElement=shading_group)
 
+def custom_color_info(rgb):
+    """构建量化后的自定义颜色信息"""
+    rgb = quantize_color(rgb)
+    return {"name": f"Custom({rgb[0]:.2f},{rgb[1]:.2f},{rgb[2]:.2f})", "rgb": rgb}
+
 def assign_custom_color_to_selection():
     """分配自定义颜色材质"""
     selected = cmds.ls(selection=True)
@@ -380,10 +2750,299 @@ def assign_custom_color_to_selection():
     result = cmds.colorEditor()
     if cmds.colorEditor(query=True, result=True):
         rgb = cmds.colorEditor(query=True, rgb=True)
-        custom_color = {"name": f"Custom({rgb[0]:.2f},{rgb[1]:.2f},{rgb[2]:.2f})", "rgb": rgb}
-        shading_group = create_arnold_material(custom_color)
+        shading_group = get_or_create_arnold_material(custom_color_info(rgb))
         cmds.sets(selected, forceElement=shading_group)
 
+SCENE_OPEN_HANDLERS.append(rebuild_material_cache)
+
+# ========================
+# 材质清理
+# ========================
+def connection_pairs(flat):
+    """将connections=True返回的扁平列表转换为(自身插头, 连接对象)对"""
+    return list(zip(flat[0::2], flat[1::2])) if flat else []
+
+def legacy_material_color(base):
+    """旧版材质名称对应的颜色，预设名取预设颜色，Custom_0_50_...按名称中的数值解析"""
+    for preset in COLOR_PRESETS:
+        if preset["name"].replace(" ", "_") == base:
+            return preset["rgb"]
+    if base.startswith("Custom_"):
+        parts = base[len("Custom_"):].split("_")
+        if len(parts) == 6:
+            return [float(f"{parts[i]}.{parts[i + 1]}") for i in range(0, 6, 2)]
+    return None
+
+def find_legacy_tool_nodes(node_types, tagged):
+    """按旧版名称找出没有标记的工具节点，并检查结构，避免误删同名的用户材质
+
+    材质的baseColor要等于名称对应的颜色或来自同样按旧版命名的贴图/用户数据节点；
+    着色组要由这样的材质驱动；贴图和用户数据节点只能连到这样的材质。
+    """
+    named = {n: PURGE_LEGACY_PATTERN.search(n) for n in node_types if n not in tagged}
+    named = {n: m for n, m in named.items() if m}
+    materials = [n for n in named if node_types[n] == "aiStandardSurface"]
+    if not materials: return set()
+    inputs = {plug.split(".")[0]: src for plug, src in connection_pairs(cmds.listConnections(
+        [f"{m}.baseColor" for m in materials], source=True, destination=False, connections=True))}
+    legacy = set()
+    for material in materials:
+        src = inputs.get(material)
+        if src is not None:
+            if src in named and node_types[src] in ("file", "aiUserDataColor"):
+                legacy.add(material)
+            continue
+        rgb = legacy_material_color(named[material].group("base"))
+        color = cmds.getAttr(f"{material}.baseColor")[0]
+        if rgb is not None and all(abs(a - b) < 0.01 for a, b in zip(color, rgb)):
+            legacy.add(material)
+    if not legacy: return set()
+    sgs = [n for n in named if node_types[n] == "shadingEngine"]
+    shaders = connection_pairs(cmds.listConnections([f"{sg}.surfaceShader" for sg in sgs], source=True,
+                                                    destination=False, connections=True)) if sgs else []
+    legacy |= {plug.split(".")[0] for plug, src in shaders if src in legacy}
+    textures = [n for n in named if node_types[n] in ("file", "aiUserDataColor")]
+    uses = connection_pairs(cmds.listConnections(textures, source=False, destination=True, connections=True)) if textures else []
+    others = {dst for _, dst in uses if dst not in legacy}
+    ignored = {n for n, t in connection_pairs(cmds.ls(list(others), showType=True)) if t in PURGE_IGNORED_TYPES} if others else set()
+    shared = {plug.split(".")[0] for plug, dst in uses if dst not in legacy and dst not in ignored}
+    legacy |= {n for n in textures if n in inputs.values() and n not in shared}
+    return legacy
+
+def find_orphaned_shading_networks(legacy=False):
+    """用批量查询建立着色网络索引，找出不再被任何对象使用的工具材质网络
+
+    只处理带工具标记的节点和带标记材质所连的着色组，同名的用户材质不会被删除；
+    被删除的file节点独占的place2dTexture一并删除。legacy为True时还按名称和结构识别旧版工具
+    留下的无标记网络，这些节点另外列在legacy中供用户确认。
+    """
+    typed = cmds.ls(type=PURGE_NODE_TYPES, showType=True) or []
+    node_types = dict(zip(typed[0::2], typed[1::2]))
+    tagged = cmds.ls([f"*.{MATERIAL_TAG_ATTR}", f"*.{TRANSPARENCY_MODE_ATTR}", f"*.{TOOL_NODE_ATTR}"], objectsOnly=True) or []
+    tool = {n for n in tagged if n in node_types}
+    legacy_nodes = find_legacy_tool_nodes(node_types, tool) if legacy else set()
+    tool |= legacy_nodes
+    if not tool:
+        return {"nodes": [], "legacy": [], "by_type": {}, "bytes": 0, "scanned": len(node_types)}
+
+    downstream = connection_pairs(cmds.listConnections(list(tool), source=False, destination=True, connections=True))
+    tool |= {dst for plug, dst in downstream if node_types.get(dst) == "shadingEngine" and plug.split(".")[0] in tool}
+    tool_sgs = [n for n in tool if node_types.get(n) == "shadingEngine"]
+    members = connection_pairs(cmds.listConnections(tool_sgs, source=True, destination=False, connections=True)) if tool_sgs else []
+    consumers = {dst for _, dst in downstream if dst not in tool}
+    consumer_types = connection_pairs(cmds.ls(list(consumers), showType=True)) if consumers else []
+    live_consumers = {n for n, t in consumer_types if t not in PURGE_IGNORED_TYPES}
+
+    feeds = {}
+    alive = {plug.split(".")[0] for plug, _ in members if plug.split(".")[-1].startswith("dagSetMembers")}
+    for plug, dst in downstream:
+        src = plug.split(".")[0]
+        if dst in tool:
+            feeds.setdefault(dst, set()).add(src)
+        elif dst in live_consumers:
+            alive.add(src)
+    stack = list(alive)
+    while stack:
+        for src in feeds.get(stack.pop(), ()):
+            if src not in alive:
+                alive.add(src)
+                stack.append(src)
+
+    orphans = tool - alive
+    orphan_files = [n for n in orphans if node_types.get(n) == "file"]
+    placements = {n for n in cmds.listConnections(orphan_files, source=True, destination=False, type="place2dTexture") or []
+                  if n not in orphans} if orphan_files else set()
+    if placements:
+        uses = connection_pairs(cmds.listConnections(list(placements), source=False, destination=True, connections=True))
+        shared = {plug.split(".")[0] for plug, dst in uses if dst not in orphans and node_types.get(dst) is not None}
+        orphans |= placements - shared
+    orphans = sorted(orphans)
+    by_type = {}
+    for node in orphans:
+        node_type = node_types.get(node, "other")
+        by_type[node_type] = by_type.get(node_type, 0) + 1
+    saving = sum(PURGE_NODE_BYTES.get(t, 500) * count for t, count in by_type.items())
+    return {"nodes": orphans, "legacy": [n for n in orphans if n in legacy_nodes], "by_type": by_type,
+            "bytes": saving, "scanned": len(node_types)}
+
+def purge_orphaned_shading_networks(dry_run=False, legacy=False):
+    """预览或一次性删除孤立的工具材质网络，legacy为True时包括旧版工具的无标记网络"""
+    global MATERIAL_CACHE_SCENE, TEXTURE_REGISTRY_SCENE
+    result = find_orphaned_shading_networks(legacy)
+    if result["nodes"] and not dry_run:
+        cmds.delete(result["nodes"])
+        MATERIAL_CACHE_SCENE = TEXTURE_REGISTRY_SCENE = None
+    return result
+
+def format_purge_report(result, dry_run):
+    """生成材质清理报告"""
+    if not result["nodes"]:
+        return f"No orphaned shading networks found ({result['scanned']} shading nodes scanned)."
+    verb = "Would delete" if dry_run else "Deleted"
+    lines = [f"{verb} {len(result['nodes'])} nodes, about {result['bytes'] / 1024.0:.1f} KB of scene data:"]
+    lines.extend(f"  {node_type}: {count}" for node_type, count in sorted(result["by_type"].items()))
+    legacy = set(result.get("legacy", []))
+    tagged = [n for n in result["nodes"] if n not in legacy]
+    if tagged:
+        lines.append("")
+        lines.extend(f"  {node}" for node in tagged[:20])
+        if len(tagged) > 20:
+            lines.append(f"  ... and {len(tagged) - 20} more")
+    if legacy:
+        lines.append("")
+        lines.append(f"Untagged networks from older tool versions ({len(legacy)} nodes, matched by name and structure):")
+        lines.extend(f"  {node}" for node in sorted(legacy)[:20])
+        if len(legacy) > 20:
+            lines.append(f"  ... and {len(legacy) - 20} more")
+    return "\n".join(lines)
+
+# ========================
+# ID颜色
+# ========================
+def hsv_to_rgb_array(h, s, v):
+    """向量化HSV转RGB"""
+    h6 = (np.asarray(h, dtype=np.float64) % 1.0) * 6.0
+    i = np.floor(h6).astype(np.int64) % 6
+    f = h6 - np.floor(h6)
+    p, q, t = v * (1.0 - s), v * (1.0 - f * s), v * (1.0 - (1.0 - f) * s)
+    return np.stack([np.choose(i, [v, q, p, p, t, v]),
+                     np.choose(i, [t, v, v, q, p, p]),
+                     np.choose(i, [p, p, t, v, v, q])], axis=1)
+
+def generate_id_colors(names, mode="Random", seed=0, palette=None):
+    """一次生成全部对象的颜色：随机、按名称哈希或循环调色板"""
+    n = len(names)
+    if mode == "Palette":
+        palette = np.array(palette or [c["rgb"] for c in COLOR_PRESETS], dtype=np.float64)
+        return palette[np.arange(n) % len(palette)]
+    if mode == "Name Hash":
+        hashes = np.array([zlib.crc32(name.encode("utf-8")) for name in names], dtype=np.uint64)
+        hue = (hashes % np.uint64(3600)).astype(np.float64) / 3600.0
+        sat = 0.55 + ((hashes >> np.uint64(12)) % np.uint64(100)).astype(np.float64) * 0.004
+        val = 0.65 + ((hashes >> np.uint64(20)) % np.uint64(100)).astype(np.float64) * 0.003
+    else:
+        rng = np.random.default_rng(seed)
+        hue, sat, val = rng.random(n), rng.uniform(0.55, 0.95, n), rng.uniform(0.65, 0.95, n)
+    return hsv_to_rgb_array(hue, sat, val)
+
+def create_id_color_material():
+    """创建由对象用户数据颜色驱动的共享材质"""
+    material = cmds.shadingNode('aiStandardSurface', asShader=True, name='ID_Color_mat')
+    cmds.setAttr(material + '.base', 1.0)
+    cmds.setAttr(material + '.specular', 0.2)
+    cmds.setAttr(material + '.specularRoughness', 0.5)
+    user_data = cmds.shadingNode('aiUserDataColor', asUtility=True, name='ID_Color_userData')
+    cmds.setAttr(user_data + '.attribute', ID_COLOR_USER_DATA, type='string')
+    cmds.setAttr(user_data + '.default', 0.5, 0.5, 0.5, type='double3')
+    cmds.connectAttr(user_data + '.outColor', material + '.baseColor', force=True)
+    tag_tool_nodes(user_data)
+    shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=material+'SG')
+    cmds.connectAttr(material + '.outColor', shading_group + '.surfaceShader', force=True)
+    return shading_group
+
+def write_color_attribute(nodes, attr, colors):
+    """通过一个可撤销的MDGModifier批量写入颜色属性"""
+    sel = om2.MSelectionList()
+    for node in nodes:
+        sel.add(node)
+    modifier = om2.MDGModifier()
+    for i in range(sel.length()):
+        plug = om2.MFnDependencyNode(sel.getDependNode(i)).findPlug(attr, False)
+        for c in range(3):
+            modifier.newPlugValueFloat(plug.child(c), float(colors[i][c]))
+    commit_modifier(modifier)
+
+def assign_id_colors(meshes, mode="Random", seed=0):
+    """为所有网格分配一个共享ID材质，并批量写入每个对象的颜色，整个分配可以撤销"""
+    if np is None:
+        cmds.warning("NumPy is required for ID colors")
+        return 0
+    shapes = cmds.listRelatives(meshes, shapes=True, type="mesh", noIntermediate=True, fullPath=True) or []
+    if not shapes: return 0
+    existing = set(cmds.ls([f"{shape}.{ID_COLOR_ATTR}" for shape in shapes], objectsOnly=True, long=True) or [])
+    missing = [shape for shape in shapes if shape not in existing]
+    if missing:
+        cmds.addAttr(missing, longName=ID_COLOR_ATTR, attributeType="float3", usedAsColor=True)
+        for channel in "RGB":
+            cmds.addAttr(missing, longName=ID_COLOR_ATTR + channel, attributeType="float", parent=ID_COLOR_ATTR)
+    names = [shape.rsplit("|", 2)[-2] for shape in shapes]
+    write_color_attribute(shapes, ID_COLOR_ATTR, generate_id_colors(names, mode, seed))
+    cmds.sets(meshes, forceElement=get_or_create_material(ID_COLOR_CACHE_KEY, create_id_color_material))
+    return len(shapes)
+
+# ========================
+# 材质规则
+# ========================
+def rule_color_info(rule):
+    """获取规则对应的颜色信息"""
+    if rule.get("rgb"):
+        return custom_color_info(rule["rgb"])
+    preset = next((c for c in COLOR_PRESETS if c["name"] == rule.get("preset")), None)
+    if preset is None:
+        raise ValueError(f"Unknown color preset: {rule.get('preset')}")
+    return preset
+
+def compile_material_rule(rule):
+    """将规则编译为对网格完整路径的匹配函数"""
+    kind, pattern = rule.get("match", "Name"), rule.get("pattern", "")
+    if kind == "Name":
+        search = re.compile(pattern).search
+        return lambda mesh: search(mesh.rsplit("|", 1)[-1]) is not None
+    if kind == "Path":
+        search = re.compile(pattern).search
+        return lambda mesh: search(mesh) is not None
+    if kind == "Set":
+        members = cmds.sets(pattern, query=True) if pattern and cmds.objExists(pattern) else []
+    elif kind == "Layer":
+        members = cmds.editDisplayLayerMembers(pattern, query=True, fullNames=True) if pattern and cmds.objExists(pattern) else []
+    else:
+        raise ValueError(f"Unknown rule match type: {kind}")
+    return set(meshes_from_objects(members or [])).__contains__
+
+def evaluate_material_rules(rules, meshes=None):
+    """一次遍历场景网格，按第一个匹配的规则分组"""
+    meshes = list_target_meshes("scene") if meshes is None else meshes
+    compiled = [(compile_material_rule(rule), rule_color_info(rule)) for rule in rules]
+    groups, rule_counts, unmatched = {}, [0] * len(rules), 0
+    for mesh in meshes:
+        for i, (matches, color_info) in enumerate(compiled):
+            if matches(mesh):
+                key = material_cache_key(color_info)
+                groups.setdefault(key, (color_info, []))[1].append(mesh)
+                rule_counts[i] += 1
+                break
+        else:
+            unmatched += 1
+    return {"groups": groups, "rule_counts": rule_counts, "unmatched": unmatched, "total": len(meshes)}
+
+def apply_material_rules(rules, dry_run=False):
+    """按规则批量分配材质，每个着色组只调用一次sets"""
+    result = evaluate_material_rules(rules)
+    if not dry_run:
+        for color_info, members in result["groups"].values():
+            cmds.sets(members, forceElement=get_or_create_arnold_material(color_info))
+    return result
+
+def format_rule_report(rules, result):
+    """生成规则执行报告"""
+    lines = [f"{result['total']} meshes, {result['unmatched']} unmatched, {len(result['groups'])} shading groups"]
+    for rule, count in zip(rules, result["rule_counts"]):
+        target = rule.get("preset") or "RGB({:.2f}, {:.2f}, {:.2f})".format(*rule.get("rgb", (0, 0, 0)))
+        lines.append(f"  {rule.get('match')} '{rule.get('pattern')}' -> {target}: {count}")
+    return "\n".join(lines)
+
+def save_material_rules(path, rules):
+    """保存规则文件"""
+    with open(path, "w") as f:
+        json.dump({"version": 1, "rules": rules}, f, indent=2)
+    return path
+
+def load_material_rules(path):
+    """读取规则文件"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data.get("rules", []) if isinstance(data, dict) else data
+
 def open_hypershade():
     """打开Hypershade窗口"""
     if cmds.window('hyperShadePanel', exists=True):
@@ -399,24 +3058,46 @@ def create_transparency_material(color_info, color_map_path=None, opacity_map_pa
     cmds.setAttr(material + '.base', 1.0)
     cmds.setAttr(material + '.specular', 0.0)  
 
-    if color_map_path and os.path.exists(color_map_path):
-        color_file_node = cmds.shadingNode('file', asTexture=True, name=f'{name}_color_file')
-        cmds.setAttr(color_file_node + '.fileTextureName', color_map_path.replace("\\", "/"), type='string')
+    if probe_image(color_map_path):
+        color_file_node = get_or_create_file_node(color_map_path, 'sRGB', f'{name}_color_file')
         cmds.connectAttr(color_file_node + '.outColor', material + '.baseColor', force=True)
-        cmds.setAttr(color_file_node + '.colorSpace', 'sRGB', type='string')
     else:
         cmds.setAttr(material + '.baseColor', *rgb, type='double3')
 
-    if opacity_map_path and os.path.exists(opacity_map_path):
-        opacity_file_node = cmds.shadingNode('file', asTexture=True, name=f'{name}_opacity_file')
-        cmds.setAttr(opacity_file_node + '.fileTextureName', opacity_map_path.replace("\\", "/"), type='string')
+    # 没有分析结果时先按半透明连接贴图，后台分析完成后再修正，不在主线程哈希和解码贴图
+    analysis = cached_opacity_analysis(opacity_map_path)
+    mode = analysis["mode"] if analysis else "blend"
+    if mode != "opaque":
+        opacity_file_node = get_or_create_file_node(opacity_map_path, 'Raw', f'{name}_opacity_file')
         cmds.connectAttr(opacity_file_node + '.outColor', material + '.opacity', force=True)
-        cmds.setAttr(opacity_file_node + '.colorSpace', 'Raw', type='string')
+    cmds.addAttr(material, longName=TRANSPARENCY_MODE_ATTR, dataType="string")
+    cmds.setAttr(material + "." + TRANSPARENCY_MODE_ATTR, mode, type="string")
     
     shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=material+'SG')
     cmds.connectAttr(material + '.outColor', shading_group + '.surfaceShader', force=True)
+    tag_tool_nodes(shading_group)
+    if analysis is None:
+        analyze_opacity_map_async(opacity_map_path, functools.partial(finish_transparency_material, material))
     return shading_group
 
+def finish_transparency_material(material, path, result):
+    """后台分析完成后按实际模式更新透明材质，完全不透明时断开不透明度贴图"""
+    if not cmds.objExists(material): return
+    mode = result["mode"]
+    if mode == cmds.getAttr(material + "." + TRANSPARENCY_MODE_ATTR): return
+    def apply():
+        if mode == "opaque":
+            for plug in cmds.listConnections(material + ".opacity", source=True, destination=False, plugs=True) or []:
+                cmds.disconnectAttr(plug, material + ".opacity")
+            engines = cmds.listConnections(material + ".outColor", type="shadingEngine") or []
+            members = (cmds.sets(engines[0], query=True) or []) if engines else []
+            for shape in cmds.ls(members, dag=True, type="mesh", long=True) if members else []:
+                if cmds.attributeQuery("aiOpaque", node=shape, exists=True):
+                    cmds.setAttr(shape + ".aiOpaque", True)
+        cmds.setAttr(material + "." + TRANSPARENCY_MODE_ATTR, mode, type="string")
+        update_viewport_transparency()
+    run_action("Update Transparency Material", apply)
+
 def assign_transparency_material():
     """分配透明材质"""
     selected = cmds.ls(selection=True)
@@ -434,38 +3115,42 @@ def assign_transparency_material():
 
     cmds.sets(selected, forceElement=shading_group)
 
-    if cmds.objExists('hardwareRenderingGlobals'):
-        cmds.setAttr('hardwareRenderingGlobals.transparencyAlgorithm', 5)
+    material = cmds.listConnections(shading_group + '.surfaceShader', source=True, destination=False)[0]
+    if cmds.getAttr(material + "." + TRANSPARENCY_MODE_ATTR) != "opaque":
+        for shape in cmds.listRelatives(selected, shapes=True, fullPath=True, type="mesh") or []:
+            if cmds.attributeQuery("aiOpaque", node=shape, exists=True):
+                cmds.setAttr(shape + ".aiOpaque", False)
+    update_viewport_transparency()
     
     return True
 
 def select_color_map():
     """选择颜色贴图"""
-    global COLOR_MAP_PATH
+    recent = load_recent_maps()["color"]
     file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
         None, 
         "Select Color Map", 
-        "", 
+        os.path.dirname(recent[0]) if recent else "", 
         "Image Files (*.png *.jpg *.jpeg *.tga *.tif *.tiff *.exr)"
     )
     
     if file_path:
-        COLOR_MAP_PATH = file_path
+        set_map_path("color", file_path)
         return True
     return False
 
 def select_opacity_map():
     """选择不透明度贴图"""
-    global OPACITY_MAP_PATH
+    recent = load_recent_maps()["opacity"]
     file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
         None, 
         "Select Opacity Map", 
-        "", 
+        os.path.dirname(recent[0]) if recent else "", 
         "Image Files (*.png *.jpg *.jpeg *.tga *.tif *.tiff *.exr)"
     )
     
     if file_path:
-        OPACITY_MAP_PATH = file_path
+        set_map_path("opacity", file_path)
         return True
     return False
 
@@ -476,45 +3161,460 @@ def create_perspective_camera():
     """创建透视相机"""
     cam, shape = cmds.camera()
 
-def save_camera_snapshot(snapshot_dict, list_widget):
+class CameraSnapshotStore(object):
+    """相机快照存储，以紧凑JSON保存在场景节点上，可选同步到项目文件"""
+    def __init__(self):
+        self.snapshots = {}
+        self.loaded_scene = None
+        self.use_project_file = False
+
+    def project_path(self):
+        """获取当前项目的快照文件路径"""
+        return project_data_path(CAMERA_PROJECT_FILE)
+
+    def ensure_loaded(self):
+        """场景变化后重新读取快照，返回是否重新读取"""
+        if self.loaded_scene == cmds.file(query=True, sceneName=True): return False
+        self.load()
+        return True
+
+    def load(self):
+        """从项目文件和场景节点读取快照，场景中的同名快照优先"""
+        self.snapshots = {}
+        if self.use_project_file and os.path.exists(self.project_path()):
+            try:
+                with open(self.project_path(), "r") as f:
+                    self.snapshots.update(json.load(f).get("snapshots", {}))
+            except (OSError, ValueError) as e:
+                cmds.warning(f"Failed to read project camera snapshots: {str(e)}")
+        if cmds.objExists(CAMERA_STORE_NODE):
+            blob = cmds.getAttr(f"{CAMERA_STORE_NODE}.{CAMERA_STORE_ATTR}") or "{}"
+            self.snapshots.update(json.loads(blob).get("snapshots", {}))
+        self.loaded_scene = cmds.file(query=True, sceneName=True)
+
+    def save(self):
+        """将全部快照写回场景节点和项目文件
+
+        写入不进入撤销队列，否则撤销会让场景节点和内存中的快照不一致。
+        """
+        blob = json.dumps({"version": 1, "snapshots": self.snapshots}, separators=(",", ":"))
+        if not cmds.objExists(CAMERA_STORE_NODE):
+            undo_on = cmds.undoInfo(query=True, state=True)
+            if undo_on:
+                cmds.undoInfo(stateWithoutFlush=False)
+            try:
+                cmds.createNode("network", name=CAMERA_STORE_NODE)
+                cmds.addAttr(CAMERA_STORE_NODE, longName=CAMERA_STORE_ATTR, dataType="string")
+            finally:
+                if undo_on:
+                    cmds.undoInfo(stateWithoutFlush=True)
+        sel = om2.MSelectionList()
+        sel.add(CAMERA_STORE_NODE)
+        modifier = om2.MDGModifier()
+        modifier.newPlugValueString(om2.MFnDependencyNode(sel.getDependNode(0)).findPlug(CAMERA_STORE_ATTR, False), blob)
+        modifier.doIt()
+        if self.use_project_file:
+            ensure_dir(os.path.dirname(self.project_path()))
+            with open(self.project_path(), "w") as f:
+                f.write(blob)
+
+    def add(self, camera, state):
+        """添加快照并返回名称"""
+        index = len(self.snapshots) + 1
+        while f"{camera}_Snapshot{index}" in self.snapshots:
+            index += 1
+        name = f"{camera}_Snapshot{index}"
+        self.snapshots[name] = {"camera": camera, "state": state}
+        self.save()
+        return name
+
+    def remove(self, names):
+        """删除快照"""
+        for name in names:
+            self.snapshots.pop(name, None)
+        self.save()
+
+    def invalidate(self):
+        """标记快照需要重新读取"""
+        self.loaded_scene = None
+
+    def get(self, name):
+        """按名称获取快照"""
+        return self.snapshots.get(name)
+
+    def names(self):
+        """按保存顺序返回快照名称"""
+        return list(self.snapshots)
+
+def camera_snapshot_store():
+    """获取共享的相机快照存储"""
+    global CAMERA_SNAPSHOTS
+    if CAMERA_SNAPSHOTS is None:
+        CAMERA_SNAPSHOTS = CameraSnapshotStore()
+    return CAMERA_SNAPSHOTS
+
+def invalidate_camera_snapshots():
+    """场景打开或新建后让快照存储重新读取，同名场景重新打开也会刷新"""
+    if CAMERA_SNAPSHOTS is not None:
+        CAMERA_SNAPSHOTS.invalidate()
+
+SCENE_OPEN_HANDLERS.append(invalidate_camera_snapshots)
+
+def camera_state_plugs(camera):
+    """获取相机变换节点和形状节点上需要保存的属性插头，相机不存在时返回None"""
+    sel = om2.MSelectionList()
+    try:
+        sel.add(camera)
+        shape = om2.MDagPath(sel.getDagPath(0)).extendToShape()
+    except RuntimeError:
+        return None
+    if not shape.hasFn(om2.MFn.kCamera): return None
+    plugs = {}
+    for key, node, attrs in (("transform", sel.getDependNode(0), CAMERA_TRANSFORM_ATTRS),
+                             ("shape", shape.node(), CAMERA_SHAPE_ATTRS)):
+        fn = om2.MFnDependencyNode(node)
+        plugs[key] = {attr: fn.findPlug(attr, False) for attr in attrs}
+    return plugs
+
+def capture_camera_state(camera):
+    """通过API读取相机完整状态，数值为内部单位"""
+    plugs = camera_state_plugs(camera)
+    if plugs is None: return None
+    state = {}
+    for key, attrs in plugs.items():
+        state[key] = {}
+        for attr, plug in attrs.items():
+            if plug.isCompound:
+                state[key][attr] = [plug.child(c).asDouble() for c in range(plug.numChildren())]
+            elif attr in CAMERA_INT_ATTRS:
+                state[key][attr] = plug.asInt()
+            else:
+                state[key][attr] = plug.asDouble()
+    return state
+
+def camera_states_modifier(snapshots):
+    """把多个相机快照的属性写入一个MDGModifier，返回修改器和涉及的相机"""
+    modifier = om2.MDGModifier()
+    restored = []
+    for snapshot in snapshots:
+        camera = snapshot["camera"]
+        plugs = camera_state_plugs(camera)
+        if plugs is None: continue
+        for key, attrs in plugs.items():
+            for attr, plug in attrs.items():
+                value = snapshot["state"].get(key, {}).get(attr)
+                if value is None: continue
+                if isinstance(value, list):
+                    for c, v in enumerate(value):
+                        modifier.newPlugValueDouble(plug.child(c), float(v))
+                elif attr in CAMERA_INT_ATTRS:
+                    modifier.newPlugValueInt(plug, int(value))
+                else:
+                    modifier.newPlugValueDouble(plug, float(value))
+        restored.append(camera)
+    return modifier, restored
+
+def apply_camera_states(snapshots):
+    """用一个MDGModifier恢复多个相机快照，作为一步可撤销操作提交"""
+    modifier, restored = camera_states_modifier(snapshots)
+    commit_modifier(modifier)
+    return restored
+
+def save_camera_snapshot(store, list_widget):
     """保存相机快照"""
     cam = cmds.ls(selection=True, type="transform")
     if not cam: return
     cam = cam[0]
-    shape = cmds.listRelatives(cam, shapes=True, type="camera")
-    if not shape: return
-    shape = shape[0]
+    state = capture_camera_state(cam)
+    if state is None: return
+    if store.ensure_loaded():
+        populate_snapshot_list(store, list_widget)
+    list_widget.addItem(store.add(cam, state))
 
-    data = {
-        "translate": cmds.getAttr(cam + ".translate")[0],
-        "rotate": cmds.getAttr(cam + ".rotate")[0],
-        "focalLength": cmds.getAttr(shape + ".focalLength")
-    }
-    snapshot_name = f"{cam}_Snapshot{len(snapshot_dict)+1}"
-    snapshot_dict[snapshot_name] = (cam, data)
-    list_widget.addItem(snapshot_name)
-
-def restore_camera_snapshot(snapshot_dict, list_widget):
-    """恢复相机快照"""
-    item = list_widget.currentItem()
-    if not item: return
-    name = item.text()
-    if name not in snapshot_dict: return
-    cam, data = snapshot_dict[name]
-    if not cmds.objExists(cam): return
-    cmds.setAttr(cam + ".translate", *data["translate"], type="double3")
-    cmds.setAttr(cam + ".rotate", *data["rotate"], type="double3")
-    shape = cmds.listRelatives(cam, shapes=True, type="camera")[0]
-    cmds.setAttr(shape + ".focalLength", data["focalLength"])
-    cmds.select(cam)
-
-def delete_camera_snapshot(snapshot_dict, list_widget):
-    """删除相机快照"""
-    item = list_widget.currentItem()
-    if not item: return
-    name = item.text()
-    if name in snapshot_dict: del snapshot_dict[name]
-    list_widget.takeItem(list_widget.currentRow())
+def selected_snapshot_names(list_widget):
+    """获取列表中选中的快照名称"""
+    return [item.text() for item in list_widget.selectedItems()]
+
+def reload_selected_snapshots(store, list_widget):
+    """场景变化后重新读取快照并保留仍然存在的选择，返回要操作的快照名称"""
+    names = selected_snapshot_names(list_widget)
+    if not store.ensure_loaded(): return names
+    populate_snapshot_list(store, list_widget)
+    kept = [name for name in names if store.get(name)]
+    for i in range(list_widget.count()):
+        list_widget.item(i).setSelected(list_widget.item(i).text() in kept)
+    if len(kept) < len(names):
+        cmds.warning(f"Snapshots reloaded for the current scene; {len(names) - len(kept)} selected snapshot(s) no longer exist")
+    return kept
+
+def restore_camera_snapshot(store, list_widget):
+    """恢复选中的相机快照"""
+    names = reload_selected_snapshots(store, list_widget)
+    if not names: return
+    snapshots = list(filter(None, (store.get(name) for name in names)))
+    restored = apply_camera_states(snapshots)
+    if restored:
+        cmds.select(restored)
+
+def delete_camera_snapshot(store, list_widget):
+    """删除选中的相机快照"""
+    names = reload_selected_snapshots(store, list_widget)
+    if not names: return
+    store.remove(names)
+    for item in list_widget.selectedItems():
+        list_widget.takeItem(list_widget.row(item))
+
+def populate_snapshot_list(store, list_widget):
+    """用存储中的快照填充列表"""
+    list_widget.clear()
+    list_widget.addItems(store.names())
+
+# ========================
+# 相机动画烘焙
+# ========================
+def euler_to_quaternions(euler, order):
+    """将(N,3)欧拉角数组按旋转顺序转换为(N,4)四元数(w,x,y,z)"""
+    half = euler * 0.5
+    result = np.zeros((len(euler), 4))
+    result[:, 0] = 1.0
+    for axis in CAMERA_ROTATE_ORDERS[order]:
+        i = "xyz".index(axis)
+        q = np.zeros((len(euler), 4))
+        q[:, 0] = np.cos(half[:, i])
+        q[:, 1 + i] = np.sin(half[:, i])
+        result = quaternion_multiply(q, result)
+    return result
+
+def quaternion_multiply(a, b):
+    """批量四元数乘法"""
+    aw, ax, ay, az = a.T
+    bw, bx, by, bz = b.T
+    return np.stack([aw * bw - ax * bx - ay * by - az * bz,
+                     aw * bx + ax * bw + ay * bz - az * by,
+                     aw * by - ax * bz + ay * bw + az * bx,
+                     aw * bz + ax * by - ay * bx + az * bw], axis=1)
+
+def quaternions_to_euler(q, order):
+    """将(N,4)四元数按旋转顺序转换回欧拉角"""
+    w, x, y, z = q.T
+    m = np.empty((len(q), 3, 3))
+    m[:, 0, 0], m[:, 0, 1], m[:, 0, 2] = 1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)
+    m[:, 1, 0], m[:, 1, 1], m[:, 1, 2] = 2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)
+    m[:, 2, 0], m[:, 2, 1], m[:, 2, 2] = 2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)
+    i, j, k = ("xyz".index(a) for a in CAMERA_ROTATE_ORDERS[order])
+    sign = 1.0 if (j - i) % 3 == 1 else -1.0
+    euler = np.empty((len(q), 3))
+    euler[:, j] = np.arcsin(np.clip(-sign * m[:, k, i], -1.0, 1.0))
+    euler[:, i] = np.arctan2(sign * m[:, k, j], m[:, k, k])
+    euler[:, k] = np.arctan2(sign * m[:, j, i], m[:, i, i])
+    return euler
+
+def closest_euler(euler, order, start):
+    """逐帧在两组等价欧拉解中选择与上一帧最连续的一组，避免翻转"""
+    i, j, k = ("xyz".index(a) for a in CAMERA_ROTATE_ORDERS[order])
+    alternate = euler.copy()
+    alternate[:, i] += np.pi
+    alternate[:, j] = np.pi - alternate[:, j]
+    alternate[:, k] += np.pi
+    two_pi = 2 * np.pi
+    result = np.empty_like(euler)
+    previous = np.asarray(start, dtype=float)
+    for frame in range(len(euler)):
+        best = None
+        for candidate in (euler[frame], alternate[frame]):
+            candidate = candidate + np.round((previous - candidate) / two_pi) * two_pi
+            if best is None or np.abs(candidate - previous).sum() < np.abs(best - previous).sum():
+                best = candidate
+        result[frame] = previous = best
+    return result
+
+def slerp(q0, q1, t):
+    """批量球面线性插值"""
+    dot = np.sum(q0 * q1, axis=1)
+    q1 = np.where(dot[:, None] < 0.0, -q1, q1)
+    dot = np.abs(dot)
+    omega = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    linear = sin_omega < 1e-6
+    safe = np.where(linear, 1.0, sin_omega)
+    w0 = np.where(linear, 1.0 - t, np.sin((1.0 - t) * omega) / safe)
+    w1 = np.where(linear, t, np.sin(t * omega) / safe)
+    result = q0 * w0[:, None] + q1 * w1[:, None]
+    return result / np.linalg.norm(result, axis=1)[:, None]
+
+def interpolate_camera_snapshots(snapshots, frame_count, easing="Ease In Out"):
+    """一次性计算所有帧的相机通道值，返回{(节点类型, 属性): (帧数, 通道数)数组}"""
+    keys = np.linspace(0.0, frame_count - 1.0, len(snapshots))
+    frames = np.arange(frame_count, dtype=float)
+    seg = np.clip(np.searchsorted(keys, frames, side="right") - 1, 0, len(snapshots) - 2)
+    u = BAKE_EASINGS[easing]((frames - keys[seg]) / (keys[seg + 1] - keys[seg]))
+
+    channels = {}
+    for key, attrs in (("transform", CAMERA_TRANSFORM_ATTRS), ("shape", CAMERA_SHAPE_ATTRS)):
+        for attr in attrs:
+            if attr in CAMERA_INT_ATTRS: continue
+            values = np.array([np.atleast_1d(s["state"][key][attr]) for s in snapshots], dtype=float)
+            if np.allclose(values, values[0]): continue
+            if attr == "rotate":
+                order = int(snapshots[0]["state"]["transform"].get("rotateOrder", 0))
+                quats = euler_to_quaternions(values, order)
+                euler = quaternions_to_euler(slerp(quats[seg], quats[seg + 1], u), order)
+                channels[(key, attr)] = closest_euler(euler, order, values[0])
+            else:
+                channels[(key, attr)] = values[seg] + (values[seg + 1] - values[seg]) * u[:, None]
+    return channels
+
+def write_anim_curves(curves, frames):
+    """通过动画API为每个插头一次写入整条曲线，建曲线和写关键帧作为一步可撤销操作提交"""
+    times = om2.MTimeArray([om2.MTime(float(f), om2.MTime.uiUnit()) for f in frames])
+    modifier = om2.MDGModifier()
+    keyed = []
+    for plug, values in curves:
+        existing = oma2.MAnimUtil.findAnimation(plug)
+        curve = oma2.MFnAnimCurve(existing[0]) if len(existing) else oma2.MFnAnimCurve()
+        if not len(existing):
+            curve.create(plug, modifier=modifier)
+        keyed.append((curve, om2.MDoubleArray([float(v) for v in values])))
+    changes = []
+
+    def redo():
+        modifier.doIt()
+        change = oma2.MAnimCurveChange()
+        for curve, values in keyed:
+            curve.addKeys(times, values, oma2.MFnAnimCurve.kTangentLinear, oma2.MFnAnimCurve.kTangentLinear, False, change)
+        changes.append(change)
+
+    def undo():
+        changes.pop().undoIt()
+        modifier.undoIt()
+
+    commit_undoable(redo, undo)
+
+def bake_camera_snapshots(snapshots, start_frame=1, frame_count=120, easing="Ease In Out", loop=False):
+    """将多个快照插值烘焙到第一个快照的相机上"""
+    if np is None:
+        cmds.warning("NumPy is required to bake camera snapshots")
+        return 0
+    snapshots = list(snapshots) + ([snapshots[0]] if loop and snapshots else [])
+    if len(snapshots) < 2:
+        cmds.warning("Select at least two snapshots to bake")
+        return 0
+    camera = snapshots[0]["camera"]
+    plugs = camera_state_plugs(camera) if cmds.objExists(camera) else None
+    if plugs is None:
+        cmds.warning(f"Camera {camera} no longer exists")
+        return 0
+    channels = interpolate_camera_snapshots(snapshots, frame_count, easing)
+    curves = []
+    for (key, attr), values in channels.items():
+        plug = plugs[key][attr]
+        if plug.isCompound:
+            curves.extend((plug.child(c), values[:, c]) for c in range(values.shape[1]))
+        else:
+            curves.append((plug, values[:, 0]))
+    write_anim_curves(curves, start_frame + np.arange(frame_count))
+    return len(curves) * frame_count
+
+def bake_selected_snapshots(store, list_widget, start_frame, frame_count, easing, loop):
+    """按列表顺序烘焙选中的快照"""
+    selected = set(selected_snapshot_names(list_widget))
+    names = [list_widget.item(i).text() for i in range(list_widget.count()) if list_widget.item(i).text() in selected]
+    return bake_camera_snapshots([store.get(n) for n in names if store.get(n)], start_frame, frame_count, easing, loop)
+
+# ========================
+# 快照预览
+# ========================
+def snapshot_preview_path(snapshot):
+    """按相机状态、场景文件的路径与修改时间和未保存修改的标记生成预览缓存路径"""
+    scene = cmds.file(query=True, sceneName=True) or ""
+    mtime = os.path.getmtime(scene) if scene and os.path.exists(scene) else 0
+    key = json.dumps([scene, mtime, scene_change_token(), snapshot["camera"], snapshot["state"]], sort_keys=True)
+    return os.path.join(PREVIEW_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+def stale_snapshot_previews(store):
+    """返回缓存中缺失或已过期的快照预览"""
+    stale = []
+    for name in store.names():
+        path = snapshot_preview_path(store.get(name))
+        if not os.path.exists(path):
+            stale.append((name, path))
+        else:
+            touch_cache_file(path)
+    return stale
+
+def ensure_preview_panel():
+    """创建用于离屏拍屏的隐藏模型面板"""
+    if cmds.modelPanel(PREVIEW_PANEL, exists=True): return PREVIEW_PANEL
+    if cmds.window(PREVIEW_WINDOW, exists=True):
+        cmds.deleteUI(PREVIEW_WINDOW)
+    cmds.window(PREVIEW_WINDOW, widthHeight=PREVIEW_SIZE)
+    layout = cmds.paneLayout()
+    cmds.modelPanel(PREVIEW_PANEL, parent=layout, menuBarVisible=False)
+    cmds.modelEditor(PREVIEW_PANEL, edit=True, displayAppearance="smoothShaded", grid=False, headsUpDisplay=False)
+    return PREVIEW_PANEL
+
+def capture_snapshot_preview(snapshot, path):
+    """把快照临时应用到相机上做一帧低分辨率离屏拍屏，然后恢复相机
+
+    临时修改不进入撤销队列，也不改变场景的修改状态和修改计数。
+    """
+    global SCENE_MOD_COUNTER
+    camera = snapshot["camera"]
+    if not cmds.objExists(camera): return False
+    panel = ensure_preview_panel()
+    modified, counter = cmds.file(query=True, modified=True), SCENE_MOD_COUNTER
+    modifier, _ = camera_states_modifier([snapshot])
+    modifier.doIt()
+    try:
+        cmds.modelEditor(panel, edit=True, camera=camera)
+        ensure_dir(PREVIEW_DIR)
+        cmds.playblast(frame=cmds.currentTime(query=True), format="image", compression="png", completeFilename=path,
+                       widthHeight=PREVIEW_SIZE, percent=100, viewer=False, showOrnaments=False, offScreen=True,
+                       forceOverwrite=True, editorPanelName=panel)
+    finally:
+        modifier.undoIt()
+        SCENE_MOD_COUNTER = counter
+        if not modified:
+            cmds.file(modified=False)
+    prune_cache_dir(PREVIEW_DIR, PREVIEW_CACHE_MAX_BYTES)
+    return os.path.exists(path)
+
+class SnapshotPreviewQueue(object):
+    """在Maya空闲时逐个生成快照预览"""
+    def __init__(self, on_captured=None):
+        self.queue = deque()
+        self.job = None
+        self.on_captured = on_captured
+
+    def schedule(self, store):
+        """只为过期的快照排队生成预览，返回排队数量"""
+        self.queue = deque((name, store.get(name), path) for name, path in stale_snapshot_previews(store))
+        if self.queue and self.job is None:
+            self.job = cmds.scriptJob(idleEvent=self.process)
+        return len(self.queue)
+
+    def process(self):
+        """每次空闲只处理一个快照，避免阻塞交互"""
+        if not self.queue:
+            self.stop()
+            return
+        name, snapshot, path = self.queue.popleft()
+        try:
+            ok = capture_snapshot_preview(snapshot, path)
+        except RuntimeError as e:
+            cmds.warning(f"Failed to capture preview for {name}: {str(e)}")
+            ok = False
+        if self.on_captured:
+            self.on_captured(name, path if ok else None)
+        if not self.queue:
+            self.stop()
+
+    def stop(self):
+        """停止空闲任务"""
+        self.queue.clear()
+        if self.job is not None:
+            maya.utils.executeDeferred(cmds.scriptJob, kill=self.job, force=True)
+            self.job = None
 
 # ========================
 # 灯光工具函数
@@ -527,6 +3627,227 @@ def open_arnold_render_view():
     """打开Arnold渲染视图"""
     mel.eval("RenderGlobalsWindow;")
 
+# ========================
+# 视口性能模式
+# ========================
+class FrameTimeMonitor(object):
+    """通过模型面板的绘制前后回调测量视口帧时间和绘制时间
+
+    帧时间是同一面板相邻两次绘制结束的间隔，包含绘制之外的求值和事件处理；
+    两帧之间空闲过久时视口并未连续绘制，这一帧的帧时间取绘制时间。
+    """
+    def __init__(self):
+        self.panels = []
+        self.callback_ids = []
+        self.starts = {}
+        self.last_post = {}
+        self.samples = []
+        self.draw_samples = []
+
+    def on_pre_render(self, panel, client_data=None):
+        self.starts[panel] = time.perf_counter()
+
+    def on_post_render(self, panel, client_data=None):
+        now = time.perf_counter()
+        start = self.starts.pop(panel, None)
+        last, self.last_post[panel] = self.last_post.get(panel), now
+        if start is None: return
+        draw = now - start
+        continuous = last is not None and (start - last) * 1000.0 <= VIEWPORT_PERF_IDLE_GAP_MS
+        self.samples.append(((now - last) if continuous else draw) * 1000.0)
+        self.draw_samples.append(draw * 1000.0)
+
+    def watch(self):
+        """为当前的模型面板注册回调，面板没有变化时不做任何事"""
+        panels = cmds.getPanel(type="modelPanel") or []
+        if panels == self.panels: return
+        self.stop()
+        self.panels = panels
+        for panel in panels:
+            try:
+                self.callback_ids.append(omui2.MUiMessage.add3dViewPreRenderMsgCallback(panel, self.on_pre_render))
+                self.callback_ids.append(omui2.MUiMessage.add3dViewPostRenderMsgCallback(panel, self.on_post_render))
+            except RuntimeError:
+                # 面板还没有创建视图
+                pass
+
+    def stop(self):
+        """移除全部回调"""
+        for callback_id in self.callback_ids:
+            try:
+                om2.MMessage.removeCallback(callback_id)
+            except RuntimeError:
+                pass
+        self.panels, self.callback_ids = [], []
+        self.starts.clear()
+        self.last_post.clear()
+
+    def take(self):
+        """取出上次调用以来帧时间和绘制时间的中位数(毫秒)，帧数太少(视口空闲)时返回(None, None)"""
+        samples, self.samples = sorted(self.samples), []
+        draws, self.draw_samples = sorted(self.draw_samples), []
+        if len(samples) < VIEWPORT_PERF_MIN_FRAMES: return None, None
+        return samples[len(samples) // 2], draws[len(draws) // 2]
+
+def viewport_managed_settings():
+    """性能模式会修改的全局属性和面板选项"""
+    attrs = sorted({attr for level in VIEWPORT_PERF_LEVELS for attr in level["globals"]})
+    flags = sorted({flag for level in VIEWPORT_PERF_LEVELS for flag in level["editor"]})
+    return attrs, flags
+
+def capture_viewport_settings():
+    """记录性能模式会修改的全部视口设置"""
+    attrs, flags = viewport_managed_settings()
+    return {
+        "globals": {attr: cmds.getAttr(f"hardwareRenderingGlobals.{attr}") for attr in attrs},
+        "editors": {panel: {flag: cmds.modelEditor(panel, query=True, **{flag: True}) for flag in flags}
+                    for panel in cmds.getPanel(type="modelPanel") or []},
+        "smooth_mesh": {}
+    }
+
+def set_smooth_mesh_preview(snapshot, enabled):
+    """关闭网格的平滑预览并记录原值，或恢复记录的原值，通过一个MDGModifier批量写入"""
+    modifier, saved = om2.MDGModifier(), snapshot["smooth_mesh"]
+    if enabled:
+        for handle, value in saved.values():
+            if handle.isValid():
+                modifier.newPlugValueInt(om2.MFnDependencyNode(handle.object()).findPlug("displaySmoothMesh", False), value)
+        saved.clear()
+    else:
+        it = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kMesh)
+        while not it.isDone():
+            obj = it.getPath().node()
+            plug = om2.MFnDependencyNode(obj).findPlug("displaySmoothMesh", False)
+            value = plug.asInt()
+            if value:
+                handle = om2.MObjectHandle(obj)
+                saved.setdefault(handle.hashCode(), (handle, value))
+                modifier.newPlugValueInt(plug, 0)
+            it.next()
+    modifier.doIt()
+
+def apply_viewport_level(snapshot, level):
+    """把视口设置成快照叠加前level级降级设置的结果，level为0时精确恢复快照
+
+    写入不进入撤销队列，也不改变场景的修改状态和修改计数。
+    """
+    global SCENE_MOD_COUNTER
+    values, editor, smooth_off = dict(snapshot["globals"]), {}, False
+    for settings in VIEWPORT_PERF_LEVELS[:level]:
+        values.update(settings["globals"])
+        editor.update(settings["editor"])
+        smooth_off = smooth_off or settings.get("smooth_mesh_off", False)
+    undo_on = cmds.undoInfo(query=True, state=True)
+    modified, counter = cmds.file(query=True, modified=True), SCENE_MOD_COUNTER
+    if undo_on:
+        cmds.undoInfo(stateWithoutFlush=False)
+    try:
+        for attr, value in values.items():
+            cmds.setAttr(f"hardwareRenderingGlobals.{attr}", value)
+        for panel, original in snapshot["editors"].items():
+            if cmds.modelEditor(panel, exists=True):
+                cmds.modelEditor(panel, edit=True, **dict(original, **editor))
+        if smooth_off or snapshot["smooth_mesh"]:
+            set_smooth_mesh_preview(snapshot, not smooth_off)
+    finally:
+        if undo_on:
+            cmds.undoInfo(stateWithoutFlush=True)
+        SCENE_MOD_COUNTER = counter
+        if not modified:
+            cmds.file(modified=False)
+
+class ViewportPerformanceMode(object):
+    """按实测帧时间逐级降低视口质量，关闭时恢复进入前的设置"""
+    def __init__(self, target_fps=VIEWPORT_PERF_TARGET_FPS):
+        self.target_fps = target_fps
+        self.snapshot = capture_viewport_settings()
+        self.level = 0
+        self.slow = self.fast = 0
+
+    def set_level(self, level):
+        """切换到指定的降级级别"""
+        level = max(0, min(level, len(VIEWPORT_PERF_LEVELS)))
+        if level != self.level:
+            apply_viewport_level(self.snapshot, level)
+            self.level = level
+        return level
+
+    def adapt(self, frame_ms):
+        """每个检测周期调用一次：连续过慢时降一级，连续明显够快时升一级"""
+        if frame_ms is None: return self.level
+        target_ms = 1000.0 / self.target_fps
+        self.slow = self.slow + 1 if frame_ms > target_ms else 0
+        self.fast = self.fast + 1 if frame_ms < target_ms * VIEWPORT_PERF_RECOVER_RATIO else 0
+        if self.slow >= VIEWPORT_PERF_SLOW_TICKS:
+            self.slow = 0
+            return self.set_level(self.level + 1)
+        if self.fast >= VIEWPORT_PERF_FAST_TICKS:
+            self.fast = 0
+            return self.set_level(self.level - 1)
+        return self.level
+
+    def defer_global(self, attr, value):
+        """在性能模式期间修改受管理的全局属性：更新快照，当前级别覆盖该属性时返回True"""
+        if attr not in self.snapshot["globals"]: return False
+        self.snapshot["globals"][attr] = value
+        return any(attr in settings["globals"] for settings in VIEWPORT_PERF_LEVELS[:self.level])
+
+    def rebase(self):
+        """打开新场景后重新记录该场景的全局属性并应用当前级别，面板选项沿用原来的记录"""
+        snapshot = capture_viewport_settings()
+        snapshot["editors"] = self.snapshot["editors"]
+        self.snapshot = snapshot
+        apply_viewport_level(self.snapshot, self.level)
+
+    def restore(self):
+        """恢复进入性能模式前的设置"""
+        apply_viewport_level(self.snapshot, 0)
+        self.level = 0
+
+    def before_save(self):
+        """保存前临时恢复原设置，降级的设置不会写入场景文件"""
+        if self.level:
+            apply_viewport_level(self.snapshot, 0)
+
+    def after_save(self):
+        """保存后重新应用当前级别"""
+        if self.level:
+            apply_viewport_level(self.snapshot, self.level)
+
+def enable_viewport_performance(target_fps=VIEWPORT_PERF_TARGET_FPS):
+    """开启视口性能模式"""
+    global VIEWPORT_PERFORMANCE
+    if VIEWPORT_PERFORMANCE is None:
+        VIEWPORT_PERFORMANCE = ViewportPerformanceMode(target_fps)
+    VIEWPORT_PERFORMANCE.target_fps = target_fps
+    return VIEWPORT_PERFORMANCE
+
+def disable_viewport_performance():
+    """关闭视口性能模式并恢复设置"""
+    global VIEWPORT_PERFORMANCE
+    if VIEWPORT_PERFORMANCE is not None:
+        VIEWPORT_PERFORMANCE.restore()
+        VIEWPORT_PERFORMANCE = None
+
+def rebase_viewport_performance():
+    """场景打开后让性能模式改用新场景的设置"""
+    if VIEWPORT_PERFORMANCE is not None:
+        VIEWPORT_PERFORMANCE.rebase()
+
+def viewport_performance_before_save():
+    """保存前让性能模式恢复原设置"""
+    if VIEWPORT_PERFORMANCE is not None:
+        VIEWPORT_PERFORMANCE.before_save()
+
+def viewport_performance_after_save():
+    """保存后让性能模式重新降级"""
+    if VIEWPORT_PERFORMANCE is not None:
+        VIEWPORT_PERFORMANCE.after_save()
+
+SCENE_OPEN_HANDLERS.append(rebase_viewport_performance)
+SCENE_BEFORE_SAVE_HANDLERS.append(viewport_performance_before_save)
+SCENE_AFTER_SAVE_HANDLERS.append(viewport_performance_after_save)
+
 # ========================
 # 更新功能
 # ========================
@@ -539,8 +3860,7 @@ def check_for_updates():
         ctx.check_hostname = False
         ctx.verify_mode = ssl.CERT_NONE
         
-        req = urllib.request.Request(GITHUB_VERSION_URL, headers={"User-Agent": "Maya-PolyHaven-Integration"})
-        with urllib.request.urlopen(req, context=ctx, timeout=TIMEOUT) as resp:
+        with HttpClient(ssl_context=ctx).open(GITHUB_VERSION_URL, timeout=TIMEOUT) as resp:
             if resp.getcode() == 200:
                 latest_version = resp.read().decode("utf-8").strip()
                 cmds.warning(f"Current version: {CURRENT_VERSION}, Latest version: {latest_version}")
@@ -578,8 +3898,25 @@ def check_for_updates():
         )
         return False
 
+def import_installer(client):
+    """获取支持版本化安装的tool_install
+
+    旧的单文件安装目录中的tool_install.py是0.9版安装器，导入时会打开界面且没有install_files，
+    所以只在工具从版本目录运行时导入同目录的安装器，其余情况使用下载的版本。
+    """
+    script_dir = os.path.dirname(LOCAL_SCRIPT_PATH)
+    if os.path.exists(os.path.join(script_dir, INSTALL_MANIFEST)):
+        if script_dir not in sys.path:
+            sys.path.append(script_dir)
+        installer = importlib.import_module("tool_install")
+        if hasattr(installer, "install_files"): return installer
+    installer = types.ModuleType("tool_install")
+    installer.__file__ = os.path.join(script_dir, "tool_install.py")
+    exec(compile(client.read(GITHUB_RAW_URL + "tool_install.py"), installer.__file__, "exec"), installer.__dict__)
+    return installer
+
 def update_tool(*args):
-    """更新工具"""
+    """更新工具：下载的文件安装到新的版本目录后原子切换，不覆盖正在运行的脚本"""
     global modeling_tools_dialog
     try:
         # 使用自定义的SSL上下文设置
@@ -587,46 +3924,30 @@ def update_tool(*args):
         ctx.check_hostname = False
         ctx.verify_mode = ssl.CERT_NONE
         
-        req = urllib.request.Request(GITHUB_SCRIPT_URL, headers={"User-Agent": "Maya-PolyHaven-Integration"})
-        with urllib.request.urlopen(req, context=ctx, timeout=TIMEOUT) as resp:
-            if resp.getcode() == 200:
-                tmp_path = LOCAL_SCRIPT_PATH + ".tmp"
-                with open(tmp_path, "wb") as f:
-                    f.write(resp.read())
-
-                shutil.move(tmp_path, LOCAL_SCRIPT_PATH)
-                
-                cmds.confirmDialog(
-                    title="Update Complete", 
-                    message="Tool updated successfully. UI will restart automatically.",
-                    button=["OK"]
-                )
-                
-                # 关闭当前对话框
-                try:
-                    modeling_tools_dialog.close()
-                    modeling_tools_dialog.deleteLater()
-                except Exception as e:
-                    cmds.warning(f"Error closing dialog: {str(e)}")
-                
-                # 自动重启UI
-                def reload_ui():
-                    time.sleep(0.2)
-                    # 确保脚本所在目录在Python路径中
-                    script_dir = os.path.dirname(LOCAL_SCRIPT_PATH)
-                    if script_dir not in sys.path:
-                        sys.path.append(script_dir)
-                    
-                    # 重新加载模块
-                    module_name = os.path.splitext(os.path.basename(LOCAL_SCRIPT_PATH))[0]
-                    if module_name in sys.modules:
-                        importlib.reload(sys.modules[module_name])
-                    else:
-                        importlib.import_module(module_name)
-                
-                # 在新线程中重启UI，避免阻塞
-                threading.Thread(target=reload_ui).start()
-                return True
+        client = HttpClient(ssl_context=ctx)
+        installer = import_installer(client)
+        latest_version = client.read(GITHUB_VERSION_URL).decode("utf-8").strip()
+        files = {name: client.read(GITHUB_RAW_URL + name) for name in installer.INSTALL_FILES}
+        install_dir = installer.install_files(files, latest_version)
+        # 从旧版单文件位置运行时把该位置换成启动入口，工具架上的import Assistant_tool继续可用
+        installer.write_launcher(os.path.dirname(LOCAL_SCRIPT_PATH))
+        
+        cmds.confirmDialog(
+            title="Update Complete", 
+            message=f"Version {latest_version} installed to {install_dir}. UI will restart automatically.",
+            button=["OK"]
+        )
+        
+        # 关闭当前对话框
+        try:
+            modeling_tools_dialog.close()
+            modeling_tools_dialog.deleteLater()
+        except Exception as e:
+            cmds.warning(f"Error closing dialog: {str(e)}")
+        
+        # 在主线程空闲时从新版本目录重新导入并启动UI
+        maya.utils.executeDeferred(installer.launch)
+        return True
     except urllib.error.URLError as e:
         cmds.warning(f"Error updating tool: {str(e)}")
         cmds.confirmDialog(
@@ -651,6 +3972,52 @@ def maya_main_window():
     ptr = omui.MQtUtil.mainWindow()
     return wrapInstance(int(ptr), QtWidgets.QWidget)
 
+class SliderCoalescer(object):
+    """按固定频率合并滑块更新，只写入最新的值，并统计每次拖动的写入次数"""
+    def __init__(self, name, write_func, interval_ms=SLIDER_UPDATE_INTERVAL_MS):
+        self.name, self.write_func = name, write_func
+        self.pending, self.has_pending = None, False
+        self.ticks = self.writes = 0
+        self.started = None
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def push(self, value):
+        """记录新值；空闲时立即写入，否则等到下一帧"""
+        self.ticks += 1
+        self.pending, self.has_pending = value, True
+        if not self.timer.isActive():
+            self.flush()
+            self.timer.start()
+
+    def flush(self):
+        """写入最新的值，没有新值时停止计时器"""
+        if not self.has_pending:
+            self.timer.stop()
+            return
+        value, self.pending, self.has_pending = self.pending, None, False
+        self.write_func(value)
+        self.writes += 1
+
+    def begin_drag(self):
+        """开始拖动，整个拖动合并为一个撤销块，已在拖动中时不再打开新的撤销块"""
+        if self.started is not None: return
+        self.ticks = self.writes = 0
+        self.started = time.perf_counter()
+        cmds.undoInfo(openChunk=True, chunkName=self.name)
+
+    def end_drag(self):
+        """结束拖动，写入最终值并记录本次拖动的统计"""
+        self.flush()
+        self.timer.stop()
+        if self.started is None:
+            return self.ticks, self.writes
+        cmds.undoInfo(closeChunk=True)
+        record_action(self.name, time.perf_counter() - self.started, {"cmds.setAttr": self.writes, "slider.ticks": self.ticks}, True)
+        self.started = None
+        return self.ticks, self.writes
+
 class ClickableLabel(QtWidgets.QLabel):
     """可点击的标签"""
     clicked = QtCore.Signal()
@@ -660,15 +4027,39 @@ class ClickableLabel(QtWidgets.QLabel):
 
 class ModelingToolsUI(QtWidgets.QDialog):
     """3D助手工具UI"""
-    def __init__(self, parent=maya_main_window()):
-        super(ModelingToolsUI, self).__init__(parent)
+    def __init__(self, parent=None):
+        super(ModelingToolsUI, self).__init__(parent or maya_main_window())
         self.setWindowTitle(f"3D Assistant Tools v{CURRENT_VERSION}")
         self.setFixedWidth(600)
         self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
-        self.camera_snapshots = {}
+        self.camera_snapshots = camera_snapshot_store()
         self.create_widgets()
         self.create_layout()
         self.create_connections()
+        add_scene_callbacks()
+
+    def hideEvent(self, event):
+        """隐藏时结束未完成的滑块拖动，关闭其撤销块，并停止场景统计"""
+        self.end_slider_drags()
+        self.stop_scene_stats()
+        super(ModelingToolsUI, self).hideEvent(event)
+
+    def showEvent(self, event):
+        """重新显示时如果停在统计页则重新建立统计"""
+        super(ModelingToolsUI, self).showEvent(event)
+        if self.tabs.currentWidget() is self.stats_page:
+            self.on_tab_changed(self.tabs.currentIndex())
+
+    def closeEvent(self, event):
+        """关闭时移除场景回调并停止预览任务"""
+        self.end_slider_drags()
+        remove_scene_callbacks()
+        self.preview_queue.stop()
+        self.stop_scene_stats()
+        self.fps_timer.stop()
+        self.frame_monitor.stop()
+        disable_viewport_performance()
+        super(ModelingToolsUI, self).closeEvent(event)
 
     def create_widgets(self):
         """创建UI组件"""
@@ -719,6 +4110,9 @@ class ModelingToolsUI(QtWidgets.QDialog):
         self.hdri_download_btn = QtWidgets.QPushButton("Download and Apply")
         self.hdri_progress = QtWidgets.QProgressBar()
         self.hdri_progress.setRange(0, 100)
+        self.hdri_network_label = QtWidgets.QLabel("No downloads yet")
+        self.hdri_network_label.setStyleSheet("color: gray;")
+        self.hdri_network_label.setWordWrap(True)
 
         # HDRI控制组件
         SLIDER_WIDTH = 300
@@ -739,6 +4133,20 @@ class ModelingToolsUI(QtWidgets.QDialog):
         
         self.hdri_camera_cb = QtWidgets.QCheckBox("Visible to Camera")
         self.hdri_camera_cb.setChecked(True)
+        self.hdri_drag_label = QtWidgets.QLabel("")
+        self.lighting_presets = {}
+        self.list_light_presets = QtWidgets.QListWidget()
+        self.list_light_presets.setFixedHeight(120)
+        self.btn_preset_save = QtWidgets.QPushButton("Save Current")
+        self.btn_preset_activate = QtWidgets.QPushButton("Activate")
+        self.btn_preset_unload = QtWidgets.QPushButton("Unload")
+        self.btn_preset_delete = QtWidgets.QPushButton("Delete")
+        self.hdri_drag_label.setStyleSheet("color: #888888;")
+        self.slider_coalescers = {
+            self.hdri_exposure_slider: SliderCoalescer("Drag HDRI Exposure", lambda v: set_skydome_attr("aiExposure", v)),
+            self.hdri_intensity_slider: SliderCoalescer("Drag HDRI Intensity", lambda v: set_skydome_attr("intensity", v)),
+            self.hdri_rotate_slider: SliderCoalescer("Drag HDRI Rotation", set_skydome_rotation)
+        }
 
         # 建模工具按钮
         self.btn_merge_center = QtWidgets.QPushButton("Merge to Center")
@@ -754,8 +4162,53 @@ class ModelingToolsUI(QtWidgets.QDialog):
         self.btn_separate_objects = QtWidgets.QPushButton("Separate Objects")
         self.btn_combine_objects = QtWidgets.QPushButton("Combine Objects")
         self.btn_detach_faces = QtWidgets.QPushButton("Detach Selected Faces")
+
+        # 批处理组件
+        self.batch_op_combo = QtWidgets.QComboBox()
+        self.batch_op_combo.addItems(list(BATCH_OPS))
+        self.batch_target_combo = QtWidgets.QComboBox()
+        self.batch_target_combo.addItems(BATCH_TARGET_MODES)
+        self.batch_target_edit = QtWidgets.QLineEdit()
+        self.batch_target_edit.setPlaceholderText("Set name or pattern, e.g. prop_*")
+        self.btn_batch_run = QtWidgets.QPushButton("Run Batch")
+        self.label_batch_result = QtWidgets.QLabel("")
+        self.label_batch_result.setStyleSheet("color: #888888;")
+
+        # LOD代理组件
+        self.lod_ratios_edit = QtWidgets.QLineEdit(", ".join(str(r) for r in LOD_RATIOS))
+        self.lod_ratios_edit.setToolTip("Target face ratios, e.g. 0.5, 0.25, 0.1")
+        self.btn_lod_generate = QtWidgets.QPushButton("Generate LODs")
+        self.lod_level_combo = QtWidgets.QComboBox()
+        self.lod_level_combo.addItems(["Full"] + [f"{lod_percent(r)}%" for r in LOD_RATIOS])
+        self.btn_lod_apply = QtWidgets.QPushButton("Switch Display")
+        self.label_lod_status = QtWidgets.QLabel("")
+        self.label_lod_status.setStyleSheet("color: #888888;")
+
+        # 网格健康检查组件
+        self.health_report = {}
+        self.health_tol_spin = QtWidgets.QDoubleSpinBox()
+        self.health_tol_spin.setDecimals(6)
+        self.health_tol_spin.setRange(0.000001, 1.0)
+        self.health_tol_spin.setSingleStep(0.0001)
+        self.health_tol_spin.setValue(HEALTH_TOLERANCE)
+        self.btn_health_scan_sel = QtWidgets.QPushButton("Scan Selection")
+        self.btn_health_scan_scene = QtWidgets.QPushButton("Scan Scene")
+        self.btn_health_sets = QtWidgets.QPushButton("Create Sets")
+        self.btn_health_fix = QtWidgets.QPushButton("Fix Selected Issue")
+        self.tree_health = QtWidgets.QTreeWidget()
+        self.tree_health.setHeaderLabels(["Issue", "Count"])
+        self.tree_health.setFixedHeight(140)
         self.btn_open_hypershade = QtWidgets.QPushButton("Open Hypershade")
+        self.btn_duplicate_textures = QtWidgets.QPushButton("Report Duplicate Textures")
+        self.btn_purge_preview = QtWidgets.QPushButton("Preview Unused Materials")
+        self.btn_purge = QtWidgets.QPushButton("Purge Unused Materials")
+        self.check_purge_legacy = QtWidgets.QCheckBox("Include untagged networks from older versions")
         self.btn_custom_color = QtWidgets.QPushButton("Custom Color")
+        self.id_color_mode_combo = QtWidgets.QComboBox()
+        self.id_color_mode_combo.addItems(ID_COLOR_MODES)
+        self.id_color_seed_spin = QtWidgets.QSpinBox()
+        self.id_color_seed_spin.setRange(0, 99999)
+        self.btn_id_colors = QtWidgets.QPushButton("Assign ID Colors")
 
         # 颜色按钮
         self.color_buttons = []
@@ -768,6 +4221,18 @@ class ModelingToolsUI(QtWidgets.QDialog):
             btn.setToolTip(color["name"])
             self.color_buttons.append(btn)
 
+        # 材质规则组件
+        self.table_rules = QtWidgets.QTableWidget(0, 3)
+        self.table_rules.setHorizontalHeaderLabels(["Match", "Pattern", "Preset / R,G,B"])
+        self.table_rules.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        self.table_rules.setFixedHeight(130)
+        self.btn_rule_add = QtWidgets.QPushButton("Add Rule")
+        self.btn_rule_remove = QtWidgets.QPushButton("Remove Rule")
+        self.btn_rule_load = QtWidgets.QPushButton("Load...")
+        self.btn_rule_save = QtWidgets.QPushButton("Save...")
+        self.btn_rule_preview = QtWidgets.QPushButton("Preview")
+        self.btn_rule_apply = QtWidgets.QPushButton("Apply Rules")
+
         # 透明材质按钮
         self.btn_transparency = QtWidgets.QPushButton("Assign Transparency Material")
         self.btn_select_color_map = QtWidgets.QPushButton("Select Color Map")
@@ -780,6 +4245,15 @@ class ModelingToolsUI(QtWidgets.QDialog):
         self.label_opacity_path.setStyleSheet("color: #888888;")
         self.label_color_path.setWordWrap(True)
         self.label_opacity_path.setWordWrap(True)
+        self.map_widgets = {}
+        for kind in ("color", "opacity"):
+            thumb = QtWidgets.QLabel("No preview")
+            thumb.setFixedSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+            thumb.setAlignment(QtCore.Qt.AlignCenter)
+            thumb.setStyleSheet("border: 1px solid #555555; color: #888888;")
+            recent = QtWidgets.QComboBox()
+            self.map_widgets[kind] = (self.label_color_path if kind == "color" else self.label_opacity_path, thumb, recent)
+        self.refresh_recent_maps()
         
         # 相机按钮
         self.btn_create_persp_cam = QtWidgets.QPushButton("Create Perspective Cam")
@@ -788,15 +4262,86 @@ class ModelingToolsUI(QtWidgets.QDialog):
         self.btn_delete_snapshot = QtWidgets.QPushButton("Delete Snapshot")
         self.list_snapshots = QtWidgets.QListWidget()
         self.list_snapshots.setFixedHeight(180)
+        self.list_snapshots.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.check_snapshot_project = QtWidgets.QCheckBox("Also store in project file")
+        self.bake_start_spin = QtWidgets.QSpinBox()
+        self.bake_start_spin.setRange(-100000, 100000)
+        self.bake_start_spin.setValue(1)
+        self.bake_frames_spin = QtWidgets.QSpinBox()
+        self.bake_frames_spin.setRange(2, 100000)
+        self.bake_frames_spin.setValue(120)
+        self.bake_easing_combo = QtWidgets.QComboBox()
+        self.bake_easing_combo.addItems(list(BAKE_EASINGS))
+        self.check_bake_loop = QtWidgets.QCheckBox("Loop")
+        self.btn_bake_snapshots = QtWidgets.QPushButton("Bake Selected")
+        self.btn_preview_snapshots = QtWidgets.QPushButton("Refresh Previews")
+        self.label_preview_status = QtWidgets.QLabel("")
+        self.label_preview_status.setStyleSheet("color: #888888;")
+        self.grid_snapshot_previews = QtWidgets.QListWidget()
+        self.grid_snapshot_previews.setViewMode(QtWidgets.QListView.IconMode)
+        self.grid_snapshot_previews.setIconSize(QtCore.QSize(*PREVIEW_SIZE))
+        self.grid_snapshot_previews.setResizeMode(QtWidgets.QListView.Adjust)
+        self.grid_snapshot_previews.setMovement(QtWidgets.QListView.Static)
+        self.grid_snapshot_previews.setMinimumHeight(260)
+        self.preview_queue = SnapshotPreviewQueue(self.on_preview_captured)
+        self.preview_items = {}
 
         # 更新按钮
         self.btn_check_updates = QtWidgets.QPushButton("Check for Updates")
         self.btn_update = QtWidgets.QPushButton("Update")
         self.btn_update.setEnabled(False)
+        self.check_viewport_perf = QtWidgets.QCheckBox("Viewport Performance Mode")
+        self.check_viewport_perf.setToolTip("Lower viewport quality step by step while frames are slower than the target")
+        self.viewport_fps_spin = QtWidgets.QSpinBox()
+        self.viewport_fps_spin.setRange(5, 120)
+        self.viewport_fps_spin.setValue(VIEWPORT_PERF_TARGET_FPS)
+        self.viewport_fps_spin.setSuffix(" fps")
+        self.label_viewport_fps = QtWidgets.QLabel("Viewport idle")
+        self.label_viewport_fps.setStyleSheet("color: #888888;")
+        self.frame_monitor = FrameTimeMonitor()
+        self.fps_timer = QtCore.QTimer()
+        self.fps_timer.setInterval(VIEWPORT_PERF_INTERVAL_MS)
         self.label_footer = QtWidgets.QLabel(f"3D Assistant Tools v{CURRENT_VERSION}")
         self.label_footer.setAlignment(QtCore.Qt.AlignCenter)
         self.label_footer.setStyleSheet("color: gray;")
         
+        # 诊断组件
+        self.table_diagnostics = QtWidgets.QTableWidget(0, 7)
+        self.table_diagnostics.setHorizontalHeaderLabels(["Action", "Runs", "Last ms", "Avg ms", "Max ms", "Calls", "Errors"])
+        self.table_diagnostics.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.table_diagnostics.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table_diagnostics.setSortingEnabled(True)
+        self.btn_refresh_diagnostics = QtWidgets.QPushButton("Refresh")
+        self.btn_clear_diagnostics = QtWidgets.QPushButton("Clear")
+        self.btn_export_diagnostics = QtWidgets.QPushButton("Export JSON")
+        self.check_profiler = QtWidgets.QCheckBox("Enable Profiler (times every cmds/mel call)")
+        self.check_profiler.setChecked(PROFILER is not None)
+        self.table_profile_commands = QtWidgets.QTableWidget(0, 5)
+        self.table_profile_commands.setHorizontalHeaderLabels(["Command", "Calls", "Total ms", "Avg ms", "Max ms"])
+        self.table_profile_handlers = QtWidgets.QTableWidget(0, 6)
+        self.table_profile_handlers.setHorizontalHeaderLabels(["Handler", "Type", "Runs", "Total ms", "Avg ms", "Max ms"])
+        for table in (self.table_profile_commands, self.table_profile_handlers):
+            table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+            table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+            table.setSortingEnabled(True)
+        self.btn_profiler_reset = QtWidgets.QPushButton("Reset")
+        self.btn_profiler_export_json = QtWidgets.QPushButton("Export JSON")
+        self.btn_profiler_export_trace = QtWidgets.QPushButton("Export Chrome Trace")
+        self.profiler_session = PROFILER
+
+        # 场景统计组件
+        self.label_scene_stats = QtWidgets.QLabel("Scene not indexed yet")
+        self.table_scene_stats = QtWidgets.QTableWidget(0, len(SCENE_STATS_COLUMNS) + 1)
+        self.table_scene_stats.setHorizontalHeaderLabels(["Object"] + [label for _, label in SCENE_STATS_COLUMNS])
+        self.table_scene_stats.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.table_scene_stats.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table_scene_stats.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table_scene_stats.setSortingEnabled(True)
+        self.btn_stats_rebuild = QtWidgets.QPushButton("Rebuild Index")
+        self.btn_stats_select = QtWidgets.QPushButton("Select")
+        self.stats_timer = QtCore.QTimer()
+        self.stats_timer.setInterval(1000)
+
         # 几何体按钮
         self.geometry_buttons = []
         geometry_types = [
@@ -814,14 +4359,50 @@ class ModelingToolsUI(QtWidgets.QDialog):
             btn.setToolTip(f"Create {geom_name}")
             btn.setIcon(QtGui.QIcon(icon_path))
             btn.setIconSize(QtCore.QSize(32, 32))
+            btn.setProperty("geometry_name", geom_name)
+            btn.setProperty("geometry_cmd", mel_cmd)
             self.geometry_buttons.append(btn)
 
+        # 实例散布组件
+        self.check_scatter = QtWidgets.QCheckBox("Scatter Mode")
+        self.check_scatter.setToolTip("Geometry buttons scatter instances over the selected meshes")
+        self.scatter_count_spin = QtWidgets.QSpinBox()
+        self.scatter_count_spin.setRange(1, SCATTER_MAX_COUNT)
+        self.scatter_count_spin.setValue(500)
+        self.scatter_sampling_combo = QtWidgets.QComboBox()
+        self.scatter_sampling_combo.addItems(SCATTER_SAMPLING_MODES)
+        self.scatter_target_combo = QtWidgets.QComboBox()
+        self.scatter_target_combo.addItems(SCATTER_TARGET_MODES)
+        self.scatter_seed_spin = QtWidgets.QSpinBox()
+        self.scatter_seed_spin.setRange(0, 99999)
+        self.scatter_distance_spin = QtWidgets.QDoubleSpinBox()
+        self.scatter_distance_spin.setRange(0.0, 10000.0)
+        self.scatter_distance_spin.setDecimals(3)
+        self.scatter_distance_spin.setSpecialValueText("Auto")
+        self.scatter_scale_min_spin = QtWidgets.QDoubleSpinBox()
+        self.scatter_scale_max_spin = QtWidgets.QDoubleSpinBox()
+        for spin in (self.scatter_scale_min_spin, self.scatter_scale_max_spin):
+            spin.setRange(0.01, 100.0)
+            spin.setSingleStep(0.1)
+            spin.setValue(1.0)
+        self.check_scatter_rotate = QtWidgets.QCheckBox("Random Rotation")
+        self.check_scatter_rotate.setChecked(True)
+        self.check_scatter_align = QtWidgets.QCheckBox("Align to Normal")
+        self.btn_scatter_selected = QtWidgets.QPushButton("Scatter Selected Mesh")
+        self.btn_scatter_selected.setToolTip("First selected mesh is instanced over the other selected meshes")
+
     def create_layout(self):
         """布局UI组件"""
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.setSpacing(6) 
         main_layout.addWidget(self.banner_label)
         main_layout.addWidget(self.tabs)
+
+        viewport_layout = QtWidgets.QHBoxLayout()
+        viewport_layout.addWidget(self.check_viewport_perf)
+        viewport_layout.addWidget(self.viewport_fps_spin)
+        viewport_layout.addWidget(self.label_viewport_fps, 1)
+        main_layout.addLayout(viewport_layout)
         
         update_layout = QtWidgets.QHBoxLayout()
         update_layout.addWidget(self.btn_check_updates)
@@ -840,6 +4421,28 @@ class ModelingToolsUI(QtWidgets.QDialog):
             geometry_row.addWidget(btn)
         modeling_layout.addLayout(geometry_row)
 
+        scatter_group = QtWidgets.QGroupBox("Scatter")
+        scatter_layout = QtWidgets.QGridLayout(scatter_group)
+        scatter_layout.addWidget(self.check_scatter, 0, 0)
+        scatter_layout.addWidget(QtWidgets.QLabel("Count:"), 0, 1)
+        scatter_layout.addWidget(self.scatter_count_spin, 0, 2)
+        scatter_layout.addWidget(self.scatter_target_combo, 0, 3)
+        scatter_layout.addWidget(QtWidgets.QLabel("Sampling:"), 1, 0)
+        scatter_layout.addWidget(self.scatter_sampling_combo, 1, 1)
+        scatter_layout.addWidget(QtWidgets.QLabel("Seed:"), 1, 2)
+        scatter_layout.addWidget(self.scatter_seed_spin, 1, 3)
+        scatter_layout.addWidget(QtWidgets.QLabel("Min Distance:"), 2, 0)
+        scatter_layout.addWidget(self.scatter_distance_spin, 2, 1)
+        scatter_layout.addWidget(QtWidgets.QLabel("Scale:"), 2, 2)
+        scale_row = QtWidgets.QHBoxLayout()
+        scale_row.addWidget(self.scatter_scale_min_spin)
+        scale_row.addWidget(self.scatter_scale_max_spin)
+        scatter_layout.addLayout(scale_row, 2, 3)
+        scatter_layout.addWidget(self.check_scatter_rotate, 3, 0)
+        scatter_layout.addWidget(self.check_scatter_align, 3, 1)
+        scatter_layout.addWidget(self.btn_scatter_selected, 3, 2, 1, 2)
+        modeling_layout.addWidget(scatter_group)
+
         def create_group(title, widgets):
             """创建带标题的组件组"""
             group = QtWidgets.QGroupBox(title)
@@ -863,6 +4466,43 @@ class ModelingToolsUI(QtWidgets.QDialog):
         modeling_layout.addWidget(create_group("Object Operations", [
             self.btn_separate_objects, self.btn_combine_objects, self.btn_detach_faces
         ]))
+
+        batch_group = QtWidgets.QGroupBox("Batch")
+        batch_layout = QtWidgets.QGridLayout(batch_group)
+        batch_layout.addWidget(QtWidgets.QLabel("Operation:"), 0, 0)
+        batch_layout.addWidget(self.batch_op_combo, 0, 1)
+        batch_layout.addWidget(QtWidgets.QLabel("Targets:"), 0, 2)
+        batch_layout.addWidget(self.batch_target_combo, 0, 3)
+        batch_layout.addWidget(self.batch_target_edit, 1, 0, 1, 3)
+        batch_layout.addWidget(self.btn_batch_run, 1, 3)
+        batch_layout.addWidget(self.label_batch_result, 2, 0, 1, 4)
+        modeling_layout.addWidget(batch_group)
+
+        lod_group = QtWidgets.QGroupBox("LOD Proxies")
+        lod_layout = QtWidgets.QGridLayout(lod_group)
+        lod_layout.addWidget(QtWidgets.QLabel("Ratios:"), 0, 0)
+        lod_layout.addWidget(self.lod_ratios_edit, 0, 1, 1, 2)
+        lod_layout.addWidget(self.btn_lod_generate, 0, 3)
+        lod_layout.addWidget(QtWidgets.QLabel("Display:"), 1, 0)
+        lod_layout.addWidget(self.lod_level_combo, 1, 1, 1, 2)
+        lod_layout.addWidget(self.btn_lod_apply, 1, 3)
+        lod_layout.addWidget(self.label_lod_status, 2, 0, 1, 4)
+        modeling_layout.addWidget(lod_group)
+
+        health_group = QtWidgets.QGroupBox("Mesh Health")
+        health_layout = QtWidgets.QVBoxLayout(health_group)
+        health_row = QtWidgets.QHBoxLayout()
+        health_row.addWidget(QtWidgets.QLabel("Tolerance:"))
+        health_row.addWidget(self.health_tol_spin)
+        health_row.addWidget(self.btn_health_scan_sel)
+        health_row.addWidget(self.btn_health_scan_scene)
+        health_layout.addLayout(health_row)
+        health_layout.addWidget(self.tree_health)
+        health_btn_row = QtWidgets.QHBoxLayout()
+        health_btn_row.addWidget(self.btn_health_sets)
+        health_btn_row.addWidget(self.btn_health_fix)
+        health_layout.addLayout(health_btn_row)
+        modeling_layout.addWidget(health_group)
         modeling_layout.addStretch()
  
         # 材质页布局
@@ -883,6 +4523,13 @@ class ModelingToolsUI(QtWidgets.QDialog):
         tip_label.setAlignment(QtCore.Qt.AlignCenter)
         color_layout.addWidget(tip_label)
         color_layout.addWidget(self.btn_custom_color)
+        id_color_layout = QtWidgets.QHBoxLayout()
+        id_color_layout.addWidget(QtWidgets.QLabel("ID Colors:"))
+        id_color_layout.addWidget(self.id_color_mode_combo)
+        id_color_layout.addWidget(QtWidgets.QLabel("Seed:"))
+        id_color_layout.addWidget(self.id_color_seed_spin)
+        id_color_layout.addWidget(self.btn_id_colors)
+        color_layout.addLayout(id_color_layout)
         color_group.setLayout(color_layout)
         mat_layout.addWidget(color_group)
 
@@ -891,7 +4538,7 @@ class ModelingToolsUI(QtWidgets.QDialog):
  
         color_map_layout = QtWidgets.QVBoxLayout()
         color_map_layout.addWidget(QtWidgets.QLabel("Color Map:"))
-        color_map_layout.addWidget(self.label_color_path)
+        color_map_layout.addLayout(self.create_map_preview_layout("color"))
         color_map_layout.addWidget(self.btn_select_color_map)
         transparency_layout.addLayout(color_map_layout)
 
@@ -899,7 +4546,7 @@ class ModelingToolsUI(QtWidgets.QDialog):
   
         opacity_map_layout = QtWidgets.QVBoxLayout()
         opacity_map_layout.addWidget(QtWidgets.QLabel("Opacity Map:"))
-        opacity_map_layout.addWidget(self.label_opacity_path)
+        opacity_map_layout.addLayout(self.create_map_preview_layout("opacity"))
         opacity_map_layout.addWidget(self.btn_select_opacity_map)
         transparency_layout.addLayout(opacity_map_layout)
 
@@ -908,16 +4555,32 @@ class ModelingToolsUI(QtWidgets.QDialog):
         transparency_layout.addWidget(self.btn_transparency)
         
         mat_layout.addWidget(transparency_group)
+
+        rules_group = QtWidgets.QGroupBox("Material Rules")
+        rules_layout = QtWidgets.QVBoxLayout(rules_group)
+        rules_layout.addWidget(self.table_rules)
+        rules_btn_layout = QtWidgets.QHBoxLayout()
+        for btn in (self.btn_rule_add, self.btn_rule_remove, self.btn_rule_load, self.btn_rule_save,
+                    self.btn_rule_preview, self.btn_rule_apply):
+            rules_btn_layout.addWidget(btn)
+        rules_layout.addLayout(rules_btn_layout)
+        mat_layout.addWidget(rules_group)
         
         util_group = QtWidgets.QGroupBox("Tools")
         util_layout = QtWidgets.QVBoxLayout()
         util_layout.addWidget(self.btn_open_hypershade)
+        util_layout.addWidget(self.btn_duplicate_textures)
+        purge_layout = QtWidgets.QHBoxLayout()
+        purge_layout.addWidget(self.btn_purge_preview)
+        purge_layout.addWidget(self.btn_purge)
+        util_layout.addLayout(purge_layout)
+        util_layout.addWidget(self.check_purge_legacy)
         util_group.setLayout(util_layout)
         mat_layout.addWidget(util_group)
         mat_layout.addStretch()
 
         # 相机页布局
-        cam_page = QtWidgets.QWidget()
+        cam_page = self.cam_page = QtWidgets.QWidget()
         cam_layout = QtWidgets.QVBoxLayout(cam_page)
         cam_layout.setSpacing(6) 
         
@@ -938,12 +4601,31 @@ class ModelingToolsUI(QtWidgets.QDialog):
         
         snapshot_layout.addWidget(QtWidgets.QLabel("Saved Snapshots:"))
         snapshot_layout.addWidget(self.list_snapshots)
+        snapshot_layout.addWidget(self.check_snapshot_project)
+        bake_layout = QtWidgets.QHBoxLayout()
+        bake_layout.addWidget(QtWidgets.QLabel("Start:"))
+        bake_layout.addWidget(self.bake_start_spin)
+        bake_layout.addWidget(QtWidgets.QLabel("Frames:"))
+        bake_layout.addWidget(self.bake_frames_spin)
+        bake_layout.addWidget(self.bake_easing_combo)
+        bake_layout.addWidget(self.check_bake_loop)
+        bake_layout.addWidget(self.btn_bake_snapshots)
+        snapshot_layout.addLayout(bake_layout)
         snapshot_group.setLayout(snapshot_layout)
         cam_layout.addWidget(snapshot_group)
+
+        preview_group = QtWidgets.QGroupBox("Snapshot Previews")
+        preview_layout = QtWidgets.QVBoxLayout(preview_group)
+        preview_row = QtWidgets.QHBoxLayout()
+        preview_row.addWidget(self.btn_preview_snapshots)
+        preview_row.addWidget(self.label_preview_status, 1)
+        preview_layout.addLayout(preview_row)
+        preview_layout.addWidget(self.grid_snapshot_previews)
+        cam_layout.addWidget(preview_group)
         cam_layout.addStretch()
 
         # 灯光页布局
-        light_page = QtWidgets.QWidget()
+        light_page = self.light_page = QtWidgets.QWidget()
         light_layout = QtWidgets.QVBoxLayout(light_page)
         light_layout.setSpacing(6)  
         
@@ -993,6 +4675,7 @@ class ModelingToolsUI(QtWidgets.QDialog):
         download_btn_layout.addStretch()
         download_layout.addLayout(download_btn_layout)
         download_layout.addWidget(self.hdri_progress)
+        download_layout.addWidget(self.hdri_network_label)
         light_layout.addWidget(download_group)
 
         skydome_group = QtWidgets.QGroupBox("Skydome Control")
@@ -1013,8 +4696,20 @@ class ModelingToolsUI(QtWidgets.QDialog):
         camera_layout = QtWidgets.QHBoxLayout()
         camera_layout.addWidget(self.hdri_camera_cb)
         camera_layout.addStretch()
+        camera_layout.addWidget(self.hdri_drag_label)
         skydome_layout.addLayout(camera_layout)
         light_layout.addWidget(skydome_group)
+
+        preset_group = QtWidgets.QGroupBox("Lighting Presets")
+        preset_layout = QtWidgets.QVBoxLayout(preset_group)
+        preset_layout.addWidget(self.list_light_presets)
+        preset_btn_layout = QtWidgets.QHBoxLayout()
+        preset_btn_layout.addWidget(self.btn_preset_save)
+        preset_btn_layout.addWidget(self.btn_preset_activate)
+        preset_btn_layout.addWidget(self.btn_preset_unload)
+        preset_btn_layout.addWidget(self.btn_preset_delete)
+        preset_layout.addLayout(preset_btn_layout)
+        light_layout.addWidget(preset_group)
         light_layout.addStretch()
 
         # 渲染页布局
@@ -1029,71 +4724,624 @@ class ModelingToolsUI(QtWidgets.QDialog):
         render_layout.addWidget(render_group)
         render_layout.addStretch()
 
+        # 诊断页布局
+        diag_page = QtWidgets.QWidget()
+        diag_layout = QtWidgets.QVBoxLayout(diag_page)
+        diag_layout.setSpacing(6)
+
+        timing_group = QtWidgets.QGroupBox("Action Timing")
+        timing_layout = QtWidgets.QVBoxLayout(timing_group)
+        timing_layout.addWidget(self.table_diagnostics)
+        diag_btn_layout = QtWidgets.QHBoxLayout()
+        diag_btn_layout.addWidget(self.btn_refresh_diagnostics)
+        diag_btn_layout.addWidget(self.btn_clear_diagnostics)
+        diag_btn_layout.addWidget(self.btn_export_diagnostics)
+        timing_layout.addLayout(diag_btn_layout)
+        diag_layout.addWidget(timing_group)
+
+        profiler_group = QtWidgets.QGroupBox("Profiler")
+        profiler_layout = QtWidgets.QVBoxLayout(profiler_group)
+        profiler_layout.addWidget(self.check_profiler)
+        profiler_tabs = QtWidgets.QTabWidget()
+        profiler_tabs.addTab(self.table_profile_commands, "Commands")
+        profiler_tabs.addTab(self.table_profile_handlers, "Handlers")
+        profiler_layout.addWidget(profiler_tabs)
+        profiler_btn_layout = QtWidgets.QHBoxLayout()
+        profiler_btn_layout.addWidget(self.btn_profiler_reset)
+        profiler_btn_layout.addWidget(self.btn_profiler_export_json)
+        profiler_btn_layout.addWidget(self.btn_profiler_export_trace)
+        profiler_layout.addLayout(profiler_btn_layout)
+        diag_layout.addWidget(profiler_group)
+
+        # 场景统计页布局
+        stats_page = self.stats_page = QtWidgets.QWidget()
+        stats_layout = QtWidgets.QVBoxLayout(stats_page)
+        stats_layout.setSpacing(6)
+        stats_layout.addWidget(self.label_scene_stats)
+        stats_layout.addWidget(self.table_scene_stats)
+        stats_btn_layout = QtWidgets.QHBoxLayout()
+        stats_btn_layout.addWidget(self.btn_stats_rebuild)
+        stats_btn_layout.addWidget(self.btn_stats_select)
+        stats_layout.addLayout(stats_btn_layout)
+
         # 添加标签页
         self.tabs.addTab(modeling_page, "Modeling")
         self.tabs.addTab(cam_page, "Camera")
         self.tabs.addTab(mat_page, "Material")
         self.tabs.addTab(light_page, "Lighting")
         self.tabs.addTab(render_page, "Rendering")
+        self.tabs.addTab(stats_page, "Scene Stats")
+        self.tabs.addTab(diag_page, "Diagnostics")
 
     def create_connections(self):
         """连接信号和槽"""
         # 建模工具连接
-        self.btn_merge_center.clicked.connect(universal_merge_to_center)
-        self.btn_target_weld.clicked.connect(target_weld)
-        self.btn_connect_vertices.clicked.connect(connect_vertices)
-        self.btn_delete_vertices.clicked.connect(delete_vertices)
-        self.btn_bridge_edges.clicked.connect(bridge_edges)
-        self.btn_insert_edge_loop.clicked.connect(insert_edge_loop)
-        self.btn_multi_cut.clicked.connect(multi_cut)
-        self.btn_fill_hole.clicked.connect(fill_hole)
-        self.btn_bevel_edges.clicked.connect(bevel_edges)
-        self.btn_extrude_faces.clicked.connect(extrude_faces)
-        self.btn_separate_objects.clicked.connect(separate_objects)
-        self.btn_combine_objects.clicked.connect(combine_objects)
-        self.btn_detach_faces.clicked.connect(detach_selected_faces)
-        self.btn_open_hypershade.clicked.connect(open_hypershade)
-        self.btn_custom_color.clicked.connect(assign_custom_color_to_selection)
+        self.bind_action(self.btn_merge_center, "Merge to Center", universal_merge_to_center)
+        self.bind_action(self.btn_target_weld, "Target Weld", target_weld)
+        self.bind_action(self.btn_connect_vertices, "Connect Vertices", connect_vertices)
+        self.bind_action(self.btn_delete_vertices, "Delete Vertices", delete_vertices)
+        self.bind_action(self.btn_bridge_edges, "Bridge Edges", bridge_edges)
+        self.bind_action(self.btn_insert_edge_loop, "Insert Edge Loop", insert_edge_loop, suspend_refresh=False)
+        self.bind_action(self.btn_multi_cut, "Multi-Cut", multi_cut, suspend_refresh=False)
+        self.bind_action(self.btn_fill_hole, "Fill Hole", fill_hole)
+        self.bind_action(self.btn_bevel_edges, "Bevel Edges", bevel_edges)
+        self.bind_action(self.btn_extrude_faces, "Extrude Faces", extrude_faces)
+        self.bind_action(self.btn_separate_objects, "Separate Objects", separate_objects)
+        self.bind_action(self.btn_combine_objects, "Combine Objects", combine_objects)
+        self.bind_action(self.btn_detach_faces, "Detach Selected Faces", detach_selected_faces)
+        self.connect_signal(self.btn_batch_run.clicked, self.on_batch_run)
+        self.connect_signal(self.btn_lod_generate.clicked, self.on_lod_generate)
+        self.connect_signal(self.btn_lod_apply.clicked, self.on_lod_apply)
+        self.connect_signal(self.btn_health_scan_sel.clicked, lambda: self.on_health_scan("selection"), "on_health_scan")
+        self.connect_signal(self.btn_health_scan_scene.clicked, lambda: self.on_health_scan("scene"), "on_health_scan")
+        self.connect_signal(self.btn_health_sets.clicked, lambda: run_action("Create Health Sets", create_health_sets, self.health_report), "Create Health Sets")
+        self.connect_signal(self.btn_health_fix.clicked, self.on_health_fix)
+        self.connect_signal(self.tree_health.itemClicked, self.on_health_item_clicked)
+        self.connect_signal(self.btn_open_hypershade.clicked, open_hypershade)
+        self.connect_signal(self.btn_duplicate_textures.clicked, lambda: QtWidgets.QMessageBox.information(
+            self, "Duplicate Textures", format_duplicate_report(find_duplicate_textures())), "find_duplicate_textures")
+        self.connect_signal(self.btn_purge_preview.clicked, lambda: self.on_purge_materials(True), "on_purge_materials")
+        self.connect_signal(self.btn_purge.clicked, lambda: self.on_purge_materials(False), "on_purge_materials")
+        self.bind_action(self.btn_custom_color, "Custom Color", assign_custom_color_to_selection, suspend_refresh=False)
         
         # 颜色按钮连接
         for i, btn in enumerate(self.color_buttons):
-            btn.clicked.connect(lambda checked=False, idx=i: assign_material_to_selection(COLOR_PRESETS[idx]))
+            self.bind_action(btn, f"Assign {COLOR_PRESETS[i]['name']}", assign_material_to_selection, COLOR_PRESETS[i])
 
         # 相机工具连接
-        self.btn_create_persp_cam.clicked.connect(create_perspective_camera)
-        self.btn_save_snapshot.clicked.connect(lambda: save_camera_snapshot(self.camera_snapshots, self.list_snapshots))
-        self.btn_restore_snapshot.clicked.connect(lambda: restore_camera_snapshot(self.camera_snapshots, self.list_snapshots))
-        self.btn_delete_snapshot.clicked.connect(lambda: delete_camera_snapshot(self.camera_snapshots, self.list_snapshots))
+        self.bind_action(self.btn_create_persp_cam, "Create Perspective Cam", create_perspective_camera)
+        self.bind_action(self.btn_save_snapshot, "Save Snapshot", save_camera_snapshot, self.camera_snapshots, self.list_snapshots)
+        self.bind_action(self.btn_restore_snapshot, "Restore Snapshot", restore_camera_snapshot, self.camera_snapshots, self.list_snapshots)
+        self.bind_action(self.btn_delete_snapshot, "Delete Snapshot", delete_camera_snapshot, self.camera_snapshots, self.list_snapshots)
+        self.connect_signal(self.check_snapshot_project.toggled, self.on_snapshot_project_toggled)
+        self.connect_signal(self.btn_preview_snapshots.clicked, self.on_refresh_previews)
+        self.connect_signal(self.grid_snapshot_previews.itemDoubleClicked, lambda item: run_action(
+            "Restore Snapshot", apply_camera_states, [self.camera_snapshots.get(item.text())]), "Restore Snapshot")
+        self.connect_signal(self.btn_bake_snapshots.clicked, lambda: run_action(
+            "Bake Snapshots", bake_selected_snapshots, self.camera_snapshots, self.list_snapshots,
+            self.bake_start_spin.value(), self.bake_frames_spin.value(),
+            self.bake_easing_combo.currentText(), self.check_bake_loop.isChecked()), "Bake Snapshots")
 
         # 灯光工具连接
-        self.btn_area_light.clicked.connect(create_area_light)
-        self.btn_sky_dome.clicked.connect(create_sky_dome_light)
-        self.btn_open_render_view.clicked.connect(open_arnold_render_view)
+        self.bind_action(self.btn_area_light, "Area Light", create_area_light)
+        self.bind_action(self.btn_sky_dome, "Sky Dome Light", create_sky_dome_light)
+        self.connect_signal(self.btn_open_render_view.clicked, open_arnold_render_view)
         
         # HDRI工具连接
-        self.hdri_open_btn.clicked.connect(lambda: QtGui.QDesktopServices.openUrl(QtCore.QUrl("https://polyhaven.com/hdris")))
-        self.hdri_cache_btn.clicked.connect(self.choose_cache_dir)
-        self.hdri_download_btn.clicked.connect(self.on_download_apply)
-        self.hdri_exposure_slider.valueChanged.connect(self.on_exposure_changed)
-        self.hdri_intensity_slider.valueChanged.connect(self.on_intensity_changed)
-        self.hdri_rotate_slider.valueChanged.connect(self.on_rotate_changed)
-        self.hdri_camera_cb.toggled.connect(set_skydome_camera)
+        self.connect_signal(self.hdri_open_btn.clicked, lambda: QtGui.QDesktopServices.openUrl(QtCore.QUrl("https://polyhaven.com/hdris")), "open_polyhaven")
+        self.connect_signal(self.hdri_cache_btn.clicked, self.choose_cache_dir)
+        self.connect_signal(self.hdri_download_btn.clicked, self.on_download_apply)
+        self.connect_signal(self.hdri_exposure_slider.valueChanged, self.on_exposure_changed)
+        self.connect_signal(self.hdri_intensity_slider.valueChanged, self.on_intensity_changed)
+        self.connect_signal(self.hdri_rotate_slider.valueChanged, self.on_rotate_changed)
+        self.connect_signal(self.hdri_camera_cb.toggled, set_skydome_camera)
+        self.connect_signal(self.btn_preset_save.clicked, self.on_save_light_preset)
+        self.connect_signal(self.btn_preset_activate.clicked, self.on_activate_light_preset)
+        self.connect_signal(self.list_light_presets.itemDoubleClicked, lambda item: self.on_activate_light_preset(), "on_activate_light_preset")
+        self.connect_signal(self.btn_preset_unload.clicked, self.on_unload_light_preset)
+        self.connect_signal(self.btn_preset_delete.clicked, self.on_delete_light_preset)
+        for slider, coalescer in self.slider_coalescers.items():
+            self.connect_signal(slider.sliderPressed, coalescer.begin_drag)
+            self.connect_signal(slider.sliderReleased, lambda c=coalescer: self.on_slider_released(c), "on_slider_released")
 
         # 更新功能连接
-        self.btn_check_updates.clicked.connect(check_for_updates)
-        self.btn_update.clicked.connect(update_tool)
-        self.banner_label.clicked.connect(lambda: webbrowser.open(GITHUB_PAGE_URL))
+        self.connect_signal(self.btn_check_updates.clicked, check_for_updates)
+        self.connect_signal(self.btn_update.clicked, update_tool)
+        self.connect_signal(self.banner_label.clicked, lambda: webbrowser.open(GITHUB_PAGE_URL), "open_github_page")
+
+        self.connect_signal(self.btn_id_colors.clicked, lambda: run_action(
+            "Assign ID Colors", assign_id_colors, list_target_meshes("selection"),
+            self.id_color_mode_combo.currentText(), self.id_color_seed_spin.value()), "Assign ID Colors")
+
+        # 材质规则连接
+        self.connect_signal(self.btn_rule_add.clicked, lambda: self.add_rule_row(), "add_rule_row")
+        self.connect_signal(self.btn_rule_remove.clicked, lambda: self.table_rules.removeRow(self.table_rules.currentRow()), "remove_rule_row")
+        self.connect_signal(self.btn_rule_load.clicked, self.on_load_rules)
+        self.connect_signal(self.btn_rule_save.clicked, self.on_save_rules)
+        self.connect_signal(self.btn_rule_preview.clicked, lambda: self.on_apply_rules(dry_run=True), "on_apply_rules")
+        self.connect_signal(self.btn_rule_apply.clicked, lambda: self.on_apply_rules(dry_run=False), "on_apply_rules")
 
         # 透明材质连接
-        self.btn_transparency.clicked.connect(assign_transparency_material)
-        self.btn_select_color_map.clicked.connect(self.on_select_color_map)
-        self.btn_select_opacity_map.clicked.connect(self.on_select_opacity_map)
+        self.bind_action(self.btn_transparency, "Assign Transparency Material", assign_transparency_material)
+        self.connect_signal(self.btn_select_color_map.clicked, self.on_select_color_map)
+        self.connect_signal(self.btn_select_opacity_map.clicked, self.on_select_opacity_map)
+        for kind, (_, _, recent) in self.map_widgets.items():
+            self.connect_signal(recent.activated, lambda index, k=kind: self.on_recent_map(k, index), "on_recent_map")
         
         # 几何体按钮连接
-        geometry_commands = [cmds.polyCube, cmds.polySphere, cmds.polyCylinder, 
-                            cmds.polyCone, cmds.polyPlane, cmds.polyTorus]
-        for i, btn in enumerate(self.geometry_buttons):
-            btn.clicked.connect(geometry_commands[i])
+        for btn in self.geometry_buttons:
+            self.connect_signal(btn.clicked, lambda checked=False, b=btn: self.on_geometry_clicked(b), "on_geometry_clicked")
+        self.connect_signal(self.btn_scatter_selected.clicked, self.on_scatter_selected)
+
+        # 视口性能连接
+        self.connect_signal(self.check_viewport_perf.toggled, self.on_viewport_perf_toggled)
+        self.connect_signal(self.viewport_fps_spin.valueChanged, self.on_viewport_fps_changed)
+        self.connect_signal(self.fps_timer.timeout, self.on_fps_timer)
+        self.fps_timer.start()
+
+        # 诊断连接
+        self.connect_signal(self.btn_refresh_diagnostics.clicked, self.refresh_diagnostics)
+        self.connect_signal(self.btn_clear_diagnostics.clicked, self.on_clear_diagnostics)
+        self.connect_signal(self.btn_export_diagnostics.clicked, self.on_export_diagnostics)
+        self.connect_signal(self.check_profiler.toggled, self.on_profiler_toggled)
+
+        # 场景统计连接
+        self.connect_signal(self.btn_stats_rebuild.clicked, lambda: self.refresh_scene_stats(rebuild=True), "refresh_scene_stats")
+        self.connect_signal(self.btn_stats_select.clicked, self.on_stats_select)
+        self.connect_signal(self.table_scene_stats.itemDoubleClicked, lambda item: self.on_stats_select(), "on_stats_select")
+        self.connect_signal(self.stats_timer.timeout, self.on_stats_timer)
+        self.connect_signal(self.btn_profiler_reset.clicked, self.on_profiler_reset)
+        self.connect_signal(self.btn_profiler_export_json.clicked, lambda: self.on_profiler_export("json"), "on_profiler_export")
+        self.connect_signal(self.btn_profiler_export_trace.clicked, lambda: self.on_profiler_export("trace"), "on_profiler_export")
+        self.connect_signal(self.tabs.currentChanged, lambda idx: self.refresh_diagnostics(), "refresh_diagnostics")
+        self.connect_signal(self.tabs.currentChanged, self.on_tab_changed)
+
+    def bind_action(self, button, name, func, *args, suspend_refresh=True):
+        """通过操作执行器连接按钮"""
+        def handler(checked=False):
+            try:
+                run_action(name, func, *args, suspend_refresh=suspend_refresh)
+            finally:
+                self.refresh_diagnostics()
+        self.connect_signal(button.clicked, handler, name)
+
+    def connect_signal(self, signal, slot, name=None):
+        """连接信号和槽，槽函数加上分析包装；lambda等匿名槽需要给出名称"""
+        signal.connect(profiled_handler(f"{type(self).__name__}.{name or slot.__name__}", slot))
+
+    # 材质规则方法
+    def add_rule_row(self, rule=None):
+        """添加一行规则"""
+        rule = rule or {"match": "Name", "pattern": "", "preset": COLOR_PRESETS[0]["name"]}
+        row = self.table_rules.rowCount()
+        self.table_rules.insertRow(row)
+        match_combo = QtWidgets.QComboBox()
+        match_combo.addItems(RULE_MATCH_TYPES)
+        match_combo.setCurrentText(rule.get("match", "Name"))
+        self.table_rules.setCellWidget(row, 0, match_combo)
+        self.table_rules.setItem(row, 1, QtWidgets.QTableWidgetItem(rule.get("pattern", "")))
+        preset_combo = QtWidgets.QComboBox()
+        preset_combo.setEditable(True)
+        preset_combo.addItems([c["name"] for c in COLOR_PRESETS])
+        preset_combo.setCurrentText(rule.get("preset") or ",".join(f"{c:.2f}" for c in rule.get("rgb", ())))
+        self.table_rules.setCellWidget(row, 2, preset_combo)
+
+    def collect_rules(self):
+        """从表格读取规则"""
+        rules = []
+        for row in range(self.table_rules.rowCount()):
+            item = self.table_rules.item(row, 1)
+            rule = {"match": self.table_rules.cellWidget(row, 0).currentText(), "pattern": item.text() if item else ""}
+            target = self.table_rules.cellWidget(row, 2).currentText().strip()
+            if re.match(r"^\s*[0-9.]+\s*,\s*[0-9.]+\s*,\s*[0-9.]+\s*$", target):
+                rule["rgb"] = [float(c) for c in target.split(",")]
+            else:
+                rule["preset"] = target
+            rules.append(rule)
+        return rules
+
+    def on_load_rules(self):
+        """读取规则文件"""
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Load Material Rules", ensure_dir(TOOL_DATA_DIR), "JSON Files (*.json)")
+        if not path: return
+        try:
+            rules = load_material_rules(path)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Material Rules", f"Error: {e}")
+            return
+        self.table_rules.setRowCount(0)
+        for rule in rules:
+            self.add_rule_row(rule)
+
+    def on_save_rules(self):
+        """保存规则文件"""
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save Material Rules", os.path.join(ensure_dir(TOOL_DATA_DIR), "material_rules.json"), "JSON Files (*.json)")
+        if path:
+            save_material_rules(path, self.collect_rules())
+
+    def on_apply_rules(self, dry_run):
+        """预览或执行规则材质分配"""
+        rules = self.collect_rules()
+        if not rules: return
+        try:
+            result = run_action("Preview Material Rules" if dry_run else "Apply Material Rules",
+                                apply_material_rules, rules, dry_run, suspend_refresh=not dry_run)
+        except (ValueError, re.error) as e:
+            QtWidgets.QMessageBox.warning(self, "Material Rules", f"Invalid rule: {e}")
+            return
+        title = "Material Rules Preview" if dry_run else "Material Rules Applied"
+        QtWidgets.QMessageBox.information(self, title, format_rule_report(rules, result))
+        self.refresh_diagnostics()
+
+    def on_purge_materials(self, dry_run):
+        """预览或清理孤立的材质网络，包含旧版无标记网络时先列出并让用户确认"""
+        legacy = self.check_purge_legacy.isChecked()
+        if legacy and not dry_run:
+            preview = run_action("Preview Unused Materials", purge_orphaned_shading_networks, True, True, suspend_refresh=False)
+            if preview["legacy"] and QtWidgets.QMessageBox.question(
+                    self, "Unused Materials", format_purge_report(preview, True) + "\n\nDelete these nodes?") != QtWidgets.QMessageBox.Yes:
+                return
+        result = run_action("Preview Unused Materials" if dry_run else "Purge Unused Materials",
+                            purge_orphaned_shading_networks, dry_run, legacy, suspend_refresh=not dry_run)
+        QtWidgets.QMessageBox.information(self, "Unused Materials", format_purge_report(result, dry_run))
+        self.refresh_diagnostics()
+
+    # 批处理方法
+    def on_batch_run(self):
+        """对目标网格批量执行操作"""
+        op_name = self.batch_op_combo.currentText()
+        meshes = resolve_batch_targets(self.batch_target_combo.currentText(), self.batch_target_edit.text().strip())
+        if not meshes:
+            cmds.warning("No target meshes found for batch operation")
+            return
+        result = run_action(f"Batch {op_name}", run_batch_op, op_name, meshes, undo_chunk=False)
+        status = "cancelled" if result["cancelled"] else "done"
+        self.label_batch_result.setText(
+            f"{op_name}: {result['processed']}/{result['total']} meshes {status}, "
+            f"{len(result['errors'])} errors, {result['seconds']:.2f}s")
+        if result["errors"]:
+            lines = [f"{mesh.split('|')[-1]}: {err}" for mesh, err in result["errors"][:20]]
+            if len(result["errors"]) > 20:
+                lines.append(f"... {len(result['errors']) - 20} more")
+            QtWidgets.QMessageBox.warning(self, "Batch", "\n".join(lines))
+        self.refresh_diagnostics()
+
+    # 实例散布方法
+    def scatter_options(self):
+        """收集散布参数"""
+        return {
+            "sampling": self.scatter_sampling_combo.currentText(),
+            "seed": self.scatter_seed_spin.value(),
+            "min_distance": self.scatter_distance_spin.value(),
+            "volume": self.scatter_target_combo.currentText() == "Volume",
+            "scale_range": sorted((self.scatter_scale_min_spin.value(), self.scatter_scale_max_spin.value())),
+            "random_rotation": self.check_scatter_rotate.isChecked(),
+            "align_to_normal": self.check_scatter_align.isChecked()
+        }
+
+    def run_scatter(self, name, func, *args):
+        """执行散布并报告放置数量"""
+        count = self.scatter_count_spin.value()
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            group, placed = run_action(name, func, *args, count, **self.scatter_options())
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+            self.refresh_diagnostics()
+        if group and placed < count:
+            cmds.warning(f"Only {placed} of {count} points fit at this minimum distance")
+
+    def on_geometry_clicked(self, button):
+        """创建几何体，散布模式下在选中网格上散布其实例"""
+        name, cmd_name = button.property("geometry_name"), button.property("geometry_cmd")
+        if not self.check_scatter.isChecked():
+            try:
+                run_action(f"Create {name}", create_primitive, cmd_name)
+            finally:
+                self.refresh_diagnostics()
+            return
+        self.run_scatter(f"Scatter {name}", scatter_primitive, cmd_name, list_target_meshes("selection"))
+
+    def on_scatter_selected(self):
+        """在其余选中的网格上散布第一个选中网格的实例"""
+        selection = cmds.ls(selection=True, long=True) or []
+        prototype = meshes_from_objects(selection[:1])
+        targets = [m for m in meshes_from_objects(selection[1:]) if m not in prototype]
+        if not prototype or not targets:
+            cmds.warning("Select the mesh to scatter, then the target meshes")
+            return
+        self.run_scatter("Scatter Mesh", scatter_instances, prototype[0], targets)
+
+    # 视口性能方法
+    def on_viewport_perf_toggled(self, checked):
+        """开启或关闭视口性能模式"""
+        if checked:
+            enable_viewport_performance(self.viewport_fps_spin.value())
+        else:
+            disable_viewport_performance()
+        self.on_fps_timer()
+
+    def on_viewport_fps_changed(self, value):
+        """修改性能模式的目标帧率"""
+        if VIEWPORT_PERFORMANCE is not None:
+            VIEWPORT_PERFORMANCE.target_fps = value
+
+    def on_fps_timer(self):
+        """显示最近的视口帧率、帧时间和绘制时间，并让性能模式按帧时间调整级别"""
+        self.frame_monitor.watch()
+        frame_ms, draw_ms = self.frame_monitor.take()
+        text = (f"{1000.0 / max(frame_ms, 1e-3):.0f} fps ({frame_ms:.1f} ms frame, {draw_ms:.1f} ms draw)"
+                if frame_ms is not None else "Viewport idle")
+        if VIEWPORT_PERFORMANCE is not None:
+            level = VIEWPORT_PERFORMANCE.adapt(frame_ms)
+            text += f" | Level {level}: {VIEWPORT_PERF_LEVELS[level - 1]['name'] if level else 'Full Quality'}"
+        self.label_viewport_fps.setText(text)
+
+    # LOD代理方法
+    def on_lod_generate(self):
+        """为选中的网格生成代理，减面在后台工作进程中执行"""
+        try:
+            ratios = sorted({float(v) for v in re.split(r"[,\s]+", self.lod_ratios_edit.text().strip()) if v}, reverse=True)
+        except ValueError:
+            ratios = []
+        if not ratios or not all(0.0 < r < 1.0 for r in ratios):
+            cmds.warning("LOD ratios must be numbers between 0 and 1")
+            return
+        meshes = list_target_meshes("selection")
+        if not meshes:
+            cmds.warning("Please select meshes to generate LODs")
+            return
+        self.btn_lod_generate.setEnabled(False)
+        self.label_lod_status.setText(f"Reducing {len(meshes)} meshes in background...")
+        try:
+            generate_lods_async(meshes, ratios, lambda summary: self.on_lods_generated(summary, ratios))
+        except Exception as e:
+            self.btn_lod_generate.setEnabled(True)
+            self.label_lod_status.setText("")
+            cmds.warning(f"LOD generation failed: {str(e)}")
+
+    def on_lods_generated(self, summary, ratios):
+        """后台减面完成后更新显示选项和状态"""
+        try:
+            self.btn_lod_generate.setEnabled(True)
+            self.lod_level_combo.clear()
+            self.lod_level_combo.addItems(["Full"] + [f"{lod_percent(r)}%" for r in ratios])
+            self.label_lod_status.setText(
+                f"{len(summary['proxies'])} proxies for {summary['meshes']} meshes, "
+                f"{summary['reduced']} reduced, {summary['meshes'] - summary['reduced']} from cache, "
+                f"{len(summary['errors'])} errors")
+        except RuntimeError:
+            # 减面期间窗口已关闭
+            return
+        if summary["errors"]:
+            cmds.warning("LOD generation errors:\n" + "\n".join(summary["errors"][:20]))
+
+    def on_lod_apply(self):
+        """切换选中对象(未选择时为全部对象)显示的代理"""
+        text = self.lod_level_combo.currentText()
+        percent = None if text == "Full" else int(text.rstrip("%"))
+        transforms = list_target_meshes("selection") or lod_transforms()
+        count = run_action("Switch LOD", set_lod_level, transforms, percent)
+        self.label_lod_status.setText(f"Showing {text} on {count} objects")
+
+    # 网格健康检查方法
+    def on_health_scan(self, scope):
+        """扫描网格并显示结果"""
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            self.health_report = run_action("Mesh Health Scan", scan_mesh_health, scope, self.health_tol_spin.value())
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.populate_health_tree()
+        self.refresh_diagnostics()
+
+    def populate_health_tree(self):
+        """填充健康检查结果树"""
+        self.tree_health.clear()
+        for key, label, _ in HEALTH_CHECKS:
+            meshes = [(mesh, len(issues[key])) for mesh, issues in self.health_report.items() if len(issues[key])]
+            top = QtWidgets.QTreeWidgetItem([label, str(sum(n for _, n in meshes))])
+            top.setData(0, QtCore.Qt.UserRole, (key, None))
+            for mesh, n in meshes:
+                child = QtWidgets.QTreeWidgetItem([mesh.split("|")[-1], str(n)])
+                child.setData(0, QtCore.Qt.UserRole, (key, mesh))
+                top.addChild(child)
+            self.tree_health.addTopLevelItem(top)
+
+    def selected_health_report(self):
+        """获取当前选中条目对应的问题类别和报告"""
+        item = self.tree_health.currentItem()
+        if not item: return None, {}
+        key, mesh = item.data(0, QtCore.Qt.UserRole)
+        return key, ({mesh: self.health_report[mesh]} if mesh else self.health_report)
+
+    def refresh_scene_stats(self, rebuild=False):
+        """首次或重建时遍历全部网格，之后只更新变脏的网格，并显示最重的对象"""
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            start = time.perf_counter()
+            if rebuild or not SCENE_STATS_CALLBACK_IDS:
+                build_scene_stats()
+            else:
+                update_scene_stats()
+            elapsed = (time.perf_counter() - start) * 1000.0
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        entries = heaviest_meshes()
+        paths = [mesh_stats_path(e) for e in entries]
+        rows = [[path.split("|")[-1]] + [e[key] for key, _ in SCENE_STATS_COLUMNS] for path, e in zip(paths, entries)]
+        self.fill_table(self.table_scene_stats, rows, paths)
+        summary = summarize_scene_stats()
+        self.label_scene_stats.setText(
+            f"{summary['meshes']} meshes, {summary['faces']:,} drawn faces, {summary['vertices']:,} vertices, "
+            f"{summary['instanced']} instanced | top {len(entries)} by drawn faces ({elapsed:.0f} ms)")
+
+    def on_stats_timer(self):
+        """统计页可见且有网格变化时增量刷新"""
+        if scene_stats_pending():
+            self.refresh_scene_stats()
+
+    def on_stats_select(self):
+        """选择表格中选中的对象"""
+        rows = sorted({index.row() for index in self.table_scene_stats.selectedIndexes()})
+        paths = [self.table_scene_stats.item(r, 0).data(QtCore.Qt.UserRole) for r in rows]
+        paths = [p for p in paths if p and cmds.objExists(p)]
+        if paths:
+            cmds.select([cmds.listRelatives(p, parent=True, fullPath=True)[0] for p in paths])
+
+    def on_health_item_clicked(self, item, column):
+        """选择问题组件"""
+        key, report = self.selected_health_report()
+        comps = health_components(report, key) if key else []
+        if comps:
+            cmds.select(comps)
+        else:
+            cmds.select(clear=True)
+
+    def on_health_fix(self):
+        """修复选中的问题并重新扫描"""
+        key, report = self.selected_health_report()
+        if not key: return
+        meshes = list(report)
+        if not run_action("Mesh Health Fix", fix_mesh_health, report, key, self.health_tol_spin.value()): return
+        rescanned = run_action("Mesh Health Scan", scan_mesh_health, meshes, self.health_tol_spin.value())
+        for mesh in meshes:
+            self.health_report.pop(mesh, None)
+        self.health_report.update(rescanned)
+        self.populate_health_tree()
+        self.refresh_diagnostics()
+
+    # 相机快照方法
+    def on_tab_changed(self, index):
+        """切换到相机页时按需读取快照，切换到灯光页时刷新预设"""
+        if self.tabs.widget(index) is self.cam_page and self.camera_snapshots.ensure_loaded():
+            populate_snapshot_list(self.camera_snapshots, self.list_snapshots)
+        elif self.tabs.widget(index) is self.light_page:
+            self.refresh_light_presets()
+            self.refresh_network_stats()
+        if self.tabs.widget(index) is self.stats_page:
+            self.refresh_scene_stats()
+            self.stats_timer.start()
+        else:
+            self.stop_scene_stats()
+
+    def stop_scene_stats(self):
+        """统计页不可见时停止刷新并移除每个网格的脏回调，下次显示时重新建立索引"""
+        self.stats_timer.stop()
+        clear_scene_stats()
+
+    def on_refresh_previews(self):
+        """显示已缓存的预览，并在空闲时重新生成过期的预览"""
+        self.camera_snapshots.ensure_loaded()
+        self.grid_snapshot_previews.clear()
+        self.preview_items = {}
+        for name in self.camera_snapshots.names():
+            path = snapshot_preview_path(self.camera_snapshots.get(name))
+            item = QtWidgets.QListWidgetItem(name)
+            if os.path.exists(path):
+                item.setIcon(QtGui.QIcon(path))
+            self.grid_snapshot_previews.addItem(item)
+            self.preview_items[name] = item
+        queued = self.preview_queue.schedule(self.camera_snapshots)
+        self.label_preview_status.setText(f"Capturing {queued} stale previews..." if queued else "All previews up to date")
+
+    def on_preview_captured(self, name, path):
+        """单个预览生成完成后更新网格"""
+        try:
+            item = self.preview_items.get(name)
+            if item is not None and path:
+                item.setIcon(QtGui.QIcon(path))
+            remaining = len(self.preview_queue.queue)
+            self.label_preview_status.setText(f"Capturing {remaining} stale previews..." if remaining else "All previews up to date")
+        except RuntimeError:
+            self.preview_queue.stop()
+
+    def on_snapshot_project_toggled(self, checked):
+        """切换项目文件同步并重新读取快照"""
+        self.camera_snapshots.use_project_file = checked
+        self.camera_snapshots.load()
+        if checked:
+            self.camera_snapshots.save()
+        populate_snapshot_list(self.camera_snapshots, self.list_snapshots)
+
+    # 诊断方法
+    def refresh_diagnostics(self):
+        """刷新操作耗时和分析器表格"""
+        if not self.table_diagnostics.isVisible(): return
+        self.fill_table(self.table_diagnostics, [
+            [row["action"], row["runs"], row["last_ms"], row["avg_ms"], row["max_ms"], row["last_calls"], row["errors"]]
+            for row in summarize_action_history()])
+        session = self.profiler_session
+        self.fill_table(self.table_profile_commands, [
+            [row["command"], row["calls"], row["total_ms"], row["avg_ms"], row["max_ms"]]
+            for row in (session.command_rows() if session else [])])
+        self.fill_table(self.table_profile_handlers, [
+            [row["name"], row["type"], row["runs"], row["total_ms"], row["avg_ms"], row["max_ms"]]
+            for row in (session.handler_rows() if session else [])])
+
+    def fill_table(self, table, rows, row_data=None):
+        """填充可排序表格，数值列按数值排序，row_data存入每行首列的UserRole"""
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for r, values in enumerate(rows):
+            for c, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                if isinstance(value, float):
+                    item.setData(QtCore.Qt.DisplayRole, round(value, 2))
+                else:
+                    item.setData(QtCore.Qt.DisplayRole, value)
+                if c == 0 and row_data is not None:
+                    item.setData(QtCore.Qt.UserRole, row_data[r])
+                    item.setToolTip(str(row_data[r]))
+                table.setItem(r, c, item)
+        table.setSortingEnabled(True)
+
+    def on_clear_diagnostics(self):
+        """清空操作耗时历史"""
+        ACTION_HISTORY.clear()
+        self.refresh_diagnostics()
+
+    def on_export_diagnostics(self):
+        """导出操作耗时历史"""
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Action Timing", "action_timing.json", "JSON Files (*.json)")
+        if not path: return
+        try:
+            export_action_history(path)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Export", f"Error: {e}")
+
+    def on_profiler_toggled(self, checked):
+        """开启或关闭分析器"""
+        if checked:
+            self.profiler_session = enable_profiler()
+        else:
+            disable_profiler()
+        self.refresh_diagnostics()
+
+    def on_profiler_reset(self):
+        """清空分析器数据"""
+        if self.profiler_session:
+            self.profiler_session.reset()
+        self.refresh_diagnostics()
+
+    def on_profiler_export(self, fmt):
+        """导出分析会话为JSON或Chrome跟踪文件"""
+        session = self.profiler_session
+        if session is None:
+            QtWidgets.QMessageBox.information(self, "Profiler", "Enable the profiler and run some actions first.")
+            return
+        if fmt == "trace":
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Chrome Trace", "assistant_trace.json", "Trace Files (*.json)")
+            export = session.export_chrome_trace
+        else:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Profile", "assistant_profile.json", "JSON Files (*.json)")
+            export = session.export_json
+        if not path: return
+        try:
+            export(path)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Export", f"Error: {e}")
 
     # HDRI相关方法
     def choose_cache_dir(self):
@@ -1139,6 +5387,21 @@ class ModelingToolsUI(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "HDRI Download", f"Error: {e}")
         finally:
             QtWidgets.QApplication.restoreOverrideCursor()
+            self.refresh_network_stats()
+
+    def refresh_network_stats(self):
+        """显示最近HDRI和API传输的吞吐量"""
+        stats = recent_throughput(10, ("hdri", "api"))
+        if stats is None:
+            self.hdri_network_label.setText("No downloads yet")
+            return
+        last = stats["last"]
+        last_text = format_throughput(last["bytes_per_sec"]) if last["ok"] and last["bytes_per_sec"] else \
+            ("failed" if not last["ok"] else "-")
+        ttfb = f", TTFB {stats['avg_ttfb_ms']:.0f} ms" if stats["avg_ttfb_ms"] is not None else ""
+        errors = f", {stats['errors']} failed" if stats["errors"] else ""
+        self.hdri_network_label.setText(
+            f"Last {last['host']}: {last_text} | Recent {stats['count']}: {format_throughput(stats['avg_bytes_per_sec'])}{ttfb}{errors}")
 
     def set_progress(self, read, total):
         """设置下载进度"""
@@ -1148,37 +5411,173 @@ class ModelingToolsUI(QtWidgets.QDialog):
         """曝光值改变处理"""
         exposure = value / 4.0
         self.hdri_exposure_label.setText(f"{exposure:.2f}")
-        set_skydome_attr("aiExposure", exposure)
+        self.slider_coalescers[self.hdri_exposure_slider].push(exposure)
         
     def on_intensity_changed(self, value):
         """强度值改变处理"""
         intensity = value / 10.0
         self.hdri_intensity_label.setText(f"{intensity:.2f}")
-        set_skydome_attr("intensity", intensity)
+        self.slider_coalescers[self.hdri_intensity_slider].push(intensity)
         
     def on_rotate_changed(self, value):
         """旋转值改变处理"""
         self.hdri_rotate_label.setText(f"{value}°")
-        set_skydome_rotation(value)
+        self.slider_coalescers[self.hdri_rotate_slider].push(value)
+
+    # 灯光预设方法
+    def refresh_light_presets(self):
+        """刷新灯光预设列表，常驻的预设带标记"""
+        self.lighting_presets = load_lighting_presets()
+        resident = resident_preset_domes()
+        self.list_light_presets.clear()
+        for name in self.lighting_presets:
+            item = QtWidgets.QListWidgetItem(f"{name}  (resident)" if name in resident else name)
+            item.setData(QtCore.Qt.UserRole, name)
+            self.list_light_presets.addItem(item)
+
+    def current_light_preset(self):
+        """获取列表中选中的预设"""
+        item = self.list_light_presets.currentItem()
+        return self.lighting_presets.get(item.data(QtCore.Qt.UserRole)) if item else None
+
+    def on_save_light_preset(self):
+        """将当前天空球设置保存为预设"""
+        name, ok = QtWidgets.QInputDialog.getText(self, "Lighting Preset", "Preset name:")
+        if not ok or not name.strip(): return
+        preset = capture_lighting_preset(name.strip())
+        if not preset: return
+        presets = load_lighting_presets()
+        presets[preset["name"]] = preset
+        save_lighting_presets(presets)
+        if preset["name"] in resident_preset_domes():
+            run_action("Rebuild Lighting Preset", rebuild_preset_skydome, preset)
+        self.refresh_light_presets()
+
+    def on_activate_light_preset(self):
+        """切换到选中的预设并同步滑块"""
+        preset = self.current_light_preset()
+        if not preset: return
+        run_action("Activate Lighting Preset", activate_lighting_preset, preset)
+        for slider, value in ((self.hdri_exposure_slider, preset["exposure"] * 4.0),
+                              (self.hdri_intensity_slider, preset["intensity"] * 10.0),
+                              (self.hdri_rotate_slider, preset["rotation"] % 360.0)):
+            slider.blockSignals(True)
+            slider.setValue(int(round(value)))
+            slider.blockSignals(False)
+        self.hdri_exposure_label.setText(f"{preset['exposure']:.2f}")
+        self.hdri_intensity_label.setText(f"{preset['intensity']:.2f}")
+        self.hdri_rotate_label.setText(f"{int(round(preset['rotation'] % 360.0))}°")
+        self.hdri_camera_cb.blockSignals(True)
+        self.hdri_camera_cb.setChecked(preset["camera"])
+        self.hdri_camera_cb.blockSignals(False)
+        self.refresh_light_presets()
+
+    def on_unload_light_preset(self):
+        """删除选中预设的常驻天空球"""
+        preset = self.current_light_preset()
+        if not preset: return
+        run_action("Unload Lighting Preset", unload_lighting_preset, preset["name"])
+        self.refresh_light_presets()
+
+    def on_delete_light_preset(self):
+        """从项目中删除选中的预设，并删除其常驻天空球"""
+        preset = self.current_light_preset()
+        if not preset: return
+        if preset["name"] in resident_preset_domes():
+            run_action("Unload Lighting Preset", unload_lighting_preset, preset["name"])
+        presets = load_lighting_presets()
+        presets.pop(preset["name"], None)
+        save_lighting_presets(presets)
+        self.refresh_light_presets()
+
+    def end_slider_drags(self):
+        """结束所有仍在拖动中的滑块，没有松开事件时撤销块也能关闭"""
+        for coalescer in self.slider_coalescers.values():
+            coalescer.end_drag()
+
+    def on_slider_released(self, coalescer):
+        """拖动结束后显示本次拖动的写入统计"""
+        ticks, writes = coalescer.end_drag()
+        self.hdri_drag_label.setText(f"Last drag: {ticks} updates, {writes} setAttr")
+        self.refresh_diagnostics()
         
     # 透明材质方法
+    def create_map_preview_layout(self, kind):
+        """创建贴图缩略图、路径和最近列表布局"""
+        label, thumb, recent = self.map_widgets[kind]
+        info_layout = QtWidgets.QVBoxLayout()
+        info_layout.addWidget(label)
+        info_layout.addWidget(recent)
+        info_layout.addStretch()
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(thumb)
+        layout.addLayout(info_layout, 1)
+        return layout
+
+    def refresh_recent_maps(self):
+        """刷新最近使用的贴图列表"""
+        recent_maps = load_recent_maps()
+        for kind, (_, _, recent) in self.map_widgets.items():
+            recent.blockSignals(True)
+            recent.clear()
+            recent.addItem("Recent maps...", "")
+            for path in recent_maps[kind]:
+                recent.addItem(os.path.basename(path), path)
+            recent.blockSignals(False)
+
+    def show_map(self, kind):
+        """显示当前贴图路径并异步加载缩略图"""
+        label, thumb, _ = self.map_widgets[kind]
+        path = get_map_path(kind)
+        if not path:
+            label.setText(f"No {kind} map selected")
+            label.setStyleSheet("color: #888888;")
+            thumb.setText("No preview")
+            return
+        label.setText(f"{path}\nAnalyzing opacity..." if kind == "opacity" else path)
+        label.setStyleSheet("color: #2ecc71;")
+        thumb.setText("Loading...")
+        request_thumbnail(path, lambda p, image: self.on_thumbnail_ready(kind, p, image))
+        if kind == "opacity":
+            analyze_opacity_map_async(path, self.on_opacity_analyzed)
+        self.refresh_recent_maps()
+
+    def on_thumbnail_ready(self, kind, path, image):
+        """显示生成好的缩略图"""
+        if path != get_map_path(kind): return
+        try:
+            thumb = self.map_widgets[kind][1]
+            if image is None:
+                thumb.setText("No preview")
+            else:
+                thumb.setPixmap(QtGui.QPixmap.fromImage(image))
+        except RuntimeError:
+            pass
+
+    def on_recent_map(self, kind, index):
+        """从最近列表中选择贴图"""
+        path = self.map_widgets[kind][2].itemData(index)
+        if not path: return
+        set_map_path(kind, path)
+        self.show_map(kind)
+
     def on_select_color_map(self):
         """选择颜色贴图"""
         if select_color_map():
-            self.label_color_path.setText(COLOR_MAP_PATH)
-            self.label_color_path.setStyleSheet("color: #2ecc71;")
-        else:
-            self.label_color_path.setText("No color map selected")
-            self.label_color_path.setStyleSheet("color: #888888;")
+            self.show_map("color")
 
     def on_select_opacity_map(self):
         """选择不透明度贴图"""
         if select_opacity_map():
-            self.label_opacity_path.setText(OPACITY_MAP_PATH)
-            self.label_opacity_path.setStyleSheet("color: #2ecc71;")
-        else:
-            self.label_opacity_path.setText("No opacity map selected")
-            self.label_opacity_path.setStyleSheet("color: #888888;")
+            self.show_map("opacity")
+
+    def on_opacity_analyzed(self, path, result):
+        """显示不透明度分析结果"""
+        if path != OPACITY_MAP_PATH: return
+        try:
+            self.label_opacity_path.setText(f"{path}\n{format_opacity_analysis(result)}")
+        except RuntimeError:
+            pass
 
 # ========================
 # 主函数
@@ -1199,5 +5598,6 @@ try:
 except NameError:
     LOCAL_SCRIPT_PATH = os.path.abspath(sys.argv[0])
 
-# 启动UI
-showUI()
\ No newline at end of file
+# 启动UI（mayapy批处理等无界面环境只加载工具函数）
+if not cmds.about(batch=True):
+    showUI()
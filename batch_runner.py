@@ -0,0 +1,393 @@
+"""3D Assistant Tools 无界面批处理
+
+将多个.ma/.mb场景分配给一组mayapy进程，依次执行天空球HDRI设置、预设材质分配和清理操作。
+工具界面生成LOD代理时也通过run_jobs复用同一个进程池(任务类型"lod")。
+
+示例:
+    python batch_runner.py scenes/*.ma --hdri D:/hdri/studio_4k.exr --preset "Light Gray" --cleanup "Delete History"
+    python batch_runner.py --manifest jobs.json --workers 4 --retries 2
+    python batch_runner.py scenes/*.ma --preset Red --standin     # 使用maya_standin在无Maya环境下测试
+
+清单格式(JSON):
+    {
+        "files": ["a.ma", "b.mb"],
+        "steps": [
+            {"op": "skydome", "hdri": "studio_4k.exr", "exposure": 0.5, "rotation": 90, "camera": true},
+            {"op": "material", "preset": "Light Gray", "targets": "Scene"},
+            {"op": "batch_op", "name": "Delete History", "targets": "Name Pattern", "value": "prop_*"}
+        ],
+        "workers": 4, "retries": 1, "timeout": 900, "output_dir": null, "log_dir": "batch_logs"
+    }
+"""
+import argparse, contextlib, glob, json, os, queue, subprocess, sys, threading, time, traceback
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STANDIN_DIR = os.path.join(SCRIPT_DIR, "maya_standin")
+RESULT_PREFIX = "@@ASSISTANT_RESULT "
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+DEFAULT_TIMEOUT = 900
+
+# ========================
+# 清单
+# ========================
+def build_manifest(args):
+    """根据命令行参数构建任务清单"""
+    manifest = {}
+    if args.manifest:
+        with open(args.manifest, "r") as f:
+            manifest = json.load(f)
+    files = list(manifest.get("files", []))
+    for pattern in args.files:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    steps = list(manifest.get("steps", []))
+    if args.hdri:
+        steps.append({"op": "skydome", "hdri": args.hdri})
+    if args.preset:
+        steps.append({"op": "material", "preset": args.preset, "targets": "Scene"})
+    for name in args.cleanup or []:
+        steps.append({"op": "batch_op", "name": name, "targets": "Scene"})
+
+    manifest.update({
+        "files": [os.path.abspath(f) for f in files],
+        "steps": steps,
+        "workers": args.workers or manifest.get("workers", DEFAULT_WORKERS),
+        "retries": args.retries if args.retries is not None else manifest.get("retries", 1),
+        "timeout": args.timeout or manifest.get("timeout", DEFAULT_TIMEOUT),
+        "output_dir": args.output_dir or manifest.get("output_dir"),
+        "log_dir": os.path.abspath(args.log_dir or manifest.get("log_dir") or "batch_logs"),
+        "save": not args.no_save and manifest.get("save", True)
+    })
+    return manifest
+
+def build_jobs(manifest):
+    """为每个场景文件生成任务"""
+    jobs = []
+    for i, path in enumerate(manifest["files"]):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output = os.path.join(manifest["output_dir"], os.path.basename(path)) if manifest["output_dir"] else path
+        jobs.append({
+            "id": i,
+            "file": path,
+            "steps": manifest["steps"],
+            "save": manifest["save"],
+            "output": os.path.abspath(output),
+            "log": os.path.join(manifest["log_dir"], f"{i:04d}_{stem}.log")
+        })
+    return jobs
+
+# ========================
+# 进程池
+# ========================
+class WorkerProcess:
+    """一个常驻的无界面Maya进程，通过stdin/stdout逐行交换任务和结果"""
+    def __init__(self, command):
+        self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, universal_newlines=True, bufsize=1)
+
+    def run(self, job, timeout):
+        """执行一个任务，进程崩溃或超时返回None"""
+        timer = threading.Timer(timeout, self.proc.kill)
+        timer.start()
+        try:
+            self.proc.stdin.write(json.dumps(job) + "\n")
+            self.proc.stdin.flush()
+            for line in self.proc.stdout:
+                if line.startswith(RESULT_PREFIX):
+                    return json.loads(line[len(RESULT_PREFIX):])
+            return None
+        except (OSError, ValueError):
+            return None
+        finally:
+            timer.cancel()
+
+    def close(self):
+        """关闭进程"""
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=60)
+        except Exception:
+            self.proc.kill()
+
+def worker_command(mayapy=None, standin=False):
+    """构建工作进程命令行"""
+    interpreter = sys.executable if standin else (mayapy or os.environ.get("MAYAPY", "mayapy"))
+    command = [interpreter, os.path.abspath(__file__), "--worker"]
+    if standin:
+        command.append("--standin")
+    return command
+
+def print_progress(done, total, job, result):
+    """输出单个任务的完成状态"""
+    status = "OK" if result["ok"] else "FAILED"
+    print(f"[{done}/{total}] {status} {job['file']} ({result.get('seconds', 0):.1f}s)")
+
+def run_jobs(jobs, command, workers, retries=1, timeout=DEFAULT_TIMEOUT, report=print_progress):
+    """将任务分配给工作进程池，失败的任务重试，按任务顺序返回结果"""
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put((job, 1))
+    results, lock = {}, threading.Lock()
+
+    def worker_loop():
+        worker = None
+        while True:
+            try:
+                job, attempt = pending.get_nowait()
+            except queue.Empty:
+                break
+            worker = worker or WorkerProcess(command)
+            result = worker.run(job, timeout)
+            if result is None:
+                worker.proc.kill()
+                worker = None
+                result = {"id": job["id"], "file": job["file"], "ok": False, "steps": [],
+                          "error": "worker process exited or timed out"}
+            result["attempts"] = attempt
+            if not result["ok"] and attempt <= retries:
+                pending.put((job, attempt + 1))
+                continue
+            with lock:
+                results[job["id"]] = result
+                if report:
+                    report(len(results), len(jobs), job, result)
+        if worker:
+            worker.close()
+
+    threads = [threading.Thread(target=worker_loop) for _ in range(min(workers, len(jobs)))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [results[job["id"]] for job in jobs]
+
+def run_pool(manifest, command):
+    """将清单中的场景分配给工作进程池并收集结果"""
+    ensure_dir(manifest["log_dir"])
+    if manifest["output_dir"]:
+        ensure_dir(manifest["output_dir"])
+    start = time.time()
+    results = run_jobs(build_jobs(manifest), command, manifest["workers"], manifest["retries"], manifest["timeout"])
+    return results, time.time() - start
+
+def write_summary(manifest, results, elapsed):
+    """输出并保存批处理汇总"""
+    failed = [r for r in results if not r["ok"]]
+    summary = {
+        "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": round(elapsed, 2),
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "retried": sum(1 for r in results if r["attempts"] > 1),
+        "results": results
+    }
+    with open(os.path.join(manifest["log_dir"], "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    with open(os.path.join(manifest["log_dir"], "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"\n{summary['succeeded']}/{summary['total']} succeeded, {summary['failed']} failed, "
+          f"{summary['retried']} retried in {summary['seconds']}s")
+    for r in failed:
+        print(f"  FAILED {r['file']}: {r.get('error', '')}")
+    print(f"Logs: {manifest['log_dir']}")
+    return summary
+
+def ensure_dir(path):
+    """确保目录存在"""
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# ========================
+# 工作进程
+# ========================
+@contextlib.contextmanager
+def redirect_output(log_path):
+    """将进程级stdout/stderr（包括Maya输出）重定向到日志文件"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    with open(log_path, "a") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+
+def init_maya(standin):
+    """初始化无界面Maya并导入工具脚本"""
+    if standin:
+        sys.path.insert(0, STANDIN_DIR)
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    from maya import cmds
+    try:
+        cmds.loadPlugin("mtoa", quiet=True)
+    except RuntimeError as e:
+        sys.stderr.write(f"Failed to load mtoa: {e}\n")
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    import Assistant_tool
+    return Assistant_tool
+
+def step_skydome(tool, step):
+    """设置HDRI天空球"""
+    tool.connect_file_to_skydome(step["hdri"])
+    if "exposure" in step: tool.set_skydome_attr("aiExposure", step["exposure"])
+    if "intensity" in step: tool.set_skydome_attr("intensity", step["intensity"])
+    if "rotation" in step: tool.set_skydome_rotation(step["rotation"])
+    if "camera" in step: tool.set_skydome_camera(step["camera"])
+
+def step_material(tool, step):
+    """为目标网格分配预设或自定义颜色材质"""
+    if "rgb" in step:
+        color_info = {"name": step.get("preset") or "Custom", "rgb": tuple(step["rgb"])}
+    else:
+        color_info = next((c for c in tool.COLOR_PRESETS if c["name"] == step["preset"]), None)
+        if color_info is None:
+            raise ValueError(f"Unknown color preset: {step['preset']}")
+    meshes = tool.resolve_batch_targets(step.get("targets", "Scene"), step.get("value", ""))
+    if not meshes: return {"meshes": 0}
+    tool.cmds.select(meshes, replace=True)
+    tool.assign_material_to_selection(color_info)
+    return {"meshes": len(meshes)}
+
+def step_batch_op(tool, step):
+    """对目标网格执行已注册的建模操作"""
+    meshes = tool.resolve_batch_targets(step.get("targets", "Scene"), step.get("value", ""))
+    result = tool.run_batch_op(step["name"], meshes) if meshes else {"processed": 0, "errors": []}
+    return {"meshes": result["processed"], "errors": result["errors"]}
+
+STEP_HANDLERS = {
+    "skydome": step_skydome,
+    "material": step_material,
+    "batch_op": step_batch_op
+}
+# 这些步骤自己划分撤销块(失败时回滚)，不能再套run_action的外层撤销块
+SELF_UNDO_STEPS = {"batch_op"}
+
+def run_job(tool, job):
+    """在当前Maya进程中处理一个场景文件"""
+    cmds = tool.cmds
+    result = {"id": job["id"], "file": job["file"], "ok": False, "steps": []}
+    start = time.perf_counter()
+    ensure_dir(os.path.dirname(job["log"]))
+    with redirect_output(job["log"]):
+        print(f"[{time.strftime('%H:%M:%S')}] open {job['file']}")
+        try:
+            cmds.file(job["file"], open=True, force=True)
+            for step in job["steps"]:
+                handler = STEP_HANDLERS.get(step["op"])
+                if handler is None:
+                    raise ValueError(f"Unknown step: {step['op']}")
+                step_start = time.perf_counter()
+                info = tool.run_action(f"Batch {step['op']}", handler, tool, step,
+                                       undo_chunk=step["op"] not in SELF_UNDO_STEPS) or {}
+                info.update({"op": step["op"], "seconds": round(time.perf_counter() - step_start, 3)})
+                result["steps"].append(info)
+                print(f"  {step['op']}: {info}")
+            if job["save"]:
+                if os.path.abspath(job["output"]) != os.path.abspath(job["file"]):
+                    ensure_dir(os.path.dirname(job["output"]))
+                    cmds.file(rename=job["output"])
+                file_type = "mayaBinary" if job["output"].lower().endswith(".mb") else "mayaAscii"
+                cmds.file(save=True, force=True, type=file_type)
+                print(f"  saved {job['output']}")
+            result["ok"] = True
+        except Exception as e:
+            traceback.print_exc()
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["actions"] = {name: list(history)[-1] for name, history in tool.ACTION_HISTORY.items() if history}
+    tool.ACTION_HISTORY.clear()
+    return result
+
+def run_lod_job(tool, job):
+    """从导出的网格文件生成各比例的减面结果"""
+    result = {"id": job["id"], "file": job["file"], "ok": False, "steps": []}
+    start = time.perf_counter()
+    ensure_dir(os.path.dirname(job["log"]))
+    with redirect_output(job["log"]):
+        print(f"[{time.strftime('%H:%M:%S')}] reduce {job['file']}")
+        try:
+            data = tool.read_mesh_file(job["file"])
+            for ratio, output in job["outputs"]:
+                step_start = time.perf_counter()
+                reduced = tool.reduce_mesh_data(data, ratio)
+                tool.write_mesh_file(output, reduced)
+                info = {"op": "lod", "ratio": ratio, "faces": len(reduced["counts"]),
+                        "seconds": round(time.perf_counter() - step_start, 3)}
+                result["steps"].append(info)
+                print(f"  lod: {info}")
+            result["ok"] = True
+        except Exception as e:
+            traceback.print_exc()
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+JOB_HANDLERS = {
+    "scene": run_job,
+    "lod": run_lod_job
+}
+
+def worker_main(standin):
+    """工作进程主循环：逐行读取任务，输出带前缀的结果"""
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    tool = init_maya(standin)
+    for line in sys.stdin:
+        if not line.strip(): continue
+        job = json.loads(line)
+        try:
+            result = JOB_HANDLERS[job.get("kind", "scene")](tool, job)
+        except Exception as e:
+            result = {"id": job.get("id"), "file": job.get("file"), "ok": False, "steps": [], "error": str(e)}
+        protocol.write(RESULT_PREFIX + json.dumps(result) + "\n")
+        protocol.flush()
+
+# ========================
+# 主函数
+# ========================
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="Run 3D Assistant Tools operations over many Maya scene files.")
+    parser.add_argument("files", nargs="*", help="scene files or glob patterns (.ma/.mb)")
+    parser.add_argument("--manifest", help="JSON job manifest")
+    parser.add_argument("--hdri", help="HDRI image to connect to the skydome light")
+    parser.add_argument("--preset", help="color preset to assign to all meshes")
+    parser.add_argument("--cleanup", action="append", help="registered batch op to run on all meshes (repeatable)")
+    parser.add_argument("--workers", type=int, help=f"number of mayapy processes (default {DEFAULT_WORKERS})")
+    parser.add_argument("--retries", type=int, help="retries per failed file (default 1)")
+    parser.add_argument("--timeout", type=int, help=f"seconds per file before the worker is killed (default {DEFAULT_TIMEOUT})")
+    parser.add_argument("--output-dir", help="save results here instead of overwriting the input files")
+    parser.add_argument("--log-dir", help="directory for per-file logs, manifest and summary")
+    parser.add_argument("--no-save", action="store_true", help="do not save the processed scenes")
+    parser.add_argument("--mayapy", help="mayapy executable (default: $MAYAPY or mayapy on PATH)")
+    parser.add_argument("--standin", action="store_true", help="run against maya_standin instead of Maya")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        worker_main(args.standin)
+        return 0
+    manifest = build_manifest(args)
+    if not manifest["files"]:
+        print("No scene files given.")
+        return 2
+    if not manifest["steps"]:
+        print("No steps given (use --hdri, --preset, --cleanup or a manifest).")
+        return 2
+    results, elapsed = run_pool(manifest, worker_command(args.mayapy, args.standin))
+    summary = write_summary(manifest, results, elapsed)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
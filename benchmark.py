@@ -0,0 +1,230 @@
+"""3D Assistant Tools 替身环境基准测试
+
+在maya_standin的内存场景中按递增规模构建合成网格、材质和相机快照，执行工具函数并统计
+cmds/mel调用次数和耗时。调用次数超过预算、随规模增长(即对DCC的调用是O(n))或最大规模
+下耗时超过预算时返回非零退出码。
+
+示例:
+    python benchmark.py
+    python benchmark.py --scales 10 50 200 --time-factor 3 --json bench.json
+    python benchmark.py --only "Merge to Center" "Detach Faces"
+"""
+import argparse, json, os, sys, time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STANDIN_DIR = os.path.join(SCRIPT_DIR, "maya_standin")
+DEFAULT_SCALES = [10, 40, 160]
+BENCHMARKS = {}
+
+def register_benchmark(name, setup, max_calls, max_ms):
+    """注册基准测试
+
+    setup(tool, n): 在新场景中按规模n构建数据，返回要计时的无参函数
+    max_calls: 任意规模下cmds和mel调用次数之和的上限
+    max_ms: 最大规模下的耗时上限(毫秒)，可用--time-factor整体放宽
+    """
+    BENCHMARKS[name] = {"setup": setup, "max_calls": max_calls, "max_ms": max_ms}
+
+# ========================
+# 场景构建
+# ========================
+def build_grid(n, name="grid"):
+    """创建n x n个四边面的平面网格"""
+    from maya import _scene
+    return _scene.SCENE.create_mesh(*_scene.grid_mesh(n, n), name=name).name
+
+def build_cubes(n, prefix="prop"):
+    """创建n个互相分开的立方体"""
+    from maya import _scene
+    points, counts, verts = _scene.cube_mesh()
+    names = []
+    for i in range(n):
+        offset = [(x + i * 2.0, y, z) for x, y, z in points]
+        names.append(_scene.SCENE.create_mesh(offset, counts, verts, name=f"{prefix}_{i}").name)
+    return names
+
+def build_shells(n):
+    """创建包含n个立方体壳的单个网格"""
+    from maya import _scene
+    points, counts, verts = _scene.cube_mesh()
+    all_points, all_counts, all_verts = [], [], []
+    for i in range(n):
+        base = len(all_points)
+        all_points.extend((x + i * 2.0, y, z) for x, y, z in points)
+        all_counts.extend(counts)
+        all_verts.extend(base + v for v in verts)
+    return _scene.SCENE.create_mesh(all_points, all_counts, all_verts, name="shells").name
+
+def build_cameras(tool, n):
+    """创建n个相机并为每个相机保存一个快照"""
+    from maya import cmds
+    store = tool.CameraSnapshotStore()
+    store.loaded_scene = cmds.file(query=True, sceneName=True)
+    for i in range(n):
+        camera = cmds.camera()[0]
+        cmds.setAttr(f"{camera}.translate", float(i), 2.0, 10.0)
+        cmds.setAttr(f"{camera}.rotate", -10.0, float(i * 7 % 360), 0.0)
+        store.snapshots[f"{camera}_Snapshot1"] = {"camera": camera, "state": tool.capture_camera_state(camera)}
+    return store
+
+# ========================
+# 基准测试
+# ========================
+def setup_merge_to_center(tool, n):
+    from maya import cmds
+    grid = build_grid(n)
+    cmds.select(f"{grid}.vtx[0:{n}]", f"{grid}.f[{n}:{2 * n - 1}]")
+    return tool.universal_merge_to_center
+
+def setup_target_weld(tool, n):
+    from maya import cmds
+    grid = build_grid(n)
+    cmds.select(f"{grid}.vtx[0]", f"{grid}.vtx[{n}]")
+    return tool.target_weld
+
+def setup_detach_faces(tool, n):
+    from maya import cmds
+    grid = build_grid(n)
+    cmds.select(f"{grid}.f[0:{n * n // 2 - 1}]")
+    return tool.detach_selected_faces
+
+def setup_separate_objects(tool, n):
+    from maya import cmds
+    cmds.select(build_shells(n))
+    return tool.separate_objects
+
+def setup_combine_objects(tool, n):
+    from maya import cmds
+    cmds.select(build_cubes(n))
+    return tool.combine_objects
+
+def setup_assign_material(tool, n):
+    from maya import cmds
+    cmds.select(build_cubes(n))
+    return lambda: tool.assign_material_to_selection(tool.COLOR_PRESETS[0])
+
+def setup_material_rules(tool, n):
+    build_cubes(n)
+    build_cubes(n, prefix="hero")
+    rules = [{"match": "Name", "pattern": "^prop_", "preset": tool.COLOR_PRESETS[1]["name"]},
+             {"match": "Name", "pattern": "^hero_", "preset": tool.COLOR_PRESETS[2]["name"]}]
+    return lambda: tool.apply_material_rules(rules)
+
+def setup_purge_materials(tool, n):
+    for i in range(n):
+        tool.get_or_create_arnold_material(tool.custom_color_info((i / n, 0.5, 1.0 - i / n)))
+    return lambda: tool.purge_orphaned_shading_networks()
+
+def setup_save_snapshots(tool, n):
+    from maya import cmds
+    store = build_cameras(tool, n)
+    camera = cmds.camera()[0]
+    return lambda: store.add(camera, tool.capture_camera_state(camera))
+
+def setup_restore_snapshots(tool, n):
+    store = build_cameras(tool, n)
+    snapshots = [store.get(name) for name in store.names()]
+    return lambda: tool.apply_camera_states(snapshots)
+
+def setup_bake_snapshots(tool, n):
+    store = build_cameras(tool, 4)
+    snapshots = [store.get(name) for name in store.names()]
+    return lambda: tool.bake_camera_snapshots(snapshots, 1, n * 10)
+
+def setup_scatter(tool, n):
+    grid = build_grid(20)
+    return lambda: tool.scatter_primitive("polyCube", [grid], n * 100, sampling="Poisson Disk", align_to_normal=True)
+
+register_benchmark("Merge to Center", setup_merge_to_center, 10, 2000)
+register_benchmark("Target Weld", setup_target_weld, 8, 1000)
+register_benchmark("Detach Faces", setup_detach_faces, 10, 3000)
+register_benchmark("Separate Objects", setup_separate_objects, 8, 2000)
+register_benchmark("Combine Objects", setup_combine_objects, 8, 2000)
+register_benchmark("Assign Material", setup_assign_material, 16, 500)
+register_benchmark("Material Rules", setup_material_rules, 32, 1000)
+register_benchmark("Purge Materials", setup_purge_materials, 6, 1000)
+register_benchmark("Save Snapshot", setup_save_snapshots, 6, 500)
+register_benchmark("Restore Snapshots", setup_restore_snapshots, 2, 1000)
+register_benchmark("Bake Snapshots", setup_bake_snapshots, 4, 1000)
+register_benchmark("Scatter Instances", setup_scatter, 14, 3000)
+
+# ========================
+# 执行与报告
+# ========================
+def init_tool():
+    """在替身环境中导入工具脚本"""
+    sys.path.insert(0, STANDIN_DIR)
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import Assistant_tool
+    # 和Maya会话中一样，新建场景时清空工具的场景缓存
+    Assistant_tool.add_scene_callbacks()
+    return Assistant_tool
+
+def measure(tool, name, n):
+    """在新场景中执行一次基准测试，返回调用次数和耗时"""
+    from maya import cmds, mel
+    cmds.file(new=True, force=True)
+    run = BENCHMARKS[name]["setup"](tool, n)
+    cmds.reset_calls()
+    del mel.CALLS[:]
+    start = time.perf_counter()
+    run()
+    elapsed = (time.perf_counter() - start) * 1000.0
+    counts = cmds.call_counts()
+    return {"n": n, "ms": elapsed, "cmds": sum(counts.values()), "mel": len(mel.CALLS), "commands": counts}
+
+def check(name, runs, time_factor):
+    """检查调用预算、调用次数随规模的增长和最大规模的耗时"""
+    bench, failures = BENCHMARKS[name], []
+    for run in runs:
+        calls = run["cmds"] + run["mel"]
+        if calls > bench["max_calls"]:
+            failures.append(f"n={run['n']}: {calls} DCC calls exceeds budget {bench['max_calls']}")
+    first, last = runs[0], runs[-1]
+    if last["cmds"] + last["mel"] > first["cmds"] + first["mel"]:
+        failures.append(f"DCC calls grow with scale: {first['cmds'] + first['mel']} at n={first['n']}, "
+                        f"{last['cmds'] + last['mel']} at n={last['n']}")
+    limit = bench["max_ms"] * time_factor
+    if last["ms"] > limit:
+        failures.append(f"n={last['n']}: {last['ms']:.1f} ms exceeds budget {limit:.0f} ms")
+    return failures
+
+def run_benchmarks(names, scales, time_factor):
+    """按规模依次执行基准测试"""
+    tool = init_tool()
+    results = []
+    for name in names:
+        runs = [measure(tool, name, n) for n in scales]
+        failures = check(name, runs, time_factor)
+        results.append({"name": name, "runs": runs, "failures": failures})
+        line = "  ".join(f"n={r['n']}: {r['cmds'] + r['mel']:>3} calls {r['ms']:>8.2f} ms" for r in runs)
+        print(f"{'FAIL' if failures else 'ok  '} {name:<20} {line}")
+        for failure in failures:
+            print(f"       {failure}")
+    return results
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="Benchmark 3D Assistant Tools operations against maya_standin.")
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES, help="problem sizes, smallest first")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--time-factor", type=float, default=1.0, help="multiply every wall time budget")
+    parser.add_argument("--json", help="write results to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    scales = sorted(args.scales)
+    results = run_benchmarks(args.only or list(BENCHMARKS), scales, args.time_factor)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scales": scales, "results": results}, f, indent=2)
+    failed = [r["name"] for r in results if r["failures"]]
+    print(f"{len(results) - len(failed)}/{len(results)} benchmarks within budget")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+"""PySide2.QtWidgets的替身模块"""
+from PySide2 import module_getattr as __getattr__
@@ -0,0 +1,25 @@
+"""PySide2的最小替身，只用于在无Qt环境中导入工具脚本"""
+
+
+class _StandInMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"): raise AttributeError(name)
+        return StandIn
+
+
+class StandIn(metaclass=_StandInMeta):
+    """任意Qt类、常量或信号的占位对象"""
+    def __init__(self, *args, **kwargs): pass
+    def __getattr__(self, name):
+        if name.startswith("__"): raise AttributeError(name)
+        return StandIn()
+    def __call__(self, *args, **kwargs): return StandIn()
+    def __or__(self, other): return self
+    __xor__ = __and__ = __ror__ = __or__
+    def __bool__(self): return False
+    def __iter__(self): return iter(())
+
+
+def module_getattr(name):
+    if name.startswith("__"): raise AttributeError(name)
+    return StandIn
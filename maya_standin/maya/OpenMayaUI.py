@@ -0,0 +1,8 @@
+"""maya.OpenMayaUI的替身模块"""
+
+
+class MQtUtil(object):
+    """无界面环境没有主窗口"""
+    @staticmethod
+    def mainWindow():
+        return None
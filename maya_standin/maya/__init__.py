@@ -0,0 +1 @@
+"""无Maya环境下使用的maya替身包"""
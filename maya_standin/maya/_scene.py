@@ -0,0 +1,420 @@
+"""无Maya环境下的内存场景模型"""
+import copy, fnmatch, os, re
+
+SHAPE_TYPES = {"mesh", "camera", "aiSkyDomeLight", "areaLight", "directionalLight", "pointLight", "spotLight"}
+LIGHT_TYPES = {"aiSkyDomeLight", "areaLight", "directionalLight", "pointLight", "spotLight"}
+
+
+# 已加载插件注册的命令
+PLUGIN_COMMANDS = {}
+# 撤销按块模拟：最外层块打开时记录场景，撤销时恢复。API修改不进入Maya的撤销队列，
+# 撤销时在恢复的场景上重放；块内调用的可撤销插件命令再按相反顺序撤销
+UNDO = {"state": True, "depth": 0, "open": None, "queue": [], "names": []}
+
+
+def untracked_edit(apply, ops):
+    """执行不进入撤销队列的API修改"""
+    apply(ops)
+    if UNDO["open"] is not None:
+        UNDO["open"]["replay"].append((apply, list(ops)))
+
+
+def undoable_command(command):
+    """记录块内执行的可撤销插件命令"""
+    if UNDO["open"] is not None and command.isUndoable():
+        UNDO["open"]["commands"].append(command)
+
+
+class Node(object):
+    """场景节点"""
+    __slots__ = ("name", "type", "parent", "attrs", "members", "data")
+
+    def __init__(self, name, node_type, parent=None):
+        self.name, self.type, self.parent = name, node_type, parent
+        self.attrs = {}
+        self.members = []
+        self.data = {}
+
+
+class Scene(object):
+    """节点、属性、连接和选择的内存模型"""
+    def __init__(self):
+        self.callbacks = {}
+        self.reset()
+
+    def notify(self, message, *args):
+        """触发已注册的场景消息回调"""
+        for func, client_data in list(self.callbacks.get(message, {}).values()):
+            func(*(args + (client_data,)))
+
+    def reset(self, scene_name=""):
+        """清空场景"""
+        self.nodes = {}
+        self.connections = {}
+        self.selection = []
+        self.scene_name = scene_name
+        self.modified = False
+        for name, node_type in (("initialShadingGroup", "shadingEngine"), ("lambert1", "lambert"),
+                                ("hardwareRenderingGlobals", "hardwareRenderingGlobals"), ("time1", "time")):
+            self.nodes[name] = Node(name, node_type)
+
+    def snapshot(self):
+        """复制节点内容、连接和选择，用于模拟撤销块"""
+        nodes = {name: (node, node.name, node.type, node.parent,
+                        copy.deepcopy(node.attrs), copy.deepcopy(node.members), copy.deepcopy(node.data))
+                 for name, node in self.nodes.items()}
+        return nodes, copy.deepcopy(self.connections), list(self.selection), self.modified
+
+    def restore(self, state):
+        """恢复snapshot记录的状态，节点对象保持不变，已有的句柄和回调仍然有效"""
+        nodes, self.connections, self.selection, self.modified = state
+        self.nodes = {}
+        for name, (node, node_name, node_type, parent, attrs, members, data) in nodes.items():
+            node.name, node.type, node.parent = node_name, node_type, parent
+            node.attrs, node.members, node.data = attrs, members, data
+            self.nodes[name] = node
+
+    # 名称处理
+    @staticmethod
+    def leaf(name):
+        """获取DAG路径的叶子名称，去掉组件和属性后缀"""
+        return str(name).split(".")[0].split("|")[-1]
+
+    def unique_name(self, name):
+        """生成场景内唯一的节点名"""
+        name = name.replace("(", "_").replace(")", "_").replace(",", "_").replace(" ", "_").replace(".", "_")
+        if name not in self.nodes: return name
+        stem = re.sub(r"\d+$", "", name)
+        i = 1
+        while f"{stem}{i}" in self.nodes:
+            i += 1
+        return f"{stem}{i}"
+
+    def get(self, name):
+        """按名称获取节点"""
+        return self.nodes.get(self.leaf(name))
+
+    def full_path(self, node):
+        """获取节点的完整DAG路径"""
+        if node.parent is None:
+            return ("|" + node.name) if node.type == "transform" or node.type in SHAPE_TYPES else node.name
+        parts = [node.name]
+        while node.parent is not None:
+            node = self.nodes[node.parent]
+            parts.append(node.name)
+        return "|" + "|".join(reversed(parts))
+
+    def format(self, node, long=False):
+        """按需返回完整路径或短名称"""
+        return self.full_path(node) if long else node.name
+
+    # 节点操作
+    def create(self, node_type, name=None, parent=None):
+        """创建节点"""
+        node = Node(self.unique_name(name or f"{node_type}1"), node_type, self.leaf(parent) if parent else None)
+        self.nodes[node.name] = node
+        self.modified = True
+        self.notify("nodeAdded", node)
+        return node
+
+    def dirty(self, node, attr):
+        """通知节点及其形状子节点的属性已变化"""
+        self.notify("attributeChanged", node, attr)
+        self.notify("nodeDirty", node, attr)
+        if node.type == "transform":
+            for child in self.children(node):
+                if child.type != "transform":
+                    self.notify("nodeDirty", child, "worldMatrix")
+
+    def create_dag(self, shape_type, name=None, transform_name=None):
+        """创建变换节点及其形状节点"""
+        transform = self.create("transform", transform_name or re.sub(r"Shape(\d*)$", r"\1", name or shape_type) or shape_type)
+        shape = self.create(shape_type, name or f"{transform.name}Shape", transform.name)
+        return transform, shape
+
+    def children(self, node):
+        """获取直接子节点"""
+        return [n for n in self.nodes.values() if n.parent == node.name]
+
+    def descendants(self, node):
+        """获取全部子孙节点"""
+        result, stack = [], self.children(node)
+        while stack:
+            child = stack.pop(0)
+            result.append(child)
+            stack.extend(self.children(child))
+        return result
+
+    def delete(self, node):
+        """删除节点及其子节点和相关连接"""
+        for child in self.children(node):
+            self.delete(child)
+        self.nodes.pop(node.name, None)
+        prefix = node.name + "."
+        self.connections = {d: s for d, s in self.connections.items() if not d.startswith(prefix) and not s.startswith(prefix)}
+        for other in self.nodes.values():
+            other.members = [m for m in other.members if self.leaf(m) != node.name]
+        self.selection = [s for s in self.selection if self.leaf(s) != node.name]
+        self.modified = True
+        self.notify("nodeRemoved", node)
+
+    def rename(self, node, new_name):
+        """重命名节点"""
+        old = node.name
+        if self.leaf(new_name) == old: return old
+        new_name = self.unique_name(self.leaf(new_name))
+        del self.nodes[old]
+        node.name = new_name
+        self.nodes[new_name] = node
+        for other in self.nodes.values():
+            if other.parent == old:
+                other.parent = new_name
+            other.members = [new_name + m[len(old):] if self.leaf(m) == old else m for m in other.members]
+        rewrite = lambda plug: new_name + plug[len(old):] if plug.split(".")[0] == old else plug
+        self.connections = {rewrite(d): rewrite(s) for d, s in self.connections.items()}
+        self.notify("nameChanged", node, old)
+        return new_name
+
+    def match(self, pattern):
+        """按通配符匹配节点"""
+        leaf = self.leaf(pattern)
+        if any(c in leaf for c in "*?["):
+            return [n for n in self.nodes.values() if fnmatch.fnmatchcase(n.name, leaf)]
+        node = self.nodes.get(leaf)
+        return [node] if node else []
+
+    def shading_engine_of(self, name):
+        """获取对象所在的着色组"""
+        leaf = self.leaf(name)
+        for node in self.nodes.values():
+            if node.type == "shadingEngine" and any(self.leaf(m) == leaf for m in node.members):
+                return node
+        return None
+
+    # 文件读写
+    def load(self, path):
+        """从.ma文件读取节点、字符串和数值属性以及连接，.mb文件只重置场景"""
+        self.reset(os.path.abspath(path))
+        if not path.lower().endswith(".ma"): return
+        with open(path, "r", errors="replace") as f:
+            text = "\n".join(line for line in f if not line.lstrip().startswith("//"))
+        current, statements, tokens = None, [], []
+        for token in re.findall(r'"(?:[^"\\]|\\.)*"|;|[^\s;]+', text):
+            if token == ";":
+                statements.append(tokens)
+                tokens = []
+            else:
+                tokens.append(re.sub(r'\\(.)', r'\1', token[1:-1]) if token.startswith('"') else token)
+        for tokens in statements:
+            if not tokens: continue
+            if tokens[0] == "createNode":
+                name = tokens[tokens.index("-n") + 1] if "-n" in tokens else None
+                parent = tokens[tokens.index("-p") + 1] if "-p" in tokens else None
+                current = self.nodes.get(name) or self.create(tokens[1], name, parent)
+            elif tokens[:3] == ["sets", "-e", "-fe"] and len(tokens) >= 5 and tokens[3] in self.nodes:
+                self.nodes[tokens[3]].members.extend(tokens[4:])
+            elif tokens[0] == "setAttr" and current is not None and "-type" in tokens and len(tokens) >= 5:
+                current.attrs[tokens[-4].lstrip(".")] = tokens[-1]
+            elif tokens[0] == "setAttr" and current is not None and len(tokens) >= 3 and tokens[1].startswith("."):
+                try:
+                    values = tuple(float(t) for t in tokens[2:])
+                except ValueError:
+                    continue
+                current.attrs[tokens[1].lstrip(".")] = values[0] if len(values) == 1 else values
+            elif tokens[0] == "connectAttr" and len(tokens) >= 3:
+                plugs = [t for t in tokens[1:] if not t.startswith("-")]
+                self.connections[plugs[1].lstrip(":")] = plugs[0].lstrip(":")
+        self.modified = False
+
+    def save(self, path):
+        """将场景写为最小的.ma文件"""
+        lines = ["//Maya ASCII scene written by maya_standin", "requires maya \"standin\";"]
+        for node in self.nodes.values():
+            parent = f" -p \"{node.parent}\"" if node.parent else ""
+            lines.append(f"createNode {node.type} -n \"{node.name}\"{parent};")
+            for attr, value in node.attrs.items():
+                if isinstance(value, str):
+                    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+                    lines.append(f"\tsetAttr \".{attr}\" -type \"string\" \"{escaped}\";")
+                elif isinstance(value, (int, float, tuple)) and not isinstance(value, bool):
+                    values = value if isinstance(value, tuple) else (value,)
+                    lines.append(f"\tsetAttr \".{attr}\" " + " ".join(repr(float(v)) for v in values) + ";")
+        for dst, src in self.connections.items():
+            lines.append(f"connectAttr \"{src}\" \"{dst}\";")
+        for node in self.nodes.values():
+            if node.members:
+                lines.append(f"sets -e -fe \"{node.name}\" " + " ".join(f"\"{m}\"" for m in node.members) + ";")
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        self.scene_name = os.path.abspath(path)
+        self.modified = False
+
+    # 网格
+    def mesh_shape(self, name):
+        """获取变换节点、形状节点或组件所属的网格形状"""
+        node = self.get(name)
+        if node is None: return None
+        if node.type == "transform":
+            node = next((c for c in self.children(node) if c.type == "mesh"), None)
+        return node if node is not None and node.type == "mesh" else None
+
+    def create_mesh(self, points, counts, verts, name="polySurface1", parent=None):
+        """创建带网格数据的变换节点和形状节点，返回变换节点"""
+        transform = self.create("transform", name, parent)
+        shape = self.create("mesh", f"{transform.name}Shape", transform.name)
+        set_mesh(shape, points, counts, verts)
+        return transform
+
+
+def grid_mesh(rows, cols, size=1.0, origin=(0.0, 0.0, 0.0)):
+    """生成rows x cols个四边面的平面网格数据"""
+    ox, oy, oz = origin
+    points = [(ox + c * size, oy, oz + r * size) for r in range(rows + 1) for c in range(cols + 1)]
+    counts, verts = [4] * (rows * cols), []
+    for r in range(rows):
+        for c in range(cols):
+            a = r * (cols + 1) + c
+            verts.extend((a, a + 1, a + cols + 2, a + cols + 1))
+    return points, counts, verts
+
+
+def cube_mesh(size=1.0):
+    """生成立方体网格数据"""
+    h = size * 0.5
+    points = [(x, y, z) for z in (h, -h) for y in (-h, h) for x in (-h, h)]
+    faces = [(0, 1, 3, 2), (2, 3, 7, 6), (6, 7, 5, 4), (4, 5, 1, 0), (1, 5, 7, 3), (4, 0, 2, 6)]
+    return points, [4] * len(faces), [v for face in faces for v in face]
+
+
+def set_mesh(shape, points, counts, verts):
+    """写入网格数据并清除派生的边缓存"""
+    shape.data["points"] = [tuple(p) for p in points]
+    shape.data["counts"] = list(counts)
+    shape.data["verts"] = list(verts)
+    shape.attrs.setdefault("displaySmoothMesh", 0)
+    shape.attrs.setdefault("visibility", True)
+    shape.data.pop("edges", None)
+    SCENE.dirty(shape, "inMesh")
+
+
+def mesh_faces(shape):
+    """按面返回顶点索引列表"""
+    verts, faces, offset = shape.data.get("verts", []), [], 0
+    for count in shape.data.get("counts", []):
+        faces.append(verts[offset:offset + count])
+        offset += count
+    return faces
+
+
+def mesh_edges(shape):
+    """按首次出现顺序返回边的顶点对，结果缓存在形状节点上"""
+    edges = shape.data.get("edges")
+    if edges is None:
+        edges, seen = [], {}
+        for face in mesh_faces(shape):
+            for i, a in enumerate(face):
+                key = (min(a, face[i - 1]), max(a, face[i - 1]))
+                if key not in seen:
+                    seen[key] = len(edges)
+                    edges.append(key)
+        shape.data["edges"] = edges
+    return edges
+
+
+def component_count(shape, kind):
+    """获取网格某类组件的数量"""
+    if kind == "vtx": return len(shape.data.get("points", []))
+    if kind == "f": return len(shape.data.get("counts", []))
+    return len(mesh_edges(shape))
+
+
+def compact_mesh(points, faces):
+    """去掉未使用的顶点并重新编号"""
+    remap, new_points, counts, verts = {}, [], [], []
+    for face in faces:
+        for v in face:
+            if v not in remap:
+                remap[v] = len(new_points)
+                new_points.append(points[v])
+        counts.append(len(face))
+        verts.extend(remap[v] for v in face)
+    return new_points, counts, verts
+
+
+def remove_faces(shape, face_ids):
+    """删除指定的面以及不再使用的顶点"""
+    face_ids = set(face_ids)
+    keep = [f for i, f in enumerate(mesh_faces(shape)) if i not in face_ids]
+    set_mesh(shape, *compact_mesh(shape.data["points"], keep))
+
+
+def merge_vertices(shape, vertex_ids, distance):
+    """合并指定顶点中距离不超过distance的顶点，去掉退化的面"""
+    points, target, cells = shape.data["points"], {}, {}
+    step = max(distance, 1e-12)
+    for v in sorted(vertex_ids):
+        key = tuple(int(round(c / step)) for c in points[v])
+        target[v] = cells.setdefault(key, v)
+    faces = []
+    for face in mesh_faces(shape):
+        merged = []
+        for v in face:
+            v = target.get(v, v)
+            if not merged or merged[-1] != v: merged.append(v)
+        if len(merged) > 1 and merged[0] == merged[-1]: merged.pop()
+        if len(set(merged)) >= 3: faces.append(merged)
+    set_mesh(shape, *compact_mesh(points, faces))
+
+
+def reduce_mesh(shape, ratio):
+    """按体素聚类合并顶点，使顶点数接近原来的ratio倍，去掉退化和重复的面"""
+    points = shape.data.get("points", [])
+    if not points or ratio >= 1.0: return
+    lo = [min(p[i] for p in points) for i in range(3)]
+    extent = max(max(p[i] for p in points) - lo[i] for i in range(3)) or 1.0
+    # 网格是曲面，占用的体素数约为每轴格数的平方
+    step = extent / max(1, int(round((len(points) * ratio) ** 0.5)))
+    cells, sums, target = {}, [], []
+    for p in points:
+        key = tuple(int((p[i] - lo[i]) / step) for i in range(3))
+        index = cells.setdefault(key, len(sums))
+        if index == len(sums): sums.append([0.0, 0.0, 0.0, 0])
+        total = sums[index]
+        total[0] += p[0]; total[1] += p[1]; total[2] += p[2]; total[3] += 1
+        target.append(index)
+    merged_points = [(x / n, y / n, z / n) for x, y, z, n in sums]
+    faces, seen = [], set()
+    for face in mesh_faces(shape):
+        merged = []
+        for v in face:
+            v = target[v]
+            if not merged or merged[-1] != v: merged.append(v)
+        if len(merged) > 1 and merged[0] == merged[-1]: merged.pop()
+        key = frozenset(merged)
+        if len(key) >= 3 and key not in seen:
+            seen.add(key)
+            faces.append(merged)
+    set_mesh(shape, *compact_mesh(merged_points, faces))
+
+
+def mesh_shells(shape):
+    """按顶点连通性将面分组"""
+    faces = mesh_faces(shape)
+    root = list(range(len(shape.data.get("points", []))))
+    def find(v):
+        while root[v] != v:
+            root[v] = root[root[v]]
+            v = root[v]
+        return v
+    for face in faces:
+        a = find(face[0])
+        for v in face[1:]:
+            b = find(v)
+            if a != b: root[b] = a
+    shells = {}
+    for i, face in enumerate(faces):
+        shells.setdefault(find(face[0]), []).append(i)
+    return list(shells.values())
+
+
+SCENE = Scene()
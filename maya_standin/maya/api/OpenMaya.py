@@ -0,0 +1,546 @@
+"""maya.api.OpenMaya的替身模块"""
+from maya import _scene
+from maya._scene import SCENE
+
+
+_callback_ids = [0]
+
+
+def _add_callback(message, func, client_data=None):
+    """在替身场景中注册回调并返回编号"""
+    _callback_ids[0] += 1
+    SCENE.callbacks.setdefault(message, {})[_callback_ids[0]] = (func, client_data)
+    return _callback_ids[0]
+
+
+class MMessage(object):
+    @staticmethod
+    def removeCallback(callback_id):
+        for callbacks in SCENE.callbacks.values():
+            if callbacks.pop(callback_id, None) is not None:
+                return
+        raise RuntimeError(f"(kInvalidParameter): Invalid callback id {callback_id}")
+
+
+class MSceneMessage(MMessage):
+    kAfterNew, kAfterOpen, kBeforeSave, kAfterSave = "afterNew", "afterOpen", "beforeSave", "afterSave"
+
+    @staticmethod
+    def addCallback(message, func, client_data=None):
+        return _add_callback(message, func, client_data)
+
+
+class MEventMessage(MMessage):
+    @staticmethod
+    def addEventCallback(event, func, client_data=None):
+        return _add_callback(event, func, client_data)
+
+
+class MDGMessage(MMessage):
+    @staticmethod
+    def addNodeRemovedCallback(func, nodeType="dependNode", client_data=None):
+        def removed(node, data):
+            if nodeType == "dependNode" or node.type == nodeType:
+                func(MObject(node), data)
+        return _add_callback("nodeRemoved", removed, client_data)
+
+    @staticmethod
+    def addNodeAddedCallback(func, nodeType="dependNode", client_data=None):
+        def added(node, data):
+            if nodeType == "dependNode" or node.type == nodeType:
+                func(MObject(node), data)
+        return _add_callback("nodeAdded", added, client_data)
+
+
+class MNodeMessage(MMessage):
+    @staticmethod
+    def addNameChangedCallback(obj, func, client_data=None):
+        def renamed(node, previous_name, data):
+            if obj.isNull() or obj.node is node:
+                func(MObject(node), previous_name, data)
+        return _add_callback("nameChanged", renamed, client_data)
+
+    kAttributeSet = 2048
+
+    @staticmethod
+    def addAttributeChangedCallback(obj, func, client_data=None):
+        def changed(node, attr, data):
+            if obj.node is node:
+                func(MNodeMessage.kAttributeSet, MPlug(node, attr), MPlug(node, attr), data)
+        return _add_callback("attributeChanged", changed, client_data)
+
+    @staticmethod
+    def addNodeDirtyPlugCallback(obj, func, client_data=None):
+        def dirty(node, attr, data):
+            if obj.node is node:
+                func(MObject(node), MPlug(node, attr), data)
+        return _add_callback("nodeDirty", dirty, client_data)
+
+
+class MSpace(object):
+    kObject, kWorld = 2, 4
+
+
+class MFn(object):
+    kTransform, kCamera, kMesh = "transform", "camera", "mesh"
+
+
+class MDagPath(object):
+    """指向替身场景节点的路径"""
+    def __init__(self, node=None):
+        self._node = node._node if isinstance(node, MDagPath) else node
+
+    def fullPathName(self):
+        return SCENE.full_path(self._node)
+
+    def extendToShape(self):
+        if self._node.type == "transform":
+            shapes = [c for c in SCENE.children(self._node) if c.type != "transform"]
+            if len(shapes) != 1:
+                raise RuntimeError(f"(kInvalidParameter): {self._node.name} does not have exactly one shape")
+            self._node = shapes[0]
+        return self
+
+    def hasFn(self, fn_type):
+        return self._node.type == fn_type
+
+    def apiType(self):
+        return self._node.type
+
+    def node(self):
+        return MObject(self._node)
+
+    def isInstanced(self):
+        return False
+
+    def inclusiveMatrix(self):
+        node, translate, scale = self._node, [0.0, 0.0, 0.0], [1.0, 1.0, 1.0]
+        while node is not None:
+            t = node.attrs.get("translate", (0.0, 0.0, 0.0))
+            sc = node.attrs.get("scale", (1.0, 1.0, 1.0))
+            translate = [t[i] + translate[i] * sc[i] for i in range(3)]
+            scale = [scale[i] * sc[i] for i in range(3)]
+            node = SCENE.nodes.get(node.parent) if node.parent else None
+        return MMatrix(translate, scale)
+
+    @staticmethod
+    def getAPathTo(obj):
+        return MDagPath(obj.node)
+
+    @staticmethod
+    def getAllPathsTo(obj):
+        return [MDagPath(obj.node)]
+
+
+class MMatrix(object):
+    """只含平移和缩放的变换矩阵"""
+    def __init__(self, translate=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0)):
+        self.translate, self.scale = tuple(translate), tuple(scale)
+
+
+class MPoint(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+
+class MPointArray(list):
+    pass
+
+
+class MBoundingBox(object):
+    """轴对齐包围盒"""
+    def __init__(self, points=()):
+        points = list(points)
+        lo = [min(p[i] for p in points) for i in range(3)] if points else [0.0] * 3
+        hi = [max(p[i] for p in points) for i in range(3)] if points else [0.0] * 3
+        self.min, self.max = MPoint(*lo), MPoint(*hi)
+
+    @property
+    def width(self):
+        return self.max.x - self.min.x
+
+    @property
+    def height(self):
+        return self.max.y - self.min.y
+
+    @property
+    def depth(self):
+        return self.max.z - self.min.z
+
+    def transformUsing(self, matrix):
+        corners = [(p.x, p.y, p.z) for p in (self.min, self.max)]
+        moved = [tuple(c[i] * matrix.scale[i] + matrix.translate[i] for i in range(3)) for c in corners]
+        self.__init__(moved)
+        return self
+
+
+class MItDag(object):
+    """按类型深度优先遍历替身场景的DAG节点"""
+    kDepthFirst, kBreadthFirst = 1, 2
+
+    def __init__(self, traversal=1, filter_type=None):
+        self._paths = [MDagPath(n) for n in list(SCENE.nodes.values()) if filter_type is None or n.type == filter_type]
+        self._index = 0
+
+    def isDone(self):
+        return self._index >= len(self._paths)
+
+    def next(self):
+        self._index += 1
+
+    def getPath(self):
+        return self._paths[self._index]
+
+
+class MObjectHandle(object):
+    """节点句柄，节点删除后失效"""
+    def __init__(self, obj):
+        self._node = obj.node
+
+    def hashCode(self):
+        return id(self._node)
+
+    def isValid(self):
+        return self._node is not None and SCENE.nodes.get(self._node.name) is self._node
+
+    isAlive = isValid
+
+    def object(self):
+        return MObject(self._node)
+
+
+class MSelectionList(object):
+    """选择列表"""
+    def __init__(self):
+        self._items = []
+
+    def add(self, name):
+        node = SCENE.get(name)
+        if node is None:
+            raise RuntimeError(f"(kInvalidParameter): Object does not exist: {name}")
+        self._items.append(node)
+        return self
+
+    def length(self):
+        return len(self._items)
+
+    def getDagPath(self, index):
+        return MDagPath(self._items[index])
+
+    def getDependNode(self, index):
+        return MObject(self._items[index])
+
+
+class MObject(object):
+    """替身节点句柄"""
+    def __init__(self, node=None):
+        self.node = node
+
+    def isNull(self):
+        return self.node is None
+
+
+MObject.kNullObj = MObject()
+
+
+class MPlug(object):
+    """节点属性或其子通道"""
+    def __init__(self, node, attr, index=None):
+        self.node, self.attr, self.index = node, attr, index
+
+    def child(self, index):
+        return MPlug(self.node, self.attr, index)
+
+    @property
+    def isCompound(self):
+        return self.index is None and isinstance(self.node.attrs.get(self.attr), tuple)
+
+    def numChildren(self):
+        return len(self.node.attrs.get(self.attr, ())) if self.isCompound else 0
+
+    def name(self):
+        return f"{self.node.name}.{self.attr}"
+
+    def setFloat(self, value):
+        if self.index is None:
+            self.node.attrs[self.attr] = value
+        else:
+            values = list(self.node.attrs.get(self.attr, (0.0, 0.0, 0.0)))
+            values[self.index] = value
+            self.node.attrs[self.attr] = tuple(values)
+        SCENE.dirty(self.node, self.attr)
+
+    setDouble = setBool = setFloat
+
+    def asFloat(self):
+        value = self.node.attrs.get(self.attr, 0.0)
+        return value[self.index] if self.index is not None else value
+
+    asDouble = asString = asFloat
+
+    def asInt(self):
+        return int(self.asFloat())
+
+
+class MFnDependencyNode(object):
+    def __init__(self, obj):
+        self._node = obj.node
+
+    def name(self):
+        return self._node.name
+
+    def findPlug(self, attr, want_networked=False):
+        if attr not in self._node.attrs:
+            raise RuntimeError(f"(kInvalidParameter): No plug named {attr}")
+        return MPlug(self._node, attr)
+
+    def setName(self, name):
+        """直接重命名，不进入撤销队列"""
+        _scene.untracked_edit(_rename_nodes, [(self._node, name)])
+        return self._node.name
+
+
+class MFnDagNode(MFnDependencyNode):
+    def __init__(self, obj=None):
+        self._node = obj.node if obj is not None else None
+
+    def create(self, node_type, name=None, parent=MObject.kNullObj):
+        """直接创建DAG节点，不进入撤销队列"""
+        self._node = SCENE.create(node_type, name, None if parent.isNull() else parent.node.name)
+        self._node.attrs.setdefault("visibility", True)
+        _scene.untracked_edit(_insert_nodes, [self._node])
+        return MObject(self._node)
+
+    def fullPathName(self):
+        return SCENE.full_path(self._node)
+
+
+class MFnSet(MFnDependencyNode):
+    def addMember(self, member):
+        """直接加入集合，不进入撤销队列"""
+        node = member._node if isinstance(member, MDagPath) else member.node
+        _scene.untracked_edit(_add_members, [(self._node, node)])
+
+
+def _rename_nodes(ops):
+    for node, name in ops:
+        SCENE.rename(node, name)
+
+
+def _add_members(ops):
+    for target, node in ops:
+        current = SCENE.shading_engine_of(node.name)
+        if current is not None:
+            current.members = [m for m in current.members if SCENE.leaf(m) != node.name]
+        target.members.append(node.name)
+
+
+def _insert_nodes(ops):
+    for node in ops:
+        SCENE.nodes[node.name] = node
+
+
+class MDGModifier(object):
+    """记录属性修改，doIt时一次执行，undoIt恢复doIt之前的值"""
+    def __init__(self):
+        self._ops = []
+        self._previous = []
+        self._links = []
+
+    def _link(self, link, unlink):
+        """登记在doIt时建立、undoIt时撤销的节点连接"""
+        self._links.append((link, unlink))
+
+    def newPlugValueFloat(self, plug, value):
+        self._ops.append((plug, value))
+
+    newPlugValueDouble = newPlugValueInt = newPlugValueBool = newPlugValueString = newPlugValueFloat
+
+    def doIt(self):
+        self._previous = [(plug, plug.asFloat()) for plug, _ in self._ops]
+        _scene.untracked_edit(self._apply, self._ops)
+        if self._links:
+            _scene.untracked_edit(self._call, [link for link, _ in self._links])
+
+    def undoIt(self):
+        _scene.untracked_edit(self._apply, list(reversed(self._previous)))
+        if self._links:
+            _scene.untracked_edit(self._call, [unlink for _, unlink in reversed(self._links)])
+
+    @staticmethod
+    def _call(ops):
+        for op in ops:
+            op()
+
+    @staticmethod
+    def _apply(ops):
+        for plug, value in ops:
+            plug.setFloat(value)
+
+
+class MDagModifier(MDGModifier):
+    """在MDGModifier基础上支持删除节点，undoIt时恢复节点、连接和集合成员"""
+    def deleteNode(self, obj):
+        node, saved = obj.node, {}
+
+        def link():
+            nodes = [node] + SCENE.descendants(node)
+            names = {n.name for n in nodes}
+            saved["nodes"] = nodes
+            saved["connections"] = {d: s for d, s in SCENE.connections.items()
+                                    if d.split(".")[0] in names or s.split(".")[0] in names}
+            saved["members"] = [(other, m) for other in SCENE.nodes.values() for m in other.members
+                                if SCENE.leaf(m) in names]
+            SCENE.delete(node)
+
+        def unlink():
+            _insert_nodes(saved.get("nodes", []))
+            SCENE.connections.update(saved.get("connections", {}))
+            for other, member in saved.get("members", []):
+                other.members.append(member)
+
+        self._link(link, unlink)
+
+
+class MFnMesh(object):
+    """读取和创建替身网格节点上的拓扑数据"""
+    def __init__(self, dag_path=None):
+        node = dag_path._node if dag_path is not None else None
+        if node is not None and node.type != "mesh":
+            node = next((c for c in SCENE.children(node) if c.type == "mesh"), node)
+        self._node = node
+
+    def create(self, vertices, polygonCounts, polygonConnects, uValues=None, vValues=None, parent=MObject.kNullObj):
+        points = [(p.x, p.y, p.z) if isinstance(p, MPoint) else tuple(p) for p in vertices]
+        # 直接创建，不进入撤销队列
+        if parent.isNull():
+            transform = SCENE.create_mesh(points, polygonCounts, polygonConnects)
+            self._node = SCENE.children(transform)[0]
+            self._set_uvs(uValues, vValues)
+            _scene.untracked_edit(_insert_nodes, [transform, self._node])
+            return MObject(transform)
+        self._node = SCENE.create("mesh", "polySurfaceShape1", parent.node.name)
+        _scene.set_mesh(self._node, points, polygonCounts, polygonConnects)
+        self._set_uvs(uValues, vValues)
+        _scene.untracked_edit(_insert_nodes, [self._node])
+        return MObject(self._node)
+
+    def _set_uvs(self, u, v):
+        if u is not None and len(u):
+            self._node.data["u"], self._node.data["v"] = list(u), list(v)
+
+    def getUVs(self, uvSet=None):
+        return list(self._node.data.get("u", [])), list(self._node.data.get("v", []))
+
+    def getAssignedUVs(self, uvSet=None):
+        if "uv_ids" in self._node.data:
+            return list(self._node.data["uv_counts"]), list(self._node.data["uv_ids"])
+        return [0] * self.numPolygons, []
+
+    def assignUVs(self, uvCounts, uvIds, uvSet=None):
+        self._node.data["uv_counts"], self._node.data["uv_ids"] = list(uvCounts), list(uvIds)
+
+    def getPoints(self, space=MSpace.kObject):
+        return MPointArray(MPoint(*p) for p in self._node.data.get("points", []))
+
+    def getVertices(self):
+        return list(self._node.data.get("counts", [])), list(self._node.data.get("verts", []))
+
+    @property
+    def numVertices(self):
+        return len(self._node.data.get("points", []))
+
+    @property
+    def numPolygons(self):
+        return len(self._node.data.get("counts", []))
+
+    def numUVs(self, uvSet=None):
+        return self._node.data.get("uvs", len(self._node.data.get("points", [])))
+
+    @property
+    def isIntermediateObject(self):
+        return bool(self._node.attrs.get("intermediateObject", False))
+
+    @property
+    def boundingBox(self):
+        return MBoundingBox(self._node.data.get("points", []))
+
+    def getConnectedShaders(self, instance):
+        engines = [n for n in SCENE.nodes.values() if n.type == "shadingEngine"
+                   and any(SCENE.leaf(m) in (self._node.name, self._node.parent) for m in n.members)]
+        return MObjectArray(MObject(e) for e in engines), [0] * self.numPolygons
+
+
+class MItMeshEdge(object):
+    """按索引访问替身网格的边"""
+    def __init__(self, dag_path):
+        self._edges = _scene.mesh_edges(MFnMesh(dag_path)._node)
+        self._index = 0
+
+    def count(self):
+        return len(self._edges)
+
+    def setIndex(self, index):
+        previous, self._index = self._index, index
+        return previous
+
+    def index(self):
+        return self._index
+
+    def vertexId(self, which):
+        return self._edges[self._index][which]
+
+
+class MPxCommand(object):
+    """插件命令基类"""
+    def doIt(self, args):
+        pass
+
+    def undoIt(self):
+        pass
+
+    def redoIt(self):
+        pass
+
+    def isUndoable(self):
+        return False
+
+
+class MFnPlugin(object):
+    """插件函数集，注册的命令可以通过maya.cmds调用"""
+    def __init__(self, obj=None, vendor="", version="", apiVersion="Any"):
+        pass
+
+    def registerCommand(self, name, creator):
+        _scene.PLUGIN_COMMANDS[name] = creator
+
+    def deregisterCommand(self, name):
+        _scene.PLUGIN_COMMANDS.pop(name, None)
+
+
+class MTime(object):
+    """时间值"""
+    kFilm = 6
+
+    def __init__(self, value=0.0, unit=6):
+        self._value, self.unit = float(value), unit
+
+    @staticmethod
+    def uiUnit():
+        return MTime.kFilm
+
+    @property
+    def value(self):
+        return self._value
+
+
+class MTimeArray(list):
+    """时间数组"""
+
+
+class MDoubleArray(list):
+    """浮点数组"""
+
+
+class MObjectArray(list):
+    """对象数组"""
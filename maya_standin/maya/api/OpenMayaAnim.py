@@ -0,0 +1,85 @@
+"""maya.api.OpenMayaAnim的替身模块，动画曲线以节点数据保存在替身场景中"""
+from maya import _scene
+from maya._scene import SCENE
+from maya.api.OpenMaya import MObject, MObjectArray
+
+_CURVE_TYPES = {"translate": "animCurveTL", "rotate": "animCurveTA"}
+
+
+def _plug_name(plug):
+    """获取插头的完整名称，子通道追加XYZ后缀"""
+    return plug.name() + ("XYZ"[plug.index] if plug.index is not None else "")
+
+
+def _apply_keys(ops):
+    for node, keys in ops:
+        node.data["keys"] = dict(keys)
+
+
+def _set_keys(ops):
+    """直接写入关键帧，撤销块中记录以便重放"""
+    _scene.untracked_edit(_apply_keys, ops)
+
+
+class MAnimCurveChange(object):
+    """记录addKeys的修改，undoIt/redoIt恢复或重做"""
+    def __init__(self):
+        self._edits = []
+
+    def undoIt(self):
+        _set_keys([(node, previous) for node, previous, _ in reversed(self._edits)])
+
+    def redoIt(self):
+        _set_keys([(node, keys) for node, _, keys in self._edits])
+
+
+class MAnimUtil(object):
+    @staticmethod
+    def findAnimation(plug):
+        source = SCENE.connections.get(_plug_name(plug))
+        node = SCENE.get(source) if source else None
+        return MObjectArray([MObject(node)] if node is not None and node.type.startswith("animCurve") else [])
+
+
+class MFnAnimCurve(object):
+    """动画曲线函数集"""
+    kTangentGlobal, kTangentFixed, kTangentLinear = 0, 1, 2
+
+    def __init__(self, obj=None):
+        self._node = obj.node if obj is not None else None
+
+    def create(self, plug, animCurveType=None, modifier=None):
+        """创建曲线节点，传入modifier时在其doIt中连接、undoIt中删除"""
+        curve_type = _CURVE_TYPES.get(plug.attr, "animCurveTU")
+        node = self._node = SCENE.create(curve_type, f"{plug.node.name}_{_plug_name(plug).split('.')[-1]}")
+        node.data["keys"] = {}
+        target = _plug_name(plug)
+
+        def link():
+            SCENE.nodes[node.name] = node
+            SCENE.connections[target] = f"{node.name}.output"
+
+        def unlink():
+            SCENE.nodes.pop(node.name, None)
+            SCENE.connections.pop(target, None)
+
+        if modifier is None:
+            link()
+        else:
+            modifier._link(link, unlink)
+        return MObject(node)
+
+    def addKeys(self, times, values, tangentInType=0, tangentOutType=0, keepExistingKeys=False, change=None):
+        """写入关键帧，直接写入不进入撤销队列，传入change时记录修改"""
+        previous = dict(self._node.data.get("keys", {}))
+        keys = dict(previous) if keepExistingKeys else {}
+        keys.update((t.value, v) for t, v in zip(times, values))
+        _set_keys([(self._node, keys)])
+        if change is not None:
+            change._edits.append((self._node, previous, keys))
+
+    def numKeys(self):
+        return len(self._node.data.get("keys", {}))
+
+    def name(self):
+        return self._node.name
@@ -0,0 +1,12 @@
+"""maya.api.OpenMayaUI的替身模块"""
+from maya.api.OpenMaya import MMessage, _add_callback
+
+
+class MUiMessage(MMessage):
+    @staticmethod
+    def add3dViewPreRenderMsgCallback(panel, func, client_data=None):
+        return _add_callback(f"preRender:{panel}", func, client_data)
+
+    @staticmethod
+    def add3dViewPostRenderMsgCallback(panel, func, client_data=None):
+        return _add_callback(f"postRender:{panel}", func, client_data)
@@ -0,0 +1,781 @@
+"""maya.cmds的替身模块，记录每次调用并作用于内存场景"""
+import copy, functools, re, sys
+from maya import _scene
+from maya._scene import SCENE, LIGHT_TYPES
+
+CALLS = []
+_FLAG_ALIASES = {
+    "sl": "selection", "os": "orderedSelection", "fl": "flatten", "l": "long", "o": "objectsOnly",
+    "typ": "type", "ni": "noIntermediate", "p": "parent", "c": "children", "s": "shapes", "f": "fullPath",
+    "ad": "allDescendents", "ch": "constructionHistory", "n": "name", "q": "query", "e": "edit",
+    "ws": "worldSpace", "t": "translation", "fe": "forceElement", "r": "replace", "add": "add", "cl": "clear",
+    "st": "showType", "d": "distance", "a": "absolute", "un": "upstreamNodes", "sm": "selectionMask",
+    "ex": "expand", "v": "vertex", "fc": "face", "cp": "centerPivots"
+}
+_COMPONENT = re.compile(r"^(.+)\.(vtx|e|f)\[(\*|\d+)(?::(\d+))?\]$")
+_SELECTION_MASKS = {31: "vtx", 32: "e", 34: "f"}
+MODEL_EDITOR_DEFAULTS = {"shadows": False, "displayLights": "default", "displayTextures": True,
+                         "displayAppearance": "smoothShaded"}
+MODEL_PANELS = {f"modelPanel{i}": dict(MODEL_EDITOR_DEFAULTS) for i in range(1, 5)}
+
+
+def _flags(kwargs):
+    """将短参数名转换为长参数名"""
+    return {_FLAG_ALIASES.get(k, k): v for k, v in kwargs.items()}
+
+
+def _recorded(func):
+    """记录调用的装饰器"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        CALLS.append((func.__name__, args, kwargs))
+        return func(*args, **_flags(kwargs))
+    return wrapper
+
+
+def _as_list(items):
+    """将参数统一为列表"""
+    if items is None: return []
+    if isinstance(items, (list, tuple)): return [str(i) for i in items]
+    return [str(items)]
+
+
+def _split_component(item):
+    """解析组件字符串，返回(节点名, 类型, 索引范围)，不是组件时返回None"""
+    match = _COMPONENT.match(str(item))
+    if not match: return None
+    name, kind, start, end = match.groups()
+    shape = SCENE.mesh_shape(name)
+    if shape is None: raise ValueError(f"No object matches name: {item}")
+    if start == "*": return name, kind, range(_scene.component_count(shape, kind))
+    return name, kind, range(int(start), int(end if end is not None else start) + 1)
+
+
+def _component_ids(items, kind=None):
+    """将对象和组件统一为{节点名: {类型: 索引集合}}，对象表示其全部kind组件"""
+    result = {}
+    for item in items:
+        parts = _split_component(item)
+        if parts is None:
+            shape = SCENE.mesh_shape(item)
+            if shape is None or kind is None: continue
+            name = SCENE.leaf(item)
+            result.setdefault(name, {}).setdefault(kind, set()).update(range(_scene.component_count(shape, kind)))
+        else:
+            name, item_kind, ids = parts
+            result.setdefault(name, {}).setdefault(item_kind, set()).update(ids)
+    return result
+
+
+def _format_ids(name, kind, ids, flatten=False):
+    """将索引格式化为组件字符串，不展开时压缩为连续范围"""
+    ids = sorted(ids)
+    if flatten: return [f"{name}.{kind}[{i}]" for i in ids]
+    result, start = [], None
+    for i, v in enumerate(ids):
+        if start is None: start = v
+        if i + 1 == len(ids) or ids[i + 1] != v + 1:
+            result.append(f"{name}.{kind}[{start}]" if start == v else f"{name}.{kind}[{start}:{v}]")
+            start = None
+    return result
+
+
+def _flatten(items):
+    """展开组件范围"""
+    result = []
+    for item in items:
+        parts = _split_component(item)
+        if parts is None:
+            result.append(item)
+        else:
+            name, kind, ids = parts
+            result.extend(f"{name}.{kind}[{i}]" for i in ids)
+    return result
+
+
+def reset_calls():
+    """清空调用记录"""
+    del CALLS[:]
+
+
+def call_counts():
+    """按命令统计调用次数"""
+    counts = {}
+    for name, _, _ in CALLS:
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+PLUGINS = {}
+
+def __getattr__(name):
+    """插件注册的命令执行doIt，未实现的命令只记录调用并返回None"""
+    if name.startswith("__"): raise AttributeError(name)
+    if name in _scene.PLUGIN_COMMANDS:
+        def plugin_command(*args, **kwargs):
+            CALLS.append((name, args, kwargs))
+            command = _scene.PLUGIN_COMMANDS[name]()
+            command.doIt(args)
+            _scene.undoable_command(command)
+        plugin_command.__name__ = name
+        return plugin_command
+    def command(*args, **kwargs):
+        CALLS.append((name, args, kwargs))
+        return None
+    command.__name__ = name
+    return command
+
+
+# ========================
+# 环境与撤销
+# ========================
+@_recorded
+def about(batch=False, version=False, **kwargs):
+    if batch: return True
+    if version: return "standin"
+    return None
+
+UNDO = _scene.UNDO
+
+def _track_untracked_section(enabled):
+    """块内关闭撤销期间的修改在撤销该块后仍然保留"""
+    if not enabled:
+        UNDO["open"]["untracked"] = SCENE.snapshot()
+        return
+    before = UNDO["open"].pop("untracked", None)
+    if before is None: return
+    after = SCENE.snapshot()[0]
+    changed = {name: entry for name, entry in after.items()
+               if name not in before[0] or entry[1:] != before[0][name][1:]}
+
+    def apply(ops):
+        for name, (node, node_name, node_type, parent, attrs, members, data) in ops:
+            node.name, node.type, node.parent = node_name, node_type, parent
+            node.attrs, node.members, node.data = copy.deepcopy((attrs, members, data))
+            SCENE.nodes[name] = node
+    UNDO["open"]["replay"].append((apply, [(name, entry) for name, entry in changed.items()]))
+
+@_recorded
+def undoInfo(query=False, state=None, stateWithoutFlush=None, openChunk=False, closeChunk=False, flush=False,
+             chunkName=None, **kwargs):
+    if query:
+        if chunkName:
+            return UNDO["names"][0] if UNDO["names"] else ""
+        return UNDO["state"]
+    if state is not None or stateWithoutFlush is not None:
+        enabled = bool(state if state is not None else stateWithoutFlush)
+        if UNDO["open"] is not None and enabled != UNDO["state"]:
+            _track_untracked_section(enabled)
+        UNDO["state"] = enabled
+        if state is not None and not state:
+            del UNDO["queue"][:]
+    if flush:
+        del UNDO["queue"][:]
+    if openChunk:
+        if UNDO["depth"] == 0 and UNDO["state"]:
+            UNDO["open"] = {"scene": SCENE.snapshot(), "replay": [], "commands": []}
+        UNDO["depth"] += 1
+        UNDO["names"].append(chunkName or "")
+    if closeChunk and UNDO["depth"]:
+        UNDO["depth"] -= 1
+        UNDO["names"].pop()
+        if UNDO["depth"] == 0 and UNDO["open"] is not None:
+            UNDO["queue"].append(UNDO["open"])
+            UNDO["open"] = None
+    return None
+
+@_recorded
+def undo(**kwargs):
+    if UNDO["depth"]:
+        raise RuntimeError("Cannot undo while an undo chunk is open")
+    if not UNDO["queue"]: return
+    chunk = UNDO["queue"].pop()
+    SCENE.restore(chunk["scene"])
+    for apply, ops in chunk["replay"]:
+        apply(ops)
+    for command in reversed(chunk["commands"]):
+        command.undoIt()
+
+@_recorded
+def refresh(**kwargs):
+    """不暂停刷新时模拟一次视口绘制，触发各模型面板的绘制前后回调"""
+    if "suspend" in kwargs: return None
+    for panel in MODEL_PANELS:
+        SCENE.notify(f"preRender:{panel}", panel)
+        SCENE.notify(f"postRender:{panel}", panel)
+
+@_recorded
+def getPanel(type=None, visiblePanels=False, withFocus=False, **kwargs):
+    if withFocus: return next(iter(MODEL_PANELS))
+    return list(MODEL_PANELS) if type in (None, "modelPanel") else []
+
+@_recorded
+def modelEditor(panel, query=False, edit=False, **flags):
+    if flags.pop("exists", False):
+        return panel in MODEL_PANELS
+    editor = MODEL_PANELS.setdefault(panel, dict(MODEL_EDITOR_DEFAULTS))
+    if query:
+        return editor.get(next(iter(flags)))
+    editor.update(flags)
+    return panel
+
+@_recorded
+def warning(message):
+    sys.stderr.write(f"# Warning: {message}\n")
+
+@_recorded
+def loadPlugin(*args, quiet=False, **kwargs):
+    """加载Python插件文件并调用initializePlugin，其他插件只返回空列表"""
+    import importlib.util, os
+    from maya.api import OpenMaya as om2
+    loaded = []
+    for path in args:
+        name = os.path.splitext(os.path.basename(str(path)))[0]
+        if not str(path).endswith(".py") or not os.path.exists(path) or name in PLUGINS: continue
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.initializePlugin(om2.MObject())
+        PLUGINS[name] = module
+        loaded.append(name)
+    return loaded
+
+@_recorded
+def pluginInfo(*args, **kwargs):
+    return True
+
+# ========================
+# 文件
+# ========================
+@_recorded
+def file(path=None, open=False, new=False, force=False, save=False, rename=None, query=False,
+         sceneName=False, type=None, modified=None, **kwargs):
+    if query:
+        if sceneName: return SCENE.scene_name
+        if modified: return SCENE.modified
+        return None
+    if modified is not None and not (new or open or save or rename):
+        SCENE.modified = bool(modified)
+        return None
+    if new:
+        del UNDO["queue"][:]
+        SCENE.reset()
+        SCENE.notify("afterNew")
+        return ""
+    if open:
+        del UNDO["queue"][:]
+        SCENE.load(path)
+        SCENE.notify("afterOpen")
+        return SCENE.scene_name
+    if rename:
+        SCENE.scene_name = rename
+        return rename
+    if save:
+        SCENE.notify("beforeSave")
+        SCENE.save(SCENE.scene_name)
+        SCENE.notify("afterSave")
+        return SCENE.scene_name
+    return None
+
+# ========================
+# 节点查询
+# ========================
+@_recorded
+def objExists(name):
+    return SCENE.get(name) is not None
+
+@_recorded
+def nodeType(name):
+    node = SCENE.get(name)
+    return node.type if node else None
+
+@_recorded
+def ls(*args, selection=False, orderedSelection=False, type=None, long=False, objectsOnly=False, dag=False,
+       noIntermediate=False, flatten=False, showType=False, **kwargs):
+    if selection or orderedSelection:
+        items = list(SCENE.selection)
+    elif args:
+        items = []
+        for pattern in _as_list(args[0] if len(args) == 1 else list(args)):
+            node_pattern, _, attr = pattern.partition(".")
+            if attr and "[" not in attr:
+                nodes = [n for n in SCENE.match(node_pattern) if attr in n.attrs]
+                items.extend(SCENE.format(n, long) + ("" if objectsOnly else f".{attr}") for n in nodes)
+            elif attr and not objectsOnly:
+                parts = _split_component(pattern)
+                if parts and flatten:
+                    items.extend(_format_ids(parts[0], parts[1], parts[2], flatten=True))
+                elif parts:
+                    items.extend(_format_ids(parts[0], parts[1], parts[2]) if "*" in attr else [pattern])
+                elif SCENE.get(pattern):
+                    items.append(pattern)
+            else:
+                items.extend(SCENE.format(n, long) for n in SCENE.match(node_pattern))
+    else:
+        items = [SCENE.format(n, long) for n in SCENE.nodes.values()]
+
+    if flatten and not objectsOnly:
+        items = _flatten(items)
+    if objectsOnly:
+        items = [SCENE.format(SCENE.get(i), long) for i in items if SCENE.get(i)]
+    if dag:
+        expanded = []
+        for item in items:
+            node = SCENE.get(item)
+            if not node: continue
+            expanded.append(SCENE.format(node, long))
+            expanded.extend(SCENE.format(d, long) for d in SCENE.descendants(node))
+        items = expanded
+    if type:
+        types = set(_as_list(type))
+        items = [i for i in items if SCENE.get(i) and SCENE.get(i).type in types]
+    seen, result = set(), []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+            if showType: result.append(SCENE.get(item).type if SCENE.get(item) else "")
+    return result
+
+@_recorded
+def listRelatives(*args, parent=False, children=False, shapes=False, allDescendents=False, fullPath=False,
+                  type=None, **kwargs):
+    items = _as_list(args[0] if args else SCENE.selection)
+    nodes = [SCENE.get(a) for a in items]
+    result = []
+    for item, node in zip(items, nodes):
+        if node is None: continue
+        if parent and _split_component(item) and node.type == "transform":
+            related = [node]
+        elif parent:
+            related = [SCENE.nodes[node.parent]] if node.parent else []
+        elif allDescendents:
+            related = SCENE.descendants(node)
+        else:
+            related = SCENE.children(node)
+        if shapes:
+            related = [r for r in related if r.type != "transform"]
+        if type:
+            related = [r for r in related if r.type in _as_list(type)]
+        result.extend(SCENE.format(r, fullPath) for r in related)
+    return result or None
+
+@_recorded
+def listConnections(objects, source=True, destination=True, plugs=False, connections=False, type=None, **kwargs):
+    pairs = []
+    for plug in _as_list(objects):
+        node_only = "." not in plug
+        for dst, src in SCENE.connections.items():
+            if destination and (src == plug or node_only and src.split(".")[0] == plug):
+                pairs.append((src, dst))
+            if source and (dst == plug or node_only and dst.split(".")[0] == plug):
+                pairs.append((dst, src))
+        node = SCENE.get(plug)
+        if source and node_only and node is not None and node.type == "shadingEngine":
+            pairs.extend((f"{node.name}.dagSetMembers[{i}]", f"{SCENE.leaf(m)}.instObjGroups[0]")
+                         for i, m in enumerate(node.members))
+        if destination and node_only and node is not None and node.type != "shadingEngine":
+            pairs.extend((f"{node.name}.instObjGroups[0]", f"{e.name}.dagSetMembers[{i}]")
+                         for e in SCENE.nodes.values() if e.type == "shadingEngine"
+                         for i, m in enumerate(e.members) if SCENE.leaf(m) == node.name)
+    if type:
+        pairs = [p for p in pairs if SCENE.get(p[1]) and SCENE.get(p[1]).type in _as_list(type)]
+    result = []
+    for own, other in pairs:
+        if connections: result.append(own)
+        result.append(other if plugs else other.split(".")[0])
+    return result or None
+
+# ========================
+# 节点创建与编辑
+# ========================
+@_recorded
+def createNode(node_type, name=None, parent=None, **kwargs):
+    return SCENE.create(node_type, name, parent).name
+
+@_recorded
+def shadingNode(node_type, asLight=False, asShader=False, asTexture=False, asUtility=False, name=None, **kwargs):
+    if asLight or node_type in LIGHT_TYPES:
+        transform, shape = SCENE.create_dag(node_type, name)
+        return shape.name
+    return SCENE.create(node_type, name).name
+
+@_recorded
+def camera(**kwargs):
+    transform, shape = SCENE.create_dag("camera", transform_name="camera1")
+    transform.attrs.update(translate=(0.0, 0.0, 0.0), rotate=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0), rotateOrder=0)
+    shape.attrs.update(focalLength=35.0, horizontalFilmAperture=1.417, verticalFilmAperture=0.945, horizontalFilmOffset=0.0,
+                       verticalFilmOffset=0.0, filmFit=1, lensSqueezeRatio=1.0, cameraScale=1.0, nearClipPlane=0.1,
+                       farClipPlane=10000.0, orthographic=0, orthographicWidth=30.0, depthOfField=0, fStop=5.6,
+                       focusDistance=5.0)
+    return [transform.name, shape.name]
+
+@_recorded
+def rename(old, new):
+    node = SCENE.get(old)
+    if not node: raise RuntimeError(f"No object matches name: {old}")
+    return SCENE.rename(node, new)
+
+@_recorded
+def delete(*args, constructionHistory=False, **kwargs):
+    if constructionHistory: return None
+    items = _as_list(args[0] if len(args) == 1 else list(args))
+    for name, kinds in _component_ids(items).items():
+        shape = SCENE.mesh_shape(name)
+        faces = set(kinds.get("f", ()))
+        if kinds.get("vtx"):
+            used = kinds["vtx"]
+            faces.update(i for i, face in enumerate(_scene.mesh_faces(shape)) if used.intersection(face))
+        if faces:
+            _scene.remove_faces(shape, faces)
+            SCENE.modified = True
+    for item in items:
+        node = SCENE.get(item)
+        if node and "." not in item:
+            SCENE.delete(node)
+    return None
+
+@_recorded
+def select(*args, clear=False, replace=True, add=False, deselect=False, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args))
+    if clear:
+        SCENE.selection = []
+    elif add:
+        SCENE.selection.extend(i for i in items if i not in SCENE.selection)
+    elif deselect:
+        SCENE.selection = [s for s in SCENE.selection if s not in items]
+    else:
+        missing = [i for i in items if SCENE.get(i) is None]
+        if missing: raise ValueError(f"No object matches name: {missing[0]}")
+        SCENE.selection = items
+
+@_recorded
+def setAttr(plug, *values, type=None, **kwargs):
+    node_name, _, attr = plug.partition(".")
+    node = SCENE.get(node_name)
+    if not node: raise RuntimeError(f"No object matches name: {plug}")
+    node.attrs[attr] = values[0] if len(values) == 1 else tuple(values)
+    SCENE.modified = True
+    SCENE.dirty(node, attr)
+
+@_recorded
+def getAttr(plug, **kwargs):
+    node_name, _, attr = plug.partition(".")
+    node = SCENE.get(node_name)
+    if not node: raise ValueError(f"No object matches name: {plug}")
+    value = node.attrs.get(attr, (0.0, 0.0, 0.0) if attr in ("translate", "rotate", "scale") else 0.0)
+    return [tuple(value)] if isinstance(value, tuple) else value
+
+@_recorded
+def addAttr(*args, longName=None, dataType=None, attributeType=None, defaultValue=None, parent=None, **kwargs):
+    for node_name in _as_list(args[0] if len(args) == 1 else list(args)):
+        node = SCENE.get(node_name)
+        if not node: raise RuntimeError(f"No object matches name: {node_name}")
+        if parent: continue
+        if longName in node.attrs: raise RuntimeError(f"Found more than one attribute named {longName}")
+        if dataType == "string":
+            node.attrs[longName] = ""
+        elif attributeType in ("float3", "double3"):
+            node.attrs[longName] = (0.0, 0.0, 0.0)
+        else:
+            node.attrs[longName] = defaultValue or 0.0
+
+@_recorded
+def attributeQuery(attr, node=None, exists=False, **kwargs):
+    target = SCENE.get(node)
+    return bool(target and attr in target.attrs)
+
+@_recorded
+def connectAttr(src, dst, force=False, **kwargs):
+    if SCENE.get(src) is None or SCENE.get(dst) is None:
+        raise RuntimeError(f"Cannot connect {src} to {dst}")
+    if dst in SCENE.connections and not force:
+        raise RuntimeError(f"{dst} is already connected")
+    SCENE.connections[dst] = src
+    SCENE.modified = True
+
+@_recorded
+def disconnectAttr(src, dst, **kwargs):
+    if SCENE.connections.get(dst) == src:
+        del SCENE.connections[dst]
+
+@_recorded
+def sets(*args, renderable=False, noSurfaceShader=False, empty=False, name=None, forceElement=None,
+         query=False, add=None, remove=None, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args))
+    if query:
+        node = SCENE.get(items[0]) if items else None
+        return list(node.members) if node and node.members else None
+    if forceElement:
+        target = SCENE.get(forceElement)
+        if not target: raise RuntimeError(f"No object matches name: {forceElement}")
+        for item in items:
+            current = SCENE.shading_engine_of(item)
+            if current is not None:
+                current.members = [m for m in current.members if SCENE.leaf(m) != SCENE.leaf(item)]
+            target.members.append(item)
+        SCENE.modified = True
+        return None
+    if add:
+        SCENE.get(add).members.extend(items)
+        return None
+    if remove:
+        target = SCENE.get(remove)
+        target.members = [m for m in target.members if m not in items]
+        return None
+    node = SCENE.create("shadingEngine" if renderable else "objectSet", name or "set1")
+    if not empty:
+        node.members.extend(items)
+    return node.name
+
+@_recorded
+def xform(*args, query=False, worldSpace=False, translation=False, centerPivots=False, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    if not query: return None
+    if not translation: return []
+    result = []
+    for item in items:
+        parts = _split_component(item)
+        if parts and parts[1] == "vtx":
+            points = SCENE.mesh_shape(parts[0]).data["points"]
+            for i in parts[2]:
+                result.extend(points[i])
+        elif parts is None and SCENE.get(item):
+            result.extend(SCENE.get(item).attrs.get("translate", (0.0, 0.0, 0.0)))
+    return result
+
+@_recorded
+def pointPosition(item, world=False, local=False, **kwargs):
+    parts = _split_component(item)
+    if not parts or parts[1] != "vtx":
+        raise RuntimeError(f"pointPosition requires a vertex: {item}")
+    return list(SCENE.mesh_shape(parts[0]).data["points"][parts[2][0]])
+
+@_recorded
+def move(x, y, z, *args, absolute=False, relative=False, worldSpace=False, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    for item in items:
+        parts = _split_component(item)
+        if parts is None:
+            node = SCENE.get(item)
+            if node is None: raise ValueError(f"No object matches name: {item}")
+            tx, ty, tz = (0.0, 0.0, 0.0) if absolute else node.attrs.get("translate", (0.0, 0.0, 0.0))
+            node.attrs["translate"] = (tx + x, ty + y, tz + z)
+            SCENE.dirty(node, "translate")
+            continue
+        name, kind, ids = parts
+        shape = SCENE.mesh_shape(name)
+        points = shape.data["points"]
+        for v in (ids if kind == "vtx" else _convert(shape, kind, ids, "vtx")):
+            px, py, pz = (0.0, 0.0, 0.0) if absolute else points[v]
+            points[v] = (px + x, py + y, pz + z)
+        SCENE.dirty(shape, "pnts")
+    SCENE.modified = True
+
+def _convert(shape, kind, ids, to_kind, internal=False, border=False):
+    """在顶点、边和面之间转换组件索引"""
+    ids = set(ids)
+    if kind == "vtx":
+        vertices = ids
+    elif kind == "e":
+        edges = _scene.mesh_edges(shape)
+        vertices = {v for i in ids for v in edges[i]}
+    else:
+        faces = _scene.mesh_faces(shape)
+        vertices = {v for i in ids for v in faces[i]}
+    if to_kind == "vtx":
+        return vertices
+    if to_kind == "f":
+        test = vertices.issuperset if internal else vertices.intersection
+        return {i for i, face in enumerate(_scene.mesh_faces(shape)) if test(face)}
+    edges = _scene.mesh_edges(shape)
+    if border:
+        uses = {}
+        for face in _scene.mesh_faces(shape):
+            for i, a in enumerate(face):
+                key = (min(a, face[i - 1]), max(a, face[i - 1]))
+                uses[key] = uses.get(key, 0) + 1
+    result = set()
+    for i, (a, b) in enumerate(edges):
+        inside = (a in vertices and b in vertices) if internal or kind != "vtx" else (a in vertices or b in vertices)
+        if inside and (not border or uses[(a, b)] == 1):
+            result.add(i)
+    return result
+
+@_recorded
+def polyListComponentConversion(*args, fromVertex=False, fromEdge=False, fromFace=False, toVertex=False,
+                                toEdge=False, toFace=False, internal=False, border=False, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    to_kind = "vtx" if toVertex else "e" if toEdge else "f" if toFace else None
+    if to_kind is None: return items
+    result = []
+    for name, kinds in _component_ids(items, "f").items():
+        shape = SCENE.mesh_shape(name)
+        ids = set()
+        for kind, kind_ids in kinds.items():
+            ids.update(_convert(shape, kind, kind_ids, to_kind, internal, border))
+        result.extend(_format_ids(name, to_kind, ids))
+    return result
+
+@_recorded
+def filterExpand(*args, selectionMask=None, expand=True, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    kinds = {_SELECTION_MASKS.get(int(m)) for m in _as_list(selectionMask)} if selectionMask is not None else None
+    result = []
+    for name, ids_by_kind in _component_ids(items).items():
+        for kind, ids in ids_by_kind.items():
+            if kinds is None or kind in kinds:
+                result.extend(_format_ids(name, kind, ids, flatten=bool(expand)))
+    return result or None
+
+@_recorded
+def polyEvaluate(*args, vertex=False, edge=False, face=False, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    shape = SCENE.mesh_shape(items[0]) if items else None
+    if shape is None: return "No object was specified to evaluate"
+    kind = "vtx" if vertex else "e" if edge else "f" if face else None
+    if kind: return _scene.component_count(shape, kind)
+    return {key: _scene.component_count(shape, k) for key, k in (("vertex", "vtx"), ("edge", "e"), ("face", "f"))}
+
+@_recorded
+def polyMergeVertex(*args, distance=0.0, constructionHistory=True, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    for name, kinds in _component_ids(items, "vtx").items():
+        shape = SCENE.mesh_shape(name)
+        vertices = set()
+        for kind, ids in kinds.items():
+            vertices |= _convert(shape, kind, ids, "vtx")
+        _scene.merge_vertices(shape, vertices, float(distance))
+    SCENE.modified = True
+    return [SCENE.create("polyMergeVert").name] if constructionHistory else []
+
+@_recorded
+def duplicate(*args, name=None, upstreamNodes=False, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    result = []
+    for item in items:
+        node = SCENE.get(item)
+        if node is None: raise ValueError(f"No object matches name: {item}")
+        shape = SCENE.mesh_shape(item)
+        if shape is not None:
+            data = shape.data
+            copy = SCENE.create_mesh(data["points"], data["counts"], data["verts"], name or node.name, node.parent)
+        else:
+            copy = SCENE.create(node.type, name or node.name, node.parent)
+        copy.attrs.update(node.attrs)
+        result.append(copy.name)
+    return result
+
+@_recorded
+def polySeparate(*args, constructionHistory=True, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    shape = SCENE.mesh_shape(items[0]) if items else None
+    if shape is None: raise RuntimeError("polySeparate works only on polygonal objects.")
+    shells = _scene.mesh_shells(shape)
+    if len(shells) < 2:
+        raise RuntimeError(f"polySeparate works only on polygonal objects with more than one piece: {items[0]}")
+    transform, faces, points = SCENE.nodes[shape.parent], _scene.mesh_faces(shape), shape.data["points"]
+    pieces = []
+    for shell in shells:
+        piece = _scene.compact_mesh(points, [faces[i] for i in shell])
+        pieces.append(SCENE.create_mesh(*piece, name="polySurface1", parent=transform.name).name)
+    SCENE.delete(shape)
+    return pieces + ([SCENE.create("polySeparate").name] if constructionHistory else [])
+
+@_recorded
+def polyUnite(*args, constructionHistory=True, mergeUVSets=1, name=None, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    shapes = [SCENE.mesh_shape(i) for i in items]
+    if len([s for s in shapes if s is not None]) < 2:
+        raise RuntimeError("polyUnite requires at least two polygonal objects.")
+    points, counts, verts = [], [], []
+    for shape in filter(None, shapes):
+        base = len(points)
+        points.extend(shape.data["points"])
+        counts.extend(shape.data["counts"])
+        verts.extend(base + v for v in shape.data["verts"])
+    merged = SCENE.create_mesh(points, counts, verts, name or "polySurface1")
+    for item in items:
+        if SCENE.get(item) is not None:
+            SCENE.delete(SCENE.get(item))
+    SCENE.selection = [merged.name]
+    return [merged.name] + ([SCENE.create("polyUnite").name] if constructionHistory else [])
+
+@_recorded
+def polyReduce(*args, percentage=0.0, constructionHistory=True, **kwargs):
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    for item in items:
+        shape = SCENE.mesh_shape(item)
+        if shape is None: raise RuntimeError(f"polyReduce works only on polygonal objects: {item}")
+        _scene.reduce_mesh(shape, 1.0 - percentage / 100.0)
+    SCENE.modified = True
+    return [SCENE.create("polyReduce").name] if constructionHistory else []
+
+@_recorded
+def hide(*args, **kwargs):
+    for item in _as_list(args[0] if len(args) == 1 else list(args)):
+        SCENE.get(item).attrs["visibility"] = False
+
+@_recorded
+def showHidden(*args, **kwargs):
+    for item in _as_list(args[0] if len(args) == 1 else list(args)):
+        SCENE.get(item).attrs["visibility"] = True
+
+@_recorded
+def group(*args, name=None, empty=False, **kwargs):
+    items = [] if empty else _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    node = SCENE.create("transform", name or "group1")
+    for item in items:
+        SCENE.get(item).parent = node.name
+    SCENE.selection = [node.name]
+    return node.name
+
+@_recorded
+def exactWorldBoundingBox(*args, **kwargs):
+    from maya.api import OpenMaya as om2
+    items = _as_list(args[0] if len(args) == 1 else list(args)) if args else list(SCENE.selection)
+    lo, hi = [float("inf")] * 3, [float("-inf")] * 3
+    for item in items:
+        shape = SCENE.mesh_shape(item)
+        if shape is None: continue
+        bbox = om2.MBoundingBox(shape.data["points"])
+        bbox.transformUsing(om2.MDagPath(shape).inclusiveMatrix())
+        lo = [min(a, b) for a, b in zip(lo, (bbox.min.x, bbox.min.y, bbox.min.z))]
+        hi = [max(a, b) for a, b in zip(hi, (bbox.max.x, bbox.max.y, bbox.max.z))]
+    return lo + hi if items else [0.0] * 6
+
+@_recorded
+def particle(position=(), name=None, **kwargs):
+    transform, shape = SCENE.create_dag("particle", transform_name=name or "particle1")
+    shape.attrs.update(position0=[tuple(p) for p in position], count=len(position), isDynamic=True)
+    return [transform.name, shape.name]
+
+@_recorded
+def particleInstancer(shape, addObject=False, object=None, name=None, **kwargs):
+    transform = SCENE.get(shape)
+    transform = SCENE.nodes[transform.parent] if transform.parent else transform
+    instancer = SCENE.create("instancer", name or "instancer1")
+    instancer.attrs.update({"objects": _as_list(object), **{k: v for k, v in kwargs.items() if isinstance(v, str)}})
+    SCENE.connections[f"{instancer.name}.inputPoints"] = f"{SCENE.get(shape).name}.instanceData[0].instancePointData"
+    return instancer.name
+
+def _primitive(kind):
+    """创建基础几何体，平面按细分生成网格，其余几何体用立方体网格代替"""
+    def create(**kwargs):
+        if kind == "Plane":
+            mesh = _scene.grid_mesh(kwargs.get("subdivisionsY", kwargs.get("sy", 10)),
+                                    kwargs.get("subdivisionsX", kwargs.get("sx", 10)), 0.1, (-0.5, 0.0, -0.5))
+        else:
+            mesh = _scene.cube_mesh()
+        transform = SCENE.create_mesh(*mesh, name=kwargs.get("name") or f"p{kind}1")
+        creator = SCENE.create(f"poly{kind}")
+        return [transform.name, creator.name]
+    create.__name__ = f"poly{kind}"
+    return _recorded(create)
+
+polyCube = _primitive("Cube")
+polySphere = _primitive("Sphere")
+polyCylinder = _primitive("Cylinder")
+polyCone = _primitive("Cone")
+polyPlane = _primitive("Plane")
+polyTorus = _primitive("Torus")
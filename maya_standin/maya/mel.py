@@ -0,0 +1,42 @@
+"""maya.mel的替身模块"""
+import shlex
+from maya import cmds
+
+CALLS = []
+
+
+def _value(token):
+    """将MEL参数转换为数字或字符串"""
+    for convert in (int, float):
+        try:
+            return convert(token)
+        except ValueError:
+            pass
+    return token
+
+
+def _is_flag(token):
+    """判断是否为-flag形式的参数（负数除外）"""
+    return token.startswith("-") and len(token) > 1 and not token[1].isdigit() and token[1] != "."
+
+
+def eval(command):
+    """记录MEL命令，并将简单命令及其参数转发给cmds替身"""
+    CALLS.append(command)
+    statement = command.strip().rstrip(";").strip()
+    if not statement or not statement[0].isalpha():
+        return None
+    tokens = shlex.split(statement)
+    args, kwargs, i = [], {}, 1
+    while i < len(tokens):
+        token = tokens[i]
+        if _is_flag(token):
+            if i + 1 < len(tokens) and not _is_flag(tokens[i + 1]):
+                kwargs[token[1:]] = _value(tokens[i + 1])
+                i += 1
+            else:
+                kwargs[token[1:]] = True
+        else:
+            args.append(_value(token))
+        i += 1
+    return getattr(cmds, tokens[0])(*args, **kwargs)
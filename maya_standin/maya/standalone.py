@@ -0,0 +1,11 @@
+"""maya.standalone的替身模块"""
+
+
+def initialize(name="python"):
+    """初始化（替身环境无需操作）"""
+    return None
+
+
+def uninitialize():
+    """反初始化（替身环境无需操作）"""
+    return None
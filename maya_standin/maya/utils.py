@@ -0,0 +1,11 @@
+"""maya.utils的替身模块"""
+
+
+def executeDeferred(func, *args, **kwargs):
+    """无事件循环时立即执行"""
+    return func(*args, **kwargs)
+
+
+def executeInMainThreadWithResult(func, *args, **kwargs):
+    """无事件循环时立即执行并返回结果"""
+    return func(*args, **kwargs)
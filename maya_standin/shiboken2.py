@@ -0,0 +1,5 @@
+"""shiboken2的替身模块"""
+
+
+def wrapInstance(ptr, base):
+    return None
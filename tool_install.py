@@ -2,14 +2,21 @@ from maya import cmds
 from PySide2 import QtWidgets, QtCore
 from shiboken2 import wrapInstance
 import maya.OpenMayaUI as omui
-import os, shutil, sys, urllib.request, ssl, importlib
+import os, shutil, sys, time, urllib.request, ssl, importlib, argparse, compileall, hashlib, json, py_compile, zipfile
 
 dialog = None
 VERSION = "0.9"
-URL_VERSION = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/version.txt"
-URL_SCRIPT = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/Assistant_tool.py"
+URL_BASE = "https://raw.githubusercontent.com/junjunhemaomao/assistant_paint_tool/main/"
+URL_VERSION = URL_BASE + "version.txt"
 TIMEOUT, SSL_CTX = 10, ssl._create_unverified_context()
 
+# 版本化安装: <INSTALL_ROOT>/versions/<版本>/ 中的文件装好后不再修改，current文件记录正在使用的版本
+INSTALL_ROOT = os.environ.get("ASSISTANT_INSTALL_ROOT") or os.path.join(os.path.expanduser("~"), "Documents", "3D_Assistant", "install")
+INSTALL_FILES = ["Assistant_tool.py", "batch_runner.py", "tool_install.py"]
+INSTALL_KEEP = 3
+MANIFEST_NAME = "manifest.json"
+STALE_SECONDS = 3600
+
 try:
     LOCAL_PATH = os.path.abspath(__file__)
 except NameError:
@@ -17,43 +24,271 @@ except NameError:
 
 def popup(title, msg): cmds.confirmDialog(title=title, message=msg, button=["OK"])
 
+def fetch(url):
+    req = urllib.request.Request(url, headers={"User-Agent": "Assistant"})
+    with urllib.request.urlopen(req, context=SSL_CTX, timeout=TIMEOUT) as r: return r.read()
+
+# ========================
+# 版本化安装
+# ========================
+def versions_dir(root=INSTALL_ROOT): return os.path.join(root, "versions")
+
+def file_hash(data): return hashlib.sha256(data).hexdigest()
+
+def check_name(name):
+    """清单中只允许安装目录下的普通文件名"""
+    if not name or os.path.basename(name) != name or name in (".", "..") or name.startswith("."):
+        raise ValueError(f"Invalid file name in bundle: {name!r}")
+    return name
+
+def current_version(root=INSTALL_ROOT):
+    """读取current指向的版本，没有安装时返回None"""
+    try:
+        with open(os.path.join(root, "current"), encoding="utf-8") as f: version = f.read().strip()
+    except OSError:
+        return None
+    return version if version and os.path.isdir(os.path.join(versions_dir(root), version)) else None
+
+def current_install(root=INSTALL_ROOT):
+    version = current_version(root)
+    return os.path.join(versions_dir(root), version) if version else None
+
+def switch_current(version, root=INSTALL_ROOT):
+    """写临时文件后用os.replace原子地切换current，读取方只会看到旧版本或新版本"""
+    tmp = os.path.join(root, f"current.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, "current"))
+
+def verify_install(path, hashes):
+    """检查已安装目录中的文件和清单哈希一致"""
+    try:
+        for name, digest in hashes.items():
+            with open(os.path.join(path, name), "rb") as f:
+                if file_hash(f.read()) != digest: return False
+    except OSError:
+        return False
+    return True
+
+def install_files(files, version, root=INSTALL_ROOT, activate=True):
+    """把{文件名: 内容}安装为一个不可变的版本目录，预编译字节码后切换current
+
+    文件先写入本进程独有的暂存目录，整体重命名为版本目录。同一版本已经完整安装时直接复用，
+    多个Maya会话同时安装也不会互相覆盖；正在运行的会话继续使用它已加载的旧版本目录。
+    """
+    check_name(version)
+    hashes = {check_name(name): file_hash(data) for name, data in files.items()}
+    versions = versions_dir(root)
+    target = os.path.join(versions, version)
+    os.makedirs(versions, exist_ok=True)
+    if not verify_install(target, hashes):
+        stage = os.path.join(versions, f".{version}.{os.getpid()}.tmp")
+        shutil.rmtree(stage, ignore_errors=True)
+        os.makedirs(stage)
+        for name, data in files.items():
+            with open(os.path.join(stage, name), "wb") as f: f.write(data)
+        with open(os.path.join(stage, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump({"version": version, "files": hashes}, f, indent=2)
+        # 版本目录不再修改，使用不检查源文件的哈希pyc，复制到共享路径后时间戳变化也不会重新编译
+        if not compileall.compile_dir(stage, quiet=1, force=True, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH):
+            shutil.rmtree(stage, ignore_errors=True)
+            raise RuntimeError(f"Version {version} failed to compile")
+        if os.path.exists(target):
+            # 损坏或内容不同的同名版本先移开，旧目录可能仍被其他会话使用，不直接删除
+            os.replace(target, os.path.join(versions, f".{version}.{os.getpid()}.old"))
+        try:
+            os.replace(stage, target)
+        except OSError:
+            shutil.rmtree(stage, ignore_errors=True)
+            if not verify_install(target, hashes): raise
+    if activate:
+        switch_current(version, root)
+        prune_versions(root)
+    return target
+
+def prune_versions(root=INSTALL_ROOT, keep=INSTALL_KEEP):
+    """只保留最近安装的keep个版本和current，清理残留超过STALE_SECONDS的暂存目录"""
+    versions, current = versions_dir(root), current_version(root)
+    entries = [os.path.join(versions, name) for name in os.listdir(versions)]
+    stale = [p for p in entries if os.path.basename(p).endswith((".old", ".tmp"))
+             and time.time() - os.path.getmtime(p) > STALE_SECONDS]
+    installed = sorted((p for p in entries if not os.path.basename(p).startswith(".")), key=os.path.getmtime, reverse=True)
+    for path in stale + [p for p in installed[keep:] if os.path.basename(p) != current]:
+        shutil.rmtree(path, ignore_errors=True)
+
+# ========================
+# 旧版安装迁移
+# ========================
+# 旧版把Assistant_tool.py直接放在脚本目录，工具架按钮用import Assistant_tool启动；
+# 这里换成启动入口，导入时从current指向的版本目录加载，入口模块会被真正的工具模块替换。
+# 入口在运行时按环境变量和用户目录确定安装根目录，没有可用的安装时回退到同目录中备份的旧版脚本
+LAUNCHER_HEADER = '''"""3D Assistant Tools启动入口: 工具已改为版本化安装，导入时启动current指向的版本"""'''
+LAUNCHER_SOURCE = LAUNCHER_HEADER + '''
+import importlib.util, os, sys
+INSTALL_ROOT = os.environ.get("ASSISTANT_INSTALL_ROOT") or os.path.join(os.path.expanduser("~"), "Documents", "3D_Assistant", "install")
+try:
+    with open(os.path.join(INSTALL_ROOT, "current"), encoding="utf-8") as _f:
+        _path = os.path.join(INSTALL_ROOT, "versions", _f.read().strip(), "tool_install.py")
+    if not os.path.isfile(_path): raise OSError(_path)
+except OSError:
+    _path = None
+if _path:
+    _spec = importlib.util.spec_from_file_location("tool_install", _path)
+    _installer = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(_installer)
+    _installer.launch(INSTALL_ROOT)
+else:
+    _spec = importlib.util.spec_from_file_location(__name__, os.path.join(os.path.dirname(os.path.abspath(__file__)), {backup!r}))
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[__name__] = _module
+    _spec.loader.exec_module(_module)
+'''
+
+def is_versioned(path, root=INSTALL_ROOT):
+    """路径是否位于版本目录中"""
+    versions = os.path.normcase(os.path.abspath(versions_dir(root)))
+    return os.path.normcase(os.path.abspath(path)).startswith(versions + os.sep)
+
+def is_user_script_dir(path):
+    """路径是否位于当前用户自己的Maya目录或文档目录中，共享或项目脚本目录不写入启动入口"""
+    home = os.path.expanduser("~")
+    path = os.path.normcase(os.path.abspath(path))
+    for base in (os.environ.get("MAYA_APP_DIR"), os.path.join(home, "Documents"), os.path.join(home, "maya")):
+        if base and path.startswith(os.path.normcase(os.path.abspath(base)) + os.sep): return True
+    return False
+
+def backup_name(name):
+    """旧版文件在脚本目录中的备份文件名"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_backup{ext}"
+
+def write_launcher(script_dir, root=INSTALL_ROOT):
+    """把旧版单文件安装目录中的Assistant_tool.py换成启动入口，并换上当前版本的安装器
+
+    已有的工具架命令重启Maya后仍然加载最新安装的版本，旧的0.9安装器也不会再覆盖工具脚本。
+    只处理当前用户自己的脚本目录，并且只用于默认安装根目录，入口中不写入绝对路径；
+    被替换的旧版文件先备份到同目录，current丢失时入口回退到备份的脚本。不满足条件时返回None。
+    """
+    installed = current_install(root)
+    if installed is None or is_versioned(script_dir, root) or not is_user_script_dir(script_dir): return None
+    if os.path.normcase(os.path.abspath(root)) != os.path.normcase(os.path.abspath(INSTALL_ROOT)): return None
+    with open(os.path.join(installed, "tool_install.py"), "rb") as f: installer = f.read()
+    launcher = LAUNCHER_SOURCE.format(backup=backup_name(INSTALL_FILES[0])).encode("utf-8")
+    for name, data in ((INSTALL_FILES[0], launcher), ("tool_install.py", installer)):
+        path = os.path.join(script_dir, name)
+        backup = os.path.join(script_dir, backup_name(name))
+        if os.path.exists(path) and not os.path.exists(backup):
+            with open(path, "rb") as f: previous = f.read()
+            # 已经是启动入口时没有旧版文件可备份
+            if not previous.startswith(LAUNCHER_HEADER.encode("utf-8")):
+                shutil.copy2(path, backup)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f: f.write(data)
+        os.replace(tmp, path)
+    return os.path.join(script_dir, INSTALL_FILES[0])
+
+# ========================
+# 离线安装包
+# ========================
+def read_bundle(path):
+    """读取zip安装包并按清单校验每个文件的SHA-256，返回(版本, {文件名: 内容})"""
+    with zipfile.ZipFile(path) as z:
+        manifest = json.loads(z.read(MANIFEST_NAME).decode("utf-8"))
+        version, files = str(manifest["version"]), {}
+        for name, digest in manifest["files"].items():
+            data = z.read(check_name(name))
+            if file_hash(data) != digest:
+                raise ValueError(f"Hash mismatch for {name} in {path}")
+            files[name] = data
+    if INSTALL_FILES[0] not in files:
+        raise ValueError(f"{INSTALL_FILES[0]} missing from {path}")
+    return version, files
+
+def install_bundle(path, root=INSTALL_ROOT):
+    """不访问网络，从本地或共享路径的安装包安装并切换到该版本"""
+    version, files = read_bundle(path)
+    return install_files(files, version, root)
+
+def build_bundle(out_path, source_dir=None, version=None):
+    """把source_dir中的安装文件和清单打包成zip，版本默认读取version.txt"""
+    source_dir = source_dir or os.path.dirname(LOCAL_PATH)
+    if version is None:
+        with open(os.path.join(source_dir, "version.txt"), encoding="utf-8") as f: version = f.read().strip()
+    files = {}
+    for name in INSTALL_FILES:
+        path = os.path.join(source_dir, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f: files[name] = f.read()
+    manifest = {"version": version, "files": {name: file_hash(data) for name, data in files.items()}}
+    tmp = out_path + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+        for name, data in files.items(): z.writestr(name, data)
+    os.replace(tmp, out_path)
+    return out_path
+
+# ========================
+# 启动
+# ========================
+def launch(root=INSTALL_ROOT):
+    """在主线程中从current指向的版本目录导入工具，替换之前加载的版本"""
+    path = current_install(root)
+    if path is None: raise RuntimeError(f"No version installed in {root}")
+    versions = os.path.normcase(os.path.abspath(versions_dir(root)))
+    sys.path[:] = [p for p in sys.path if os.path.normcase(os.path.dirname(os.path.abspath(p or "."))) != versions]
+    sys.path.insert(0, path)
+    for name in INSTALL_FILES:
+        module = os.path.splitext(name)[0]
+        if module != __name__: sys.modules.pop(module, None)
+    importlib.invalidate_caches()
+    return importlib.import_module(os.path.splitext(INSTALL_FILES[0])[0])
+
 def check_update():
     global dialog
     try:
-        req = urllib.request.Request(URL_VERSION, headers={"User-Agent": "Assistant"})
-        with urllib.request.urlopen(req, context=SSL_CTX, timeout=TIMEOUT) as r:
-            latest = r.read().decode().strip()
-            if latest != VERSION:
-                popup("Update Available", f"New {latest} available!\nCurrent: {VERSION}")
-                dialog.btn_update.setEnabled(True)
-                dialog.btn_update.setStyleSheet(dialog.style_enabled)
-            else:
-                popup("Up to Date", "You are using the latest version.")
+        latest = fetch(URL_VERSION).decode().strip()
+        if latest != current_version():
+            popup("Update Available", f"New {latest} available!\nInstalled: {current_version() or 'none'}")
+            dialog.btn_update.setEnabled(True)
+            dialog.btn_update.setStyleSheet(dialog.style_enabled)
+        else:
+            popup("Up to Date", "You are using the latest version.")
     except Exception as e:
         popup("Update Check Failed", str(e))
 
 def do_update():
     global dialog
     try:
-        req = urllib.request.Request(URL_SCRIPT, headers={"User-Agent": "Assistant"})
-        with urllib.request.urlopen(req, context=SSL_CTX, timeout=TIMEOUT) as r:
-            tmp = LOCAL_PATH + ".tmp"
-            with open(tmp, "wb") as f: f.write(r.read())
-            shutil.move(tmp, LOCAL_PATH)
-        popup("Update Complete", "Tool updated. UI will restart.")
+        latest = fetch(URL_VERSION).decode().strip()
+        install_files({name: fetch(URL_BASE + name) for name in INSTALL_FILES}, latest)
+        write_launcher(os.path.dirname(LOCAL_PATH))
+        popup("Update Complete", f"Version {latest} installed. UI will restart.")
         dialog.close()
-        importlib.reload(sys.modules[os.path.splitext(os.path.basename(LOCAL_PATH))[0]])
-        showUI()
+        launch()
     except Exception as e:
         popup("Update Failed", str(e))
 
+def do_install_bundle():
+    global dialog
+    path, _ = QtWidgets.QFileDialog.getOpenFileName(dialog, "Select Bundle", "", "Zip Bundle (*.zip)")
+    if not path: return
+    try:
+        install_bundle(path)
+        write_launcher(os.path.dirname(LOCAL_PATH))
+        popup("Install Complete", f"Version {current_version()} installed from bundle. UI will restart.")
+        dialog.close()
+        launch()
+    except Exception as e:
+        popup("Install Failed", str(e))
+
 def maya_main(): return wrapInstance(int(omui.MQtUtil.mainWindow()), QtWidgets.QWidget)
 
 class AssistantUI(QtWidgets.QDialog):
-    def __init__(self, parent=maya_main()):
-        super().__init__(parent)
+    def __init__(self, parent=None):
+        super().__init__(parent or maya_main())
         self.setWindowTitle(f"Assistant Install Tool v{VERSION}")
-        self.setFixedSize(380, 180)
+        self.setFixedSize(380, 200)
 
         self.style_enabled = "QPushButton{background:#2ecc71;color:white;border-radius:6px;padding:8px;}"
         style_blue = "QPushButton{background:#3498db;color:white;border-radius:6px;padding:8px;}"
@@ -61,20 +296,37 @@ class AssistantUI(QtWidgets.QDialog):
 
         title = QtWidgets.QLabel("Assistant Install Tool", alignment=QtCore.Qt.AlignCenter)
         title.setStyleSheet("font-size:16px;font-weight:bold;")
-        version = QtWidgets.QLabel(f"Current Version: {VERSION}", alignment=QtCore.Qt.AlignCenter)
+        version = QtWidgets.QLabel(f"Installed Version: {current_version() or 'none'}", alignment=QtCore.Qt.AlignCenter)
 
         self.btn_check = QtWidgets.QPushButton("Check for Updates"); self.btn_check.setStyleSheet(style_blue)
         self.btn_update = QtWidgets.QPushButton("Update Tool"); self.btn_update.setStyleSheet(style_disabled); self.btn_update.setEnabled(False)
+        self.btn_bundle = QtWidgets.QPushButton("Install from Bundle..."); self.btn_bundle.setStyleSheet(style_blue)
 
         layout = QtWidgets.QVBoxLayout(self); layout.addStretch(1)
         layout.addWidget(title); layout.addWidget(version); layout.addStretch(1)
-        h = QtWidgets.QHBoxLayout(); h.addWidget(self.btn_check); h.addWidget(self.btn_update); layout.addLayout(h); layout.addStretch(2)
+        h = QtWidgets.QHBoxLayout(); h.addWidget(self.btn_check); h.addWidget(self.btn_update); layout.addLayout(h)
+        layout.addWidget(self.btn_bundle); layout.addStretch(2)
 
         self.btn_check.clicked.connect(check_update)
         self.btn_update.clicked.connect(do_update)
+        self.btn_bundle.clicked.connect(do_install_bundle)
 
 def showUI():
     global dialog
     dialog = AssistantUI(); dialog.show()
 
-showUI()
\ No newline at end of file
+def main(argv=None):
+    """无界面安装: mayapy tool_install.py --bundle <zip> 或 --build <zip>"""
+    parser = argparse.ArgumentParser(description="Install 3D Assistant Tools into versioned directories.")
+    parser.add_argument("--bundle", help="install from this zip bundle without network access")
+    parser.add_argument("--build", help="write a zip bundle of the files next to this script")
+    parser.add_argument("--root", default=INSTALL_ROOT, help="install root")
+    args = parser.parse_args(argv)
+    if args.build: print(build_bundle(args.build))
+    if args.bundle: print(install_bundle(args.bundle, args.root))
+    return 0
+
+# 在脚本编辑器中执行时显示UI，带参数运行时作为命令行工具，被导入时只提供安装函数
+if __name__ == "__main__":
+    if sys.argv[1:]: sys.exit(main())
+    else: showUI()